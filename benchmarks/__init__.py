@@ -0,0 +1,13 @@
+"""
+benchmarks
+Offline-Benchmarks für den Bot. Aufruf aus dem Repo-Root, z.B.:
+    python -m benchmarks.bench_templates
+"""
+
+import os
+import sys
+
+# Die Bot-Module liegen flach in src/ (wie im Container unter /app/src)
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
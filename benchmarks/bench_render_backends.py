@@ -0,0 +1,124 @@
+"""
+bench_render_backends.py
+Vergleich der Render-Backends (ffmpeg-zoompan vs. frame_compositor) für zoom und pan.
+
+Pro Fall: Wandzeit, CPU-Zeit (Python + ffmpeg) und ein Ruckel-Maß. Für das
+Ruckel-Maß wird das fertige Video als Graustufen-Frames dekodiert:
+d[n] = mittlere Differenz zwischen Frame n und n+1 (wie viel sich bewegt).
+Bei gleichmäßiger Bewegung ändert sich d nur langsam; ganzzahlig gerundete
+Crop-Koordinaten lassen d springen.
+    jitter = mittleres |d[n+1] - d[n]| / mittleres d[n]   (kleiner = ruhiger)
+
+    python -m benchmarks.bench_render_backends                # 4s-Videos, Fakt 0, Palette 0
+    python -m benchmarks.bench_render_backends --duration=13
+
+Ergebnis landet in benchmarks/results/render_backends.json. Läuft offline (ohne Musik).
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import tempfile
+import time
+
+from benchmarks import SRC_DIR  # noqa: F401  (setzt sys.path)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_FILE = os.path.join(BENCH_DIR, "corpus.json")
+RESULTS_FILE = os.path.join(BENCH_DIR, "results", "render_backends.json")
+
+BACKENDS = ("ffmpeg", "compositor")
+ANIMS = ("zoom", "pan")
+WIDTH, HEIGHT = 1080, 1920
+
+
+def _cpu():
+    own, children = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def frame_diffs(video_path: str) -> list:
+    """d[n] = mittlere Graustufen-Differenz zwischen Frame n und n+1 des dekodierten Videos."""
+    from PIL import Image, ImageChops, ImageStat
+
+    proc = subprocess.Popen(
+        ["ffmpeg", "-v", "error", "-i", video_path, "-f", "rawvideo", "-pix_fmt", "gray", "pipe:1"],
+        stdout=subprocess.PIPE,
+    )
+    frame_bytes = WIDTH * HEIGHT
+    diffs, previous = [], None
+    while True:
+        raw = proc.stdout.read(frame_bytes)
+        if len(raw) < frame_bytes:
+            break
+        frame = Image.frombytes("L", (WIDTH, HEIGHT), raw)
+        if previous is not None:
+            diffs.append(ImageStat.Stat(ImageChops.difference(frame, previous)).mean[0])
+        previous = frame
+    proc.wait()
+    return diffs
+
+
+def jitter(video_path: str) -> dict:
+    """Frame-Differenzen des dekodierten Videos -> (mittlere Bewegung, Ruckel-Maß)."""
+    diffs = frame_diffs(video_path)
+    motion = sum(diffs) / len(diffs)
+    steps = [abs(b - a) for a, b in zip(diffs, diffs[1:])]
+    return {"frames": len(diffs) + 1, "motion": motion, "jitter": (sum(steps) / len(steps)) / motion if motion else 0.0}
+
+
+def run_case(backend: str, anim: str, duration: float, fact: dict, palette: int, workdir: str) -> dict:
+    import bot
+
+    temp_assets = []
+    base_path = os.path.join(workdir, f"{backend}_{anim}")
+    background, layers, render_mode = bot.prepare_fact_images(fact, base_path, "classic", anim, duration, palette,
+                                                              temp_assets, seed=0)
+    video_path = base_path + ".mp4"
+    cpu_before, started = _cpu(), time.perf_counter()
+    bot.render_advanced_video(background, layers, video_path, render_mode, anim, duration, palette, seed=0,
+                              backend=backend)
+    metrics = {"wall_s": time.perf_counter() - started, "cpu_s": _cpu() - cpu_before,
+               "output_bytes": os.path.getsize(video_path)}
+    metrics.update(jitter(video_path))
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--duration", type=float, default=4.0)
+    parser.add_argument("--fact", type=int, default=0, help="Index im Korpus")
+    parser.add_argument("--palette", type=int, default=0)
+    parser.add_argument("--output", default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    with open(CORPUS_FILE, "r", encoding="utf-8") as f:
+        item = json.load(f)[args.fact]
+    fact = {"fact": item["fact"], "source": item["source"], "parts": item["parts"]}
+
+    with tempfile.TemporaryDirectory(prefix="bench_backends_") as workdir:
+        from pathlib import Path
+        os.environ.setdefault("MUSIC_LIBRARY_DIR", os.path.join(workdir, "music"))
+        import bot
+        bot.ASSETS_DIR = Path(workdir) / "no-music"  # Stille statt zufälliger Musik
+
+        results = {"duration": args.duration, "fact": args.fact, "palette": args.palette, "cases": {}}
+        for anim in ANIMS:
+            for backend in BACKENDS:
+                case_id = f"{anim}/{backend}"
+                results["cases"][case_id] = metrics = run_case(backend, anim, args.duration, fact, args.palette, workdir)
+                print(f"{case_id:<20} wall {metrics['wall_s']:6.2f}s  cpu {metrics['cpu_s']:6.2f}s  "
+                      f"motion {metrics['motion']:5.2f}  jitter {metrics['jitter']:.3f}  "
+                      f"{metrics['output_bytes'] / 1024:7.0f} KB")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"→ {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,106 @@
+"""
+bench_segments.py
+Segment-paralleles Rendern (RENDER_SEGMENTS) gegen einen ffmpeg-Prozess pro Video,
+für 13s-, 30s- und 60s-Videos.
+
+Pro Fall: Wandzeit, CPU-Zeit und ein Naht-Maß. Für jede Segmentgrenze b wird die
+Frame-Differenz d[b-1] (letzter Frame davor -> erster danach) mit dem Median der
+Differenzen in den 15 Frames davor und danach verglichen; "seam" ist die größte
+Abweichung über alle Grenzen. Dieselben Positionen werden auch im ungeteilten
+Video gemessen ("seam" bei segments=1) - dort liegen ganz normale Keyframes, das ist
+die Vergleichsgröße. Auf einem Kern ist kein Speedup zu erwarten.
+
+    python -m benchmarks.bench_segments                         # 13/30/60s, 1 vs. Kerne (mind. 2)
+    python -m benchmarks.bench_segments --durations=13 --segments=1,2,4 --anim=pan
+
+Ergebnis landet in benchmarks/results/segments.json. Läuft offline (ohne Musik).
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks import SRC_DIR  # noqa: F401  (setzt sys.path)
+from benchmarks.bench_render_backends import _cpu, frame_diffs
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_FILE = os.path.join(BENCH_DIR, "corpus.json")
+RESULTS_FILE = os.path.join(BENCH_DIR, "results", "segments.json")
+
+DURATIONS = (13.0, 30.0, 60.0)
+SEAM_WINDOW = 15
+
+
+def segment_bounds(duration: float, segments: int, fps: int = 30) -> list:
+    """Erste Frames der Segmente 2..n (wie bot._render_segments)."""
+    import bot
+    segments = max(1, min(segments, int(duration // bot.SEGMENT_MIN_SECONDS)))
+    return [round(duration * k / segments) * fps for k in range(1, segments)]
+
+
+def seam(diffs: list, bounds: list) -> float:
+    worst = 0.0
+    for b in bounds:
+        around = sorted(diffs[max(0, b - 1 - SEAM_WINDOW):b - 1] + diffs[b:b + SEAM_WINDOW])
+        if around:
+            worst = max(worst, abs(diffs[b - 1] - around[len(around) // 2]))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--durations", default=",".join(f"{d:g}" for d in DURATIONS))
+    parser.add_argument("--segments", default=f"1,{max(2, os.cpu_count() or 1)}")
+    parser.add_argument("--anim", default="zoom", choices=("zoom", "pan", "static"))
+    parser.add_argument("--backend", default="ffmpeg", choices=("ffmpeg", "compositor"))
+    parser.add_argument("--fact", type=int, default=0, help="Index im Korpus")
+    parser.add_argument("--palette", type=int, default=0)
+    parser.add_argument("--output", default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    durations = [float(d) for d in args.durations.split(",") if d.strip()]
+    segment_counts = [int(s) for s in args.segments.split(",") if s.strip()]
+
+    with open(CORPUS_FILE, "r", encoding="utf-8") as f:
+        item = json.load(f)[args.fact]
+    fact = {"fact": item["fact"], "source": item["source"], "parts": item["parts"]}
+
+    results = {"anim": args.anim, "backend": args.backend, "cpu_count": os.cpu_count(), "cases": {}}
+    with tempfile.TemporaryDirectory(prefix="bench_segments_") as workdir:
+        from pathlib import Path
+        os.environ.setdefault("MUSIC_LIBRARY_DIR", os.path.join(workdir, "music"))
+        import bot
+        bot.ASSETS_DIR = Path(workdir) / "no-music"  # Stille statt zufälliger Musik
+
+        for duration in durations:
+            base_path = os.path.join(workdir, f"d{duration:g}")
+            background, layers, render_mode = bot.prepare_fact_images(
+                fact, base_path, "three_parts", args.anim, duration, args.palette, [], seed=0)
+            # Gemessen wird an den Grenzen der größten Segmentzahl - auch im ungeteilten Video
+            bounds = segment_bounds(duration, max(segment_counts))
+            for segments in segment_counts:
+                video_path = f"{base_path}_s{segments}.mp4"
+                cpu_before, started = _cpu(), time.perf_counter()
+                bot.render_advanced_video(background, layers, video_path, render_mode, args.anim, duration,
+                                          args.palette, seed=0, backend=args.backend, segments=segments)
+                case_id = f"{duration:g}s/segments={segments}"
+                metrics = results["cases"][case_id] = {
+                    "wall_s": time.perf_counter() - started, "cpu_s": _cpu() - cpu_before,
+                    "output_bytes": os.path.getsize(video_path),
+                    "seam": seam(frame_diffs(video_path), bounds),
+                }
+                os.remove(video_path)
+                print(f"{case_id:<22} wall {metrics['wall_s']:7.2f}s  cpu {metrics['cpu_s']:7.2f}s  "
+                      f"seam {metrics['seam']:.3f}  {metrics['output_bytes'] / 1024:7.0f} KB")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"→ {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
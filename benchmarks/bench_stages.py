@@ -0,0 +1,266 @@
+"""
+bench_stages.py
+Benchmark der Bild- und Render-Stufen über einen festen Fakten-Korpus
+(benchmarks/corpus.json), alle 5 Paletten und jede Mode/Anim-Kombination.
+
+Jeder Fall läuft in einem eigenen Prozess, damit Peak-RSS pro Fall stimmt.
+Gemessen werden Wandzeit, CPU-Zeit (inkl. ffmpeg), Peak-RSS und die Bytes der
+erzeugten Dateien. Zufall (Partikel) ist pro Fall fest geseedet, Musik und
+Render-Cache sind aus - läuft komplett offline.
+
+    python -m benchmarks.bench_stages                    # alles, Vergleich mit baseline.json
+    python -m benchmarks.bench_stages --quick            # 2s-Videos (schneller Check)
+    python -m benchmarks.bench_stages --filter render/three_parts
+    python -m benchmarks.bench_stages --update-baseline  # aktuelle Werte als Baseline speichern
+
+Ergebnis landet in benchmarks/results/latest.json. Exit-Code 1 bei Regression.
+Die Baseline ist maschinenabhängig - auf der Zielmaschine erzeugen und committen.
+Verglichen wird nur, wenn Maschine (Architektur, Kerne, Python, ffmpeg) zur Baseline
+passt; sonst gibt es eine Warnung statt eines Vergleichs.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks import SRC_DIR  # noqa: F401  (setzt sys.path)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+CORPUS_FILE = os.path.join(BENCH_DIR, "corpus.json")
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+RESULTS_FILE = os.path.join(BENCH_DIR, "results", "latest.json")
+
+PALETTE_COUNT = 5
+IMAGE_STAGES = ("create_fact_image", "create_base_background", "create_text_layer")
+MODES = ("classic", "three_parts", "word_by_word")
+ANIMS = ("zoom", "static", "pan")
+DURATIONS = (13.0,)
+QUICK_DURATIONS = (2.0,)
+
+# Erlaubte Verschlechterung (relativ) + absoluter Puffer gegen Rauschen bei kleinen Werten
+TOLERANCES = {
+    "wall_s": (0.25, 0.05),
+    "cpu_s": (0.25, 0.05),
+    "peak_rss_kb": (0.20, 4096),
+    "output_bytes": (0.10, 1024),
+}
+# Bei der Dateigröße ist auch "viel kleiner" verdächtig (leeres/kaputtes Video)
+SYMMETRIC_METRICS = ("output_bytes",)
+# Diese meta-Felder müssen zur Baseline passen, sonst sagen die Toleranzen nichts aus
+MACHINE_KEYS = ("machine", "cpus", "python", "ffmpeg")
+
+
+def load_corpus():
+    with open(CORPUS_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_cases(durations, palettes):
+    cases = []
+    corpus_size = len(load_corpus())
+    for stage in IMAGE_STAGES:
+        for palette in palettes:
+            cases.append({"id": f"image/{stage}/p{palette}", "stage": stage, "palette": palette})
+    # Render: jede Mode/Anim/Dauer-Kombination, Paletten reihum
+    index = 0
+    for duration in durations:
+        for mode in MODES:
+            for anim in ANIMS:
+                palette = palettes[index % len(palettes)]
+                cases.append({
+                    "id": f"render/{mode}/{anim}/{duration:g}s",
+                    "stage": "render_advanced_video",
+                    "mode": mode, "anim": anim, "duration": duration,
+                    "palette": palette, "fact": index % corpus_size,
+                })
+                index += 1
+    return cases
+
+
+# ── Ein Fall (läuft im Kindprozess) ───────────────────────────
+def _usage():
+    own, children = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+    return cpu, max(own.ru_maxrss, children.ru_maxrss)
+
+
+def run_case(case: dict, workdir: str) -> dict:
+    from pathlib import Path
+    import generate_image as gi
+    import bot
+
+    bot.ASSETS_DIR = Path(workdir) / "no-music"  # anullsrc statt zufälliger Musik
+    gi.preload_fonts()
+    corpus = load_corpus()
+
+    metrics = {}
+    cpu_before, _ = _usage()
+    started = time.perf_counter()
+
+    palette = case["palette"]
+    if case["stage"] == "create_fact_image":
+        for i, item in enumerate(corpus):
+            gi.create_fact_image(item["fact"], item["source"], os.path.join(workdir, f"full{i}.png"), palette, seed=i)
+    elif case["stage"] == "create_base_background":
+        for i, item in enumerate(corpus):
+            gi.create_base_background(palette, item["source"], os.path.join(workdir, f"bg{i}.png"), seed=i)
+    elif case["stage"] == "create_text_layer":
+        for i, item in enumerate(corpus):
+            for j, part in enumerate([item["fact"]] + item["parts"]):
+                gi.create_text_layer(part, palette, os.path.join(workdir, f"layer{i}_{j}.png"))
+    else:
+        item = corpus[case["fact"]]
+        fact_data = {"fact": item["fact"], "source": item["source"], "parts": item["parts"]}
+        timings = bot.render_fact_video(fact_data, os.path.join(workdir, "video.mp4"), case["mode"],
+                                        case["anim"], case["duration"], palette, [], cache=False)
+        metrics["image_wall_s"] = timings["image"]
+        metrics["render_wall_s"] = timings["render"]
+
+    wall = time.perf_counter() - started
+    cpu_after, peak_rss = _usage()
+    metrics.update({
+        "wall_s": wall,
+        "cpu_s": cpu_after - cpu_before,
+        "peak_rss_kb": peak_rss,
+        "output_bytes": sum(os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir)
+                            if os.path.isfile(os.path.join(workdir, name))),
+    })
+    return metrics
+
+
+def run_case_isolated(case: dict) -> dict:
+    """Startet den Fall in einem frischen Interpreter und liest das Ergebnis aus einer Datei."""
+    with tempfile.TemporaryDirectory(prefix="bench_") as workdir:
+        result_file = os.path.join(workdir, "result.json")
+        case_dir = os.path.join(workdir, "out")
+        os.makedirs(case_dir)
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_stages", "--run-case", json.dumps(case),
+             "--workdir", case_dir, "--result-file", result_file],
+            cwd=os.path.dirname(BENCH_DIR), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"{case['id']} failed:\n{proc.stderr[-1500:]}")
+        with open(result_file, "r") as f:
+            return json.load(f)
+
+
+# ── Vergleich mit der Baseline ────────────────────────────────
+def compare(results: dict, baseline: dict) -> list:
+    """Liste von (case_id, metric, baseline, current) für alle Regressionen."""
+    regressions = []
+    for case_id, current in results["cases"].items():
+        base = baseline.get("cases", {}).get(case_id)
+        if not base:
+            continue
+        for metric, (rel, slack) in TOLERANCES.items():
+            if metric not in base or metric not in current:
+                continue
+            limit = base[metric] * rel + slack
+            delta = current[metric] - base[metric]
+            if delta > limit or (metric in SYMMETRIC_METRICS and -delta > limit):
+                regressions.append((case_id, metric, base[metric], current[metric]))
+    return regressions
+
+
+def machine_mismatch(current: dict, baseline: dict) -> list:
+    """(Feld, Baseline, aktuell) für jedes MACHINE_KEYS-Feld, das abweicht."""
+    return [(key, baseline.get(key), current.get(key)) for key in MACHINE_KEYS
+            if baseline.get(key) != current.get(key)]
+
+
+def _ffmpeg_version():
+    try:
+        out = subprocess.run(["ffmpeg", "-version"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        return out.stdout.splitlines()[0]
+    except (OSError, IndexError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quick", action="store_true", help="2s-Videos statt 13s")
+    parser.add_argument("--filter", default="", help="Nur Fälle, deren ID diesen Text enthält")
+    parser.add_argument("--palettes", default=",".join(str(i) for i in range(PALETTE_COUNT)),
+                        help="Kommagetrennte Palettenindizes (Standard: alle)")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        metrics = run_case(json.loads(args.run_case), args.workdir)
+        with open(args.result_file, "w") as f:
+            json.dump(metrics, f)
+        return 0
+
+    palettes = [int(p) for p in args.palettes.split(",") if p.strip()]
+    cases = [c for c in build_cases(QUICK_DURATIONS if args.quick else DURATIONS, palettes)
+             if args.filter in c["id"]]
+
+    results = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "ffmpeg": _ffmpeg_version(),
+            "quick": args.quick,
+        },
+        "cases": {},
+    }
+
+    print(f"{'case':<42}{'wall':>9}{'cpu':>9}{'rss MB':>9}{'out KB':>10}")
+    for case in cases:
+        metrics = run_case_isolated(case)
+        results["cases"][case["id"]] = metrics
+        print(f"{case['id']:<42}{metrics['wall_s']:>8.2f}s{metrics['cpu_s']:>8.2f}s"
+              f"{metrics['peak_rss_kb'] / 1024:>9.1f}{metrics['output_bytes'] / 1024:>10.1f}", flush=True)
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nErgebnis: {os.path.relpath(args.output)}")
+
+    if args.update_baseline:
+        baseline = {"meta": results["meta"], "cases": {}}
+        if os.path.exists(BASELINE_FILE):
+            with open(BASELINE_FILE, "r") as f:
+                baseline["cases"] = json.load(f).get("cases", {})
+        baseline["cases"].update(results["cases"])
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline aktualisiert: {os.path.relpath(BASELINE_FILE)} ({len(results['cases'])} Fälle)")
+        return 0
+
+    if not os.path.exists(BASELINE_FILE):
+        print("Keine Baseline vorhanden - mit --update-baseline auf der Zielmaschine anlegen.")
+        return 0
+    with open(BASELINE_FILE, "r") as f:
+        baseline = json.load(f)
+    mismatched = machine_mismatch(results["meta"], baseline.get("meta", {}))
+    if mismatched:
+        print("[WARN] Baseline stammt von einer anderen Maschine - kein Vergleich:")
+        for key, base, current in mismatched:
+            print(f"       {key}: Baseline {base!r}, hier {current!r}")
+        print("       Auf dieser Maschine mit --update-baseline neu erzeugen.")
+        return 0
+    regressions = compare(results, baseline)
+    for case_id, metric, base, current in regressions:
+        print(f"[FAIL] {case_id}: {metric} {base:.3g} -> {current:.3g}")
+    matched = sum(1 for case_id in results["cases"] if case_id in baseline.get("cases", {}))
+    print(f"{matched} Fälle mit Baseline verglichen, {len(regressions)} Regressionen.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
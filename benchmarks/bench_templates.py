@@ -0,0 +1,67 @@
+"""
+bench_templates.py
+Micro-Benchmark: Dashboard-Rendering mit vorkompiliertem Template vs. der alten
+Kette aus ~25 str.replace()-Aufrufen, plus Antwortgröße mit gzip/brotli.
+
+    python -m benchmarks.bench_templates [--runs 2000]
+"""
+
+import argparse
+import gzip
+import timeit
+
+from benchmarks import SRC_DIR  # noqa: F401  (setzt sys.path)
+import web_interface as wi
+
+
+def sample_values():
+    values = {
+        "next_post": "<b>Heute 12:00 Uhr</b> (11:00 UTC)",
+        "total_videos": 123,
+        "logs": "\n".join(f"[2026-02-18 10:00:{i:02d}] [INFO] Log line {i}" for i in range(50)),
+        "log_offset": 123456,
+        "duration_value": 13.0,
+        "drive_enabled_selected": "selected",
+        "drive_disabled_selected": "",
+    }
+    for options, current in ((wi.MODE_OPTIONS, "classic"), (wi.ANIM_OPTIONS, "zoom"), (wi.TOPIC_OPTIONS, "random")):
+        for field, value in options.items():
+            values[field] = "selected" if current == value else ""
+    return values
+
+
+def render_chained_replace(values):
+    """So wurde das Dashboard vorher gebaut: ein replace() pro Platzhalter."""
+    html = wi.HTML_DASHBOARD
+    for name, value in values.items():
+        html = html.replace("{" + name + "}", str(value))
+    return html
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=2000)
+    args = parser.parse_args()
+
+    values = sample_values()
+    assert render_chained_replace(values) == wi.DASHBOARD_TEMPLATE.render(**values)
+
+    old = timeit.timeit(lambda: render_chained_replace(values), number=args.runs)
+    new = timeit.timeit(lambda: wi.DASHBOARD_TEMPLATE.render(**values), number=args.runs)
+    print(f"Render ({args.runs} runs)")
+    print(f"  str.replace chain : {old / args.runs * 1e6:8.1f} µs/render")
+    print(f"  Template.render   : {new / args.runs * 1e6:8.1f} µs/render  ({old / new:.1f}x)")
+
+    body = wi.DASHBOARD_TEMPLATE.render(**values).encode()
+    gz = gzip.compress(body, compresslevel=wi.GZIP_LEVEL)
+    gz_time = timeit.timeit(lambda: gzip.compress(body, compresslevel=wi.GZIP_LEVEL), number=200) / 200
+    print("Wire size (dashboard)")
+    print(f"  identity          : {len(body):8d} bytes")
+    print(f"  gzip -{wi.GZIP_LEVEL}           : {len(gz):8d} bytes  ({gz_time * 1e6:.0f} µs)")
+    if wi.brotli is not None:
+        br = wi.brotli.compress(body, quality=wi.BROTLI_QUALITY)
+        print(f"  brotli q{wi.BROTLI_QUALITY}         : {len(br):8d} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+image_memory.py
+Prüft den Speicherbedarf pro Bild (create_fact_image, create_base_background,
+create_text_layer) über den Korpus und alle Paletten.
+
+Gemessen wird im eingeschwungenen Zustand (Fonts geladen, ein Aufwärm-Bild pro
+Funktion), also so, wie der warme Render-Worker Bilder erzeugt:
+  - python_peak_kb : tracemalloc-Peak (nur Python-Objekte!)
+  - rss_growth_kb  : VmHWM nach dem Aufruf minus RSS davor (Linux, via clear_refs)
+  - pillow_images  : neu angelegte Pillow-Bilder inkl. Glyphen-Masken
+  - pillow_blocks  : Speicherblöcke, die Pillow frisch vom OS holen musste
+
+tracemalloc sieht die Pixelpuffer von Pillow nicht (die kommen aus Pillows eigenem
+C-Allocator) - deshalb zusätzlich RSS und Image.core.get_stats().
+
+    python -m benchmarks.image_memory
+
+Exit-Code 1, wenn ein Bild die Grenzen in LIMITS überschreitet.
+"""
+
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from benchmarks import SRC_DIR  # noqa: F401  (setzt sys.path)
+from benchmarks.bench_stages import PALETTE_COUNT, load_corpus
+
+FRAME_KB = 1080 * 1920 * 4 // 1024  # Pillow speichert RGB mit 4 Bytes pro Pixel
+
+# Obergrenzen pro Bild (eingeschwungen)
+LIMITS = {
+    "python_peak_kb": 512,
+    "rss_growth_kb": FRAME_KB * 3 // 2,
+    "pillow_blocks": 2,
+}
+
+
+def _rss_kb(field: str):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    """Setzt VmHWM auf den aktuellen RSS zurück (Linux >= 4.0)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def measure(func, *args) -> dict:
+    from PIL import Image
+
+    rss_ok = _reset_peak_rss()
+    rss_before = _rss_kb("VmRSS")
+    stats_before = Image.core.get_stats()
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, python_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    stats_after = Image.core.get_stats()
+    peak = _rss_kb("VmHWM")
+
+    return {
+        "python_peak_kb": python_peak / 1024,
+        "rss_growth_kb": peak - rss_before if rss_ok and peak is not None else None,
+        "pillow_images": stats_after["new_count"] - stats_before["new_count"],
+        "pillow_blocks": stats_after["allocated_blocks"] - stats_before["allocated_blocks"],
+    }
+
+
+def main():
+    import generate_image as gi
+
+    gi.preload_fonts()
+    corpus = load_corpus()
+    failures = []
+
+    with tempfile.TemporaryDirectory(prefix="imgmem_") as workdir:
+        out = os.path.join(workdir, "out.png")
+        cases = {
+            "create_fact_image": lambda item, p: gi.create_fact_image(item["fact"], item["source"], out, p),
+            "create_base_background": lambda item, p: gi.create_base_background(p, item["source"], out),
+            "create_text_layer": lambda item, p: gi.create_text_layer(item["fact"], p, out),
+        }
+
+        print(f"{'case':<34}{'py KB':>9}{'rss KB':>9}{'images':>8}{'blocks':>8}")
+        for name, func in cases.items():
+            func(corpus[0], 0)  # Aufwärmen: Block-Cache und Verlaufs-Spalten füllen
+            for palette in range(PALETTE_COUNT):
+                for index, item in enumerate(corpus):
+                    metrics = measure(func, item, palette)
+                    case_id = f"{name}/p{palette}/f{index}"
+                    rss = metrics["rss_growth_kb"]
+                    print(f"{case_id:<34}{metrics['python_peak_kb']:>9.0f}"
+                          f"{'-' if rss is None else rss:>9}{metrics['pillow_images']:>8}{metrics['pillow_blocks']:>8}")
+                    for metric, limit in LIMITS.items():
+                        if metrics[metric] is not None and metrics[metric] > limit:
+                            failures.append((case_id, metric, metrics[metric], limit))
+
+    if _rss_kb("VmHWM") is None:
+        print("\nHinweis: kein /proc - RSS wird nicht geprüft.")
+    for case_id, metric, value, limit in failures:
+        print(f"[FAIL] {case_id}: {metric} {value:.0f} > {limit}")
+    print(f"{len(failures)} Überschreitungen.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
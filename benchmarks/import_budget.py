@@ -0,0 +1,84 @@
+"""
+import_budget.py
+Prüft per `python -X importtime`, dass die Einstiegsmodule billig zu importieren
+sind. Schlägt fehl (Exit-Code 1), wenn
+  - ein Modul sein Zeitbudget überschreitet, oder
+  - ein Modul beim Import eine schwere Abhängigkeit lädt, die erst eine
+    Pipeline-Stufe braucht (Pillow, requests, ...).
+
+    python -m benchmarks.import_budget [--scale 2.0]
+
+--scale multipliziert alle Budgets (langsame CI-Maschinen).
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+from benchmarks import SRC_DIR
+
+# Budget in Millisekunden (kumulativ, inkl. aller Untermodule, ohne Interpreter-Start)
+BUDGETS_MS = {
+    "scheduler": 60,
+    "bot": 40,
+    "archive_manager": 40,
+    "live_events": 25,
+    "web_interface": 120,
+}
+
+# Module, die beim reinen Import NICHT geladen werden dürfen
+FORBIDDEN = {
+    "scheduler": ("PIL", "requests", "web_interface", "openai"),
+    "bot": ("PIL", "requests", "archive_manager", "generate_image", "openai"),
+    "archive_manager": ("PIL", "requests"),
+    "live_events": ("PIL", "requests"),
+    "web_interface": ("PIL", "requests"),
+}
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str) -> dict:
+    """Gibt {modulname: kumulative µs} für einen frischen Import von `module` zurück."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR, capture_output=True, text=True,
+        env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    timings = {}
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            timings[match.group(4)] = int(match.group(2))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", type=float, default=float(os.environ.get("IMPORT_BUDGET_SCALE", "1.0")))
+    args = parser.parse_args()
+
+    failed = False
+    for module, budget in BUDGETS_MS.items():
+        # Zweimal messen, den besseren Wert nehmen (erster Lauf wärmt den Datei-Cache)
+        runs = [measure(module) for _ in range(2)]
+        cost_ms = min(run.get(module, 0) for run in runs) / 1000
+        limit = budget * args.scale
+        loaded = [name for name in FORBIDDEN.get(module, ()) if name in runs[0]]
+
+        ok = cost_ms <= limit and not loaded
+        failed |= not ok
+        status = "ok  " if ok else "FAIL"
+        print(f"[{status}] {module:<16} {cost_ms:7.1f} ms  (budget {limit:.0f} ms)")
+        for name in loaded:
+            print(f"         lädt beim Import schon '{name}' - bitte in die Stufe verschieben, die es braucht")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
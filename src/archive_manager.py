@@ -2,66 +2,155 @@ import os
 import shutil
 import time
 import json
-import requests
+import bisect
+import threading
 from datetime import datetime
 
-# Wir leihen uns die fertige Token-Funktion aus deinem YouTube-Skript!
-from youtube_upload import refresh_access_token
+import thumbnails
+import state_store
+import structured_log
 
 # Pfad zum persistenten Volume, Logs und State
 ARCHIVE_DIR = "/data/archive" 
 REAL_ARCHIVE_PATH = os.path.realpath(ARCHIVE_DIR)
 DB_FILE = os.path.join(REAL_ARCHIVE_PATH, "archive.json")
-LOG_FILE = "/app/logs/bot.log"
 STATE_FILE = "/app/logs/state.json"
 
+# Was im Archiv-Ordner Medien sind (Video, Bild, Poster, Preview, Variante). Alles andere
+# (archive.json, upload_queue.json, fact_reserve.json, *.lock) ist Kanal-Zustand: nie
+# altersbedingt löschen und nie über /download ausliefern.
+MEDIA_EXTENSIONS = (".mp4", ".png", ".jpg")
+
+
+def is_media_file(filename):
+    return filename.lower().endswith(MEDIA_EXTENSIONS)
+
 def _log_msg(msg):
-    """Schreibt Logs in die Konsole (für Railway) UND in die bot.log (fürs Web-Dashboard)"""
-    print(msg)
-    try:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        line = f"[{timestamp}] [INFO] {msg}\n"
-        real_log_file = os.path.realpath(LOG_FILE)
-        os.makedirs(os.path.dirname(real_log_file), exist_ok=True)
-        with open(real_log_file, "a", encoding="utf-8") as f:
-            f.write(line)
-    except Exception:
-        pass
-
-def _load_db():
-    if not os.path.exists(DB_FILE):
+    """Konsole (für Railway) UND bot.log (fürs Web-Dashboard) - über die gemeinsame Log-Schicht."""
+    structured_log.log(msg, source="archive")
+
+def _db_file(archive_dir=None):
+    """archive.json des Kanal-Archivs (ohne Angabe: das Standard-Archiv)."""
+    if archive_dir is None:
+        return DB_FILE
+    return os.path.join(os.path.realpath(archive_dir), "archive.json")
+
+def _load_db(archive_dir=None):
+    db_file = _db_file(archive_dir)
+    if not os.path.exists(db_file):
         return []
     try:
-        with open(DB_FILE, "r") as f:
+        with open(db_file, "r") as f:
             return json.load(f)
-    except:
+    except (OSError, ValueError):
         return []
 
-def _save_db(data):
-    with open(DB_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+def _save_db(data, archive_dir=None):
+    """Atomar (Temp-Datei + os.replace): der gecachte Index sieht nie eine halb geschriebene archive.json."""
+    state_store.write_json_atomic(_db_file(archive_dir), data, indent=4)
+
+# ── Archiv-Index (sortiert + gecacht, invalidiert über die Archiv-Version) ──
+_index_lock = threading.Lock()
+_index_cache = {}  # archive.json Pfad -> {"version", "all", "by_topic"}
+
+
+def archive_version(archive_dir=None):
+    """Version des Archivs = (mtime, Größe) der archive.json. Ändert sich bei jedem Schreiben."""
+    try:
+        st = os.stat(_db_file(archive_dir))
+        return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+    except OSError:
+        return "empty"
+
+
+def _entry_key(entry):
+    return (entry.get("timestamp", ""), entry.get("video_file", ""))
+
+
+def _build_index(archive_dir=None):
+    """Lädt die DB einmal pro Version und legt aufsteigend sortierte Listen an."""
+    version = archive_version(archive_dir)
+    with _index_lock:
+        cache = _index_cache.setdefault(_db_file(archive_dir), {"version": None})
+        if cache["version"] == version:
+            return cache
+        items = sorted(_load_db(archive_dir), key=_entry_key)
+        by_topic = {}
+        for entry in items:
+            by_topic.setdefault(entry.get("topic", "AI Fails"), []).append(entry)
+
+        def pack(entries):
+            return {"items": entries, "keys": [_entry_key(e) for e in entries]}
+
+        cache.update({
+            "version": version,
+            "all": pack(items),
+            "by_topic": {t: pack(e) for t, e in by_topic.items()},
+        })
+        return cache
+
 
-def _upload_to_drive(file_path, filename, mime_type="video/mp4"):
+def encode_cursor(entry):
+    return "|".join(_entry_key(entry))
+
+
+def query_archive(cursor=None, limit=30, topic=None, date_from=None, date_to=None, archive_dir=None):
+    """
+    Eine Seite des Archivs, neueste zuerst.
+    cursor    : Wert von 'next_cursor' der vorherigen Seite
+    topic     : exaktes Thema (optional)
+    date_from : 'YYYY-MM-DD' inklusive (optional)
+    date_to   : 'YYYY-MM-DD' inklusive (optional)
+    Kosten: O(log n + limit) - unabhängig von der Archivgröße.
+    """
+    index = _build_index(archive_dir)
+    bucket = index["by_topic"].get(topic) if topic else index["all"]
+    if bucket is None:
+        return {"items": [], "next_cursor": None, "version": index["version"]}
+    keys, items = bucket["keys"], bucket["items"]
+
+    # Obere Grenze (exklusiv): Cursor bzw. Ende des date_to-Tages
+    hi = len(keys)
+    if date_to:
+        hi = bisect.bisect_right(keys, (date_to + "\uffff",))
+    if cursor:
+        ts, _, video_file = cursor.partition("|")
+        hi = min(hi, bisect.bisect_left(keys, (ts, video_file)))
+    lo = bisect.bisect_left(keys, (date_from,)) if date_from else 0
+
+    start = max(lo, hi - limit)
+    page = items[start:hi][::-1]
+    next_cursor = encode_cursor(page[-1]) if page and start > lo else None
+    return {"items": page, "next_cursor": next_cursor, "version": index["version"]}
+
+
+def archive_topics(archive_dir=None):
+    """Alle Themen, die im Archiv vorkommen (für Filter-Dropdowns)."""
+    return sorted(_build_index(archive_dir)["by_topic"].keys())
+
+
+def _upload_to_drive(file_path, filename, mime_type="video/mp4", state_file=None, env_prefix=""):
     """Lädt eine Datei per REST API in Google Drive hoch mit Toggle-Check und dedizierten Credentials."""
+    state_file = state_file or STATE_FILE
+    # Kanal-Variablen (PRÄFIX_DRIVE_...) zuerst, dann die globalen
+    env = lambda key: os.getenv(env_prefix + key) or os.getenv(key)
     
     # 0. Check Drive Toggle aus dem Web-Interface (Pro-Feature)
-    try:
-        if os.path.exists(STATE_FILE):
-            with open(STATE_FILE, "r") as f:
-                state = json.load(f)
-                if not state.get("drive_enabled", True):
-                    _log_msg(f"ℹ️ Google Drive Upload ist deaktiviert.")
-                    return
-    except:
-        pass
-
-    folder_id = os.getenv('DRIVE_FOLDER_ID')
+    if not state_store.load(state_file)["drive_enabled"]:
+        _log_msg(f"ℹ️ Google Drive Upload ist deaktiviert.")
+        return
+
+    folder_id = env('DRIVE_FOLDER_ID')
+    # Erst hier laden - nur der Drive-Upload braucht requests und urllib
+    import requests
+    # Wir leihen uns die fertige Token-Funktion aus deinem YouTube-Skript!
+    from youtube_upload import refresh_access_token
     
     # LOGIK: Nutze DRIVE-spezifische Keys (vom Hauptkonto), 
     # falls nicht vorhanden, Fallback auf YouTube-Keys (vom Brand-Kanal)
-    client_id = os.getenv('DRIVE_CLIENT_ID') or os.getenv('YOUTUBE_CLIENT_ID')
-    client_secret = os.getenv('DRIVE_CLIENT_SECRET') or os.getenv('YOUTUBE_CLIENT_SECRET')
-    refresh_token = os.getenv('DRIVE_REFRESH_TOKEN') or os.getenv('YOUTUBE_REFRESH_TOKEN')
+    client_id = env('DRIVE_CLIENT_ID') or env('YOUTUBE_CLIENT_ID')
+    client_secret = env('DRIVE_CLIENT_SECRET') or env('YOUTUBE_CLIENT_SECRET')
+    refresh_token = env('DRIVE_REFRESH_TOKEN') or env('YOUTUBE_REFRESH_TOKEN')
 
     if not all([folder_id, client_id, client_secret, refresh_token]):
         _log_msg(f"⚠️ Drive Upload übersprungen für {filename}: Fehlende Credentials.")
@@ -104,19 +193,33 @@ def _upload_to_drive(file_path, filename, mime_type="video/mp4"):
     except Exception as e:
         _log_msg(f"⚠️ Drive Upload fehlgeschlagen für {filename}: {e}")
 
-def move_to_archive(video_path, fact_data, image_path=None):
-    """Speichert Video, Bild und Metadaten im Archiv."""
+def move_to_archive(video_path, fact_data, image_path=None, archive_dir=None, state_file=None, env_prefix=""):
+    """Speichert Video, Bild und Metadaten im Archiv (optional im Archiv eines anderen Kanals)."""
+    drive = lambda path, name, mime: _upload_to_drive(path, name, mime, state_file=state_file, env_prefix=env_prefix)
     try:
-        real_archive_dir = os.path.realpath(ARCHIVE_DIR)
+        real_archive_dir = os.path.realpath(archive_dir or ARCHIVE_DIR)
         os.makedirs(real_archive_dir, exist_ok=True)
         
         # 1. Video kopieren
         video_filename = os.path.basename(video_path)
         dest_video_path = os.path.join(real_archive_dir, video_filename)
         shutil.copy2(video_path, dest_video_path)
+
+        # Preview/Variante aus dem Render mitnehmen (fehlt der Preview, wird er beim ersten Abruf erzeugt)
+        for suffix in (thumbnails.PREVIEW_SUFFIX, thumbnails.ALT_SUFFIX):
+            rendered = os.path.splitext(video_path)[0] + suffix
+            if os.path.exists(rendered):
+                dest = os.path.splitext(dest_video_path)[0] + suffix
+                shutil.copy(rendered, dest)  # neue mtime: gilt gegenüber dem Video als aktuell
+
+        # Poster fürs Archiv direkt erzeugen
+        try:
+            thumbnails.ensure_poster(dest_video_path)
+        except Exception as thumb_err:
+            _log_msg(f"⚠️ Poster konnte nicht erstellt werden: {thumb_err}")
         
         # --- GOOGLE DRIVE UPLOAD: VIDEO ---
-        _upload_to_drive(dest_video_path, video_filename, "video/mp4")
+        drive(dest_video_path, video_filename, "video/mp4")
         
         # 2. Bild kopieren (falls vorhanden) & Hochladen
         new_image_name = None
@@ -127,7 +230,7 @@ def move_to_archive(video_path, fact_data, image_path=None):
             shutil.copy2(image_path, dest_image_path)
             
             # --- GOOGLE DRIVE UPLOAD: BILD ---
-            _upload_to_drive(dest_image_path, new_image_name, "image/png")
+            drive(dest_image_path, new_image_name, "image/png")
             
         # 3. Temporäre Textdatei für Google Drive erstellen & Hochladen
         try:
@@ -144,7 +247,7 @@ def move_to_archive(video_path, fact_data, image_path=None):
                     f.write(f"Tags: {', '.join(tags)}\n")
             
             # --- GOOGLE DRIVE UPLOAD: TEXTDATEI ---
-            _upload_to_drive(temp_txt_path, txt_filename, "text/plain")
+            drive(temp_txt_path, txt_filename, "text/plain")
             
             if os.path.exists(temp_txt_path):
                 os.remove(temp_txt_path)
@@ -152,46 +255,53 @@ def move_to_archive(video_path, fact_data, image_path=None):
             _log_msg(f"⚠️ Fehler beim Erstellen der Drive-Textdatei: {txt_err}")
         
         # 4. Metadaten lokal in JSON speichern (Dynamisches Thema!)
-        db = _load_db()
+        db = _load_db(archive_dir)
         db.append({
             "timestamp": datetime.now().isoformat(),
             "video_file": video_filename,
             "image_file": new_image_name,
             "title": fact_data.get("title", ""),
             "description": fact_data.get("description", ""),
-            "topic": fact_data.get("topic", "AI Fails")
+            "topic": fact_data.get("topic", "AI Fails"),
+            "fact": fact_data.get("fact", "")
         })
-        _save_db(db)
+        _save_db(db, archive_dir)
         
         return dest_video_path
     except Exception as e:
         _log_msg(f"Fehler beim Archivieren: {e}")
         return None
 
-def cleanup_old_videos(days=30):
+def cleanup_old_videos(days=30, archive_dir=None):
     """Löscht Dateien UND Datenbank-Einträge älter als X Tage."""
     try:
-        real_archive_dir = os.path.realpath(ARCHIVE_DIR)
+        real_archive_dir = os.path.realpath(archive_dir or ARCHIVE_DIR)
         if not os.path.exists(real_archive_dir): return
 
         now = time.time()
         cutoff = now - (days * 86400)
         
-        db = _load_db()
+        db = _load_db(archive_dir)
         new_db = []
         
         for f in os.listdir(real_archive_dir):
-            if f == "archive.json": continue
+            if not is_media_file(f): continue
             path = os.path.join(real_archive_dir, f)
             if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
                 os.remove(path)
                 _log_msg(f"🧹 Datei gelöscht: {f}")
 
+        # Poster/Previews ohne Original-Video mit aufräumen (werden lazy erzeugt und sind daher jünger)
+        for f in os.listdir(real_archive_dir):
+            path = os.path.join(real_archive_dir, f)
+            if thumbnails.is_derived(f) and not os.path.exists(thumbnails.source_for_derived(path)):
+                os.remove(path)
+
         for entry in db:
             file_path = os.path.join(real_archive_dir, entry["video_file"])
             if os.path.exists(file_path):
                 new_db.append(entry)
         
-        _save_db(new_db)
+        _save_db(new_db, archive_dir)
     except Exception as e:
         _log_msg(f"Fehler beim Cleanup: {e}")
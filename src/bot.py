@@ -17,9 +17,6 @@ import os
 import sys
 
 
-import json
-
-
 import time
 
 
@@ -32,6 +29,15 @@ import traceback
 import subprocess
 
 
+import tempfile
+
+
+import threading
+
+
+from contextlib import nullcontext
+
+
 from datetime import datetime
 
 
@@ -42,39 +48,56 @@ from pathlib import Path
 sys.path.insert(0, os.path.dirname(__file__))
 
 
-# Import specialized modules for text and image
-from generate_fact import generate_fact
+# Die Stufen-Module (Pillow, requests, urllib ...) werden erst in der Stufe importiert,
+# die sie braucht - so bleiben --skip-youtube Läufe, Health-Checks und Imports billig.
+import live_events  # Live-Status fürs Dashboard (SSE)
 
 
-from generate_image import create_fact_image, create_base_background, create_text_layer, PALETTES
+import structured_log  # bot.log als JSON-Lines (run_id, stage, channel pro Zeile)
 
 
-from youtube_upload import refresh_access_token, upload_short
+import state_store  # state.json: Defaults, atomare Transaktionen, gecachtes Lesen
 
 
-import archive_manager  # Archiv-Manager für Backup und Drive-Upload
+import channels  # Kanal-Profile (Credentials, Themen, State, Archiv)
 
 
 # ── Configuration & Constants ─────────────────────────────────
-LOG_FILE = Path("/app/logs/bot.log")
+ASSETS_DIR = Path("/app/assets")  # Directory for background music
 
 
-STATE_FILE = Path("/app/logs/state.json")
+# Zusätzliche Ausgaben desselben Renders: Dashboard-Preview immer, Variante mit fester
+# Bitrate für andere Plattformen nur mit RENDER_ALT_BITRATE (z.B. "6M")
+RENDER_ALT_BITRATE = os.environ.get("RENDER_ALT_BITRATE", "")
 
 
-ASSETS_DIR = Path("/app/assets")  # Directory for background music
+# Render-Backend: "ffmpeg" (zoompan-Filter) oder "compositor" (frame_compositor.py), pro Lauf überschreibbar
+RENDER_BACKEND = os.environ.get("RENDER_BACKEND", "ffmpeg")
 
 
-def get_config() -> dict:
+# Segment-paralleles Rendern (render_advanced_video): so viele ffmpeg-Prozesse pro Video,
+# jedes Segment mindestens SEGMENT_MIN_SECONDS lang - lohnt erst bei mehreren Kernen und langen Videos
+RENDER_SEGMENTS = int(os.environ.get("RENDER_SEGMENTS", "1"))
 
 
-    """Validates and returns environment variables."""
-    required = [
-        "OPENAI_API_KEY",
-        "YOUTUBE_CLIENT_ID",
-        "YOUTUBE_CLIENT_SECRET",
-        "YOUTUBE_REFRESH_TOKEN"
-    ]
+SEGMENT_MIN_SECONDS = 5
+
+
+# Profiling pro Stufe (cProfile + tracemalloc) - alternativ per Dashboard-Schalter (state["profiling"])
+PROFILE_RUNS = os.environ.get("PROFILE_RUNS", "0") == "1"
+
+
+class ConfigError(RuntimeError):
+
+
+    """Raised when required environment variables are missing."""
+
+
+def get_config(profile: dict = None) -> dict:
+
+
+    """Validates and returns environment variables (for the given channel profile)."""
+    profile = profile or channels.get_channel()
 
 
     config = {}
@@ -83,16 +106,16 @@ def get_config() -> dict:
     missing = []
 
 
-    for key in required:
+    for key in channels.CREDENTIAL_KEYS:
 
 
-        val = os.environ.get(key)
+        val = channels.credential(profile, key)
 
 
         if not val:
 
 
-            missing.append(key)
+            missing.append(profile["env_prefix"] + key)
 
 
         config[key] = val
@@ -107,7 +130,7 @@ def get_config() -> dict:
         print("   Add them in Railway → Your Project → Variables")
 
 
-        sys.exit(1)
+        raise ConfigError(f"Missing environment variables: {', '.join(missing)}")
 
 
     return config
@@ -117,129 +140,334 @@ def get_config() -> dict:
 def log(message: str, level: str = "INFO"):
 
 
-    """Writes logs to console and file with timestamps."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    """Writes logs to console (lesbar) and bot.log (JSON-Lines, gepuffert - siehe structured_log.py)."""
+    structured_log.log(message, level)
+
+
+def publish_status(stage: str, **fields):
+
 
+    """Stufenwechsel: Log-Puffer der alten Stufe schreiben, Stufe binden, Live-Status melden (Kanal des Laufs)."""
+    structured_log.set_stage(stage)
 
-    line = f"[{timestamp}] [{level}] {message}"
 
+    fields.setdefault("channel", structured_log.context().get("channel"))
 
-    print(line)
 
+    live_events.publish_status(stage, **fields)
 
+
+# ── State Management (Persistence) ─────────────────────────────
+def record_video(state_file, **fields):
+
+
+    """Fertiges Video im State zählen. Ein Schreibfehler darf einen erfolgreichen Upload nicht zum Fehlschlag machen."""
     try:
 
 
-        # FIX: Symlink auflösen, um 'File exists' Fehler zu vermeiden
-        real_log_dir = os.path.realpath(LOG_FILE.parent)
+        state_store.record_video(state_file, **fields)
 
 
-        os.makedirs(real_log_dir, exist_ok=True)
+    except OSError as e:
 
 
-        real_log_file = os.path.join(real_log_dir, LOG_FILE.name)
+        log(f"Could not save state: {e}", "WARN")
 
 
-        with open(real_log_file, "a") as f:
+# ── The Upgraded Rendering Engine (Super-Sampling & Progress Bar) ──
+def music_files() -> list:
 
 
-            f.write(line + "\n")
+    """Verfügbare Hintergrundmusik, sortiert (die Auswahl per Seed hängt von der Reihenfolge ab)."""
+    if not ASSETS_DIR.exists():
 
 
-    except Exception:
+        return []
 
 
-        pass  # Fail silently on log write to avoid crashing the bot
+    return sorted(str(path) for path in ASSETS_DIR.glob("*.mp3"))
 
 
-# ── State Management (Persistence) ─────────────────────────────
-def load_state() -> dict:
+def _video_graph(background_path: str, layer_paths: list, anim_type: str, duration: float, fps: int, accent_hex: str,
+                 use_compositor: bool, first_frame: int, frame_count: int) -> tuple:
 
 
-    """Loads the last known state including new video settings."""
-    try:
+    """
+    Video-Eingaben + Filtergraph für die Frames [first_frame, first_frame + frame_count).
+    Zoom/Pan/Vignette/Balken und die Layer-Fenster rechnen mit der absoluten Zeit, damit
+    Segmente (render_advanced_video mit segments > 1) nahtlos aneinanderpassen.
+    Gibt (inputs, filter_chains, letztes Label, Zahl der Video-Eingaben) zurück.
+    """
+    import frame_compositor
 
 
-        # FIX: Symlink sicherheitshalber auflösen
-        real_state_file = os.path.realpath(STATE_FILE)
+    total_frames = int(duration * fps)
 
 
-        if os.path.exists(real_state_file):
+    offset = first_frame / fps
 
 
-            with open(real_state_file, 'r') as f:
+    # 2. Prepare FFmpeg Inputs
+    if use_compositor:
 
 
-                state = json.load(f)
+        # Text-Layer sind schon in den Frames
+        return list(frame_compositor.input_args(fps)), [], "0:v", 1
 
 
-                # Sicherstellen, dass neue Felder existieren (Additions)
-                if "video_mode" not in state: state["video_mode"] = "classic"
+    inputs = ["-loop", "1", "-i", background_path]
 
 
-                if "anim_type" not in state: state["anim_type"] = "zoom"
+    for l_path, _, _ in layer_paths:
 
 
-                if "duration" not in state: state["duration"] = 13.0
+        inputs.extend(["-i", l_path])
 
 
-                if "drive_enabled" not in state: state["drive_enabled"] = True
+    # 3. Build Filter Complex for Background Animation
+    # Bewegung als Funktion der absoluten Zeit (statt zoom+0.001 pro Frame): jedes Segment kennt
+    # seinen Startwert. zoompan gibt direkt mit fps aus (keine doppelten Frames durch 25->30 fps),
+    # das Tempo bleibt über MOTION_RATE das alte.
+    step = f"((on+{first_frame})*{frame_compositor.MOTION_RATE}/{fps})"
 
 
-                if "video_topic" not in state: state["video_topic"] = "random"
+    if anim_type == "zoom":
 
 
-                return state
+        bg_filter = (f"scale=2160:3840,zoompan=z='min(1+0.0010*({step}+1),1.15)':"
+                     f"x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':"
+                     f"d={frame_count}:s=2160x3840:fps={fps},scale=1080:1920")
 
 
-        return {"last_palette": 0, "total_videos": 0, "video_mode": "classic", "anim_type": "zoom", "duration": 13.0, "drive_enabled": True, "video_topic": "random"}
+    elif anim_type == "pan":
 
 
-    except Exception as e:
+        # FIX: Numerical pi and fixed syntax
+        bg_filter = (f"scale=2160:3840,zoompan=z=1.15:"
+                     f"x='(iw-iw/zoom)/2*(1+sin(2*3.141592*{step}/({total_frames*2})))':"
+                     f"y='(ih-ih/zoom)/2':"
+                     f"d={frame_count}:s=2160x3840:fps={fps},scale=1080:1920")
 
 
-        log(f"Could not load state: {e}", "WARN")
+    else:
 
 
-        return {"last_palette": 0, "total_videos": 0, "video_mode": "classic", "anim_type": "zoom", "duration": 13.0, "drive_enabled": True, "video_topic": "random"}
+        # Static + Breathing Vignette for AI Fail Look
+        bg_filter = f"scale=1080:1920,fps={fps},vignette='angle=3.141592/4+0.05*sin(2*3.141592*(t+{offset})/4)'"
 
 
-def save_state(state: dict):
+    # PROGRESS BAR LOGIK: NUR bei statisch! 10px hoch, y=H-330 für Sichtbarkeit über YouTube UI
+    if anim_type == "static":
+        filter_chains = [
+            f"[0:v]{bg_filter}[bg_base]",
+            f"color=c={accent_hex}@0.9:s=1080x10[bar_src]",
+            f"[bg_base][bar_src]overlay=x='-1080+(1080*(t+{offset})/{duration})':y=H-330:shortest=1[bg_final]"
+        ]
+        last_v_label = "bg_final"
+    else:
+        # Kein Balken bei Cinematic Zoom oder Slow Pan
+        filter_chains = [
+            f"[0:v]{bg_filter}[bg_base]"
+        ]
+        last_v_label = "bg_base"
 
 
-    """Saves the current state to the persistent volume."""
-    try:
+    # Overlays (Text-Layer)
+    for i, (_, start, end) in enumerate(layer_paths):
 
 
-        # FIX: Echten Pfad nutzen, um Ordner zu erstellen
-        real_state_dir = os.path.realpath(STATE_FILE.parent)
+        next_label = f"ovl{i}"
 
 
-        os.makedirs(real_state_dir, exist_ok=True)
+        filter_chains.append(
+            f"[{last_v_label}][{i+1}:v]overlay=enable='between(t,{start - offset},{end - offset})'[ {next_label}]"
+        )
 
 
-        real_state_file = os.path.join(real_state_dir, STATE_FILE.name)
+        last_v_label = next_label
 
 
-        with open(real_state_file, "w") as f:
+    return inputs, filter_chains, last_v_label, len(layer_paths) + 1
 
 
-            f.write(json.dumps(state, indent=2))
+def _split_outputs(filter_chains: list, last_v_label: str, extra_outputs: dict) -> dict:
 
 
-    except Exception as e:
+    """
+    Ein Composite, mehrere Encoder: nach dem letzten Overlay aufteilen.
+    Hängt die Ketten an filter_chains an und gibt {Ausgabe: Label} zurück ("master" = Hauptvideo).
+    """
+    import thumbnails
 
 
-        log(f"Could not save state: {e}", "WARN")
+    if not extra_outputs:
 
 
-# ── The Upgraded Rendering Engine (Super-Sampling & Progress Bar) ──
-def render_advanced_video(background_path: str, layer_paths: list, output_path: str, mode: str, anim_type: str, duration: float, palette_index: int):
+        filter_chains.append(f"[{last_v_label}]format=yuv420p[outv]")
+
+
+        return {"master": "[outv]"}
+
+
+    filter_chains.append(f"[{last_v_label}]format=yuv420p,split={len(extra_outputs) + 1}[outv]"
+                         + "".join(f"[split_{name}]" for name in extra_outputs))
+
+
+    labels = {"master": "[outv]"}
+
+
+    for name in extra_outputs:
+
+
+        if name == "preview":
+
+
+            filter_chains.append(f"[split_{name}]{thumbnails.PREVIEW_FILTER}[out_{name}]")
+
+
+            labels[name] = f"[out_{name}]"
+
+
+        elif name == "alt":
+
+
+            labels[name] = f"[split_{name}]"
+
+
+        else:
+
+
+            raise ValueError(f"Unknown render output: {name}")
+
+
+    return labels
+
+
+def _video_encode_args(name: str, thread_args: list) -> list:
+
+
+    """Encoder-Einstellungen pro Ausgabe (nur Video)."""
+    import thumbnails
+
+
+    if name == "preview":
+
+
+        return [*thumbnails.PREVIEW_ENCODE, *thread_args]
+
+
+    if name == "alt":
+
+
+        return ["-c:v", "libx264", "-preset", "medium", "-b:v", RENDER_ALT_BITRATE,
+                "-maxrate", RENDER_ALT_BITRATE, "-bufsize", RENDER_ALT_BITRATE, "-movflags", "+faststart", *thread_args]
+
+
+    # threads: Obergrenze pro Job, wenn mehrere Renders parallel laufen (bulk.py)
+    return ["-c:v", "libx264", "-preset", "medium", "-tune", "stillimage", *thread_args]
+
+
+def _run_ffmpeg_job(cmd: list, on_progress, frame_source=None):
+
+
+    """
+    Startet ffmpeg, meldet die kodierte Zeit (Sekunden) an on_progress und wirft bei Fehlern.
+    frame_source: (Funktion, Argumente) für frame_compositor.write_frames - die Frames gehen über stdin.
+    """
+    with tempfile.TemporaryFile(mode="w+") as err_file:
+
+
+        proc = subprocess.Popen(["ffmpeg", "-y", "-progress", "pipe:1", "-nostats", *cmd],
+                                stdin=subprocess.PIPE if frame_source else None,
+                                stdout=subprocess.PIPE, stderr=err_file, text=True)
+
+
+        writer_errors = []
+
+
+        if frame_source:
+
+
+            # Frames in einem eigenen Thread schreiben, hier wird weiter der Fortschritt gelesen
+            def feed_frames():
+                write_frames, args = frame_source
+                try:
+                    write_frames(proc.stdin.buffer, *args)
+                except Exception as e:
+                    writer_errors.append(e)
+                    proc.kill()
+
+
+            writer = threading.Thread(target=feed_frames, daemon=True)
+
+
+            writer.start()
+
+
+        for line in proc.stdout:
+
+
+            key, _, value = line.strip().partition("=")
+
+
+            # out_time_us / out_time_ms sind beide in Mikrosekunden
+            if key in ("out_time_us", "out_time_ms") and value.isdigit():
+
+
+                on_progress(int(value) / 1_000_000)
+
+
+        proc.wait()
+
+
+        if frame_source:
+
+
+            writer.join()
+
+
+            if writer_errors:
+
+
+                raise RuntimeError(f"Frame compositor failed: {writer_errors[0]}")
+
+
+        if proc.returncode != 0:
+
+
+            err_file.seek(0)
+
+
+            log(f"❌ FFmpeg failed:\n{err_file.read()}", "ERROR")
+
+
+            raise RuntimeError("FFmpeg rendering failed")
+
+
+def render_advanced_video(background_path: str, layer_paths: list, output_path: str, mode: str, anim_type: str, duration: float, palette_index: int, threads: int = None, seed: int = None,
+                          extra_outputs: dict = None, backend: str = "ffmpeg", segments: int = 1):
 
 
     """
     Renders the video with Super-Sampling Anti-Jitter, multiple animation types and a Visible Progress Bar.
+    seed: bestimmt die Musik-Auswahl (gleicher Seed + gleiche Eingaben -> identisches MP4).
+    extra_outputs: {"preview": Pfad, "alt": Pfad} - weitere Encoder am selben Filtergraph
+    (split nach dem Composite), kosten also nur Encode-Zeit, keinen zweiten Decode.
+    backend: "ffmpeg" (zoompan-Filter) oder "compositor" (Frames aus frame_compositor.py über stdin).
+    segments: Zeitachse in so viele Abschnitte teilen, die parallel rendern (siehe _render_segments).
     """
+    from generate_image import PALETTES
+
+
+    import frame_compositor
+
+
+    import music_library
+
+
+    extra_outputs = extra_outputs or {}
+
+
     fps = 30
 
 
@@ -256,413 +484,1211 @@ def render_advanced_video(background_path: str, layer_paths: list, output_path:
     music_file = None
 
 
-    if ASSETS_DIR.exists():
+    mp3s = music_files()
 
 
-        mp3s = list(ASSETS_DIR.glob("*.mp3"))
+    if mp3s:
 
 
-        if mp3s:
+        music_file = random.Random(seed).choice(mp3s)
 
 
-            music_file = str(random.choice(mp3s))
+        log(f"🎵 Selected background music: {Path(music_file).name}")
 
 
-            log(f"🎵 Selected background music: {Path(music_file).name}")
+    # Normalisiert und als AAC vorkodiert (einmal pro Track) - hier nur noch Stream-Copy
+    audio_path = music_library.audio_for(music_file)
 
 
-    # 2. Prepare FFmpeg Inputs
-    inputs = ["-y", "-loop", "1", "-i", background_path]
+    # Compositor-Backend: Zoom/Pan mit Subpixel-Resampling in Python, ffmpeg kodiert nur noch
+    use_compositor = backend == "compositor" and anim_type in frame_compositor.ANIMS
 
 
-    for l_path, _, _ in layer_paths:
+    if backend == "compositor" and not use_compositor:
 
 
-        inputs.extend(["-i", l_path])
+        log(f"ℹ️ Compositor backend has no '{anim_type}' animation - using ffmpeg filters")
 
 
-    if music_file:
+    # Segmente starten auf ganzen Sekunden und sind mindestens SEGMENT_MIN_SECONDS lang
+    segments = max(1, min(segments, int(duration // SEGMENT_MIN_SECONDS)))
 
 
-        inputs.extend(["-i", music_file])
+    log(f"🎬 Rendering {mode} with {anim_type} animation ({duration}s"
+        + (f", {segments} segments)..." if segments > 1 else ")..."))
 
 
-    else:
+    publish_status("render", progress=0.0, mode=mode, anim=anim_type)
 
 
-        inputs.extend(["-f", "lavfi", "-i", "anullsrc=channel_layout=stereo:sample_rate=44100"])
+    if segments > 1:
 
 
-    # 3. Build Filter Complex for Background Animation
-    if anim_type == "zoom":
+        _render_segments(background_path, layer_paths, output_path, audio_path, mode, anim_type, duration, fps,
+                         accent_hex, use_compositor, extra_outputs, threads, segments)
 
 
-        bg_filter = (f"scale=2160:3840,zoompan=z='min(zoom+0.0010,1.15)':"
-                     f"x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':"
-                     f"d={total_frames}:s=2160x3840,fps={fps},scale=1080:1920")
+        log(f"✅ Rendering complete.")
 
 
-    elif anim_type == "pan":
+        return
 
 
-        # FIX: Numerical pi and fixed syntax
-        bg_filter = (f"scale=2160:3840,zoompan=z=1.15:"
-                     f"x='(iw-iw/zoom)/2*(1+sin(2*3.141592*on/({total_frames*2})))':"
-                     f"y='(ih-ih/zoom)/2':"
-                     f"d={total_frames}:s=2160x3840,fps={fps},scale=1080:1920")
+    inputs, filter_chains, last_v_label, video_inputs = _video_graph(
+        background_path, layer_paths, anim_type, duration, fps, accent_hex, use_compositor, 0, total_frames)
 
 
-    else:
+    labels = _split_outputs(filter_chains, last_v_label, extra_outputs)
 
 
-        # Static + Breathing Vignette for AI Fail Look
-        bg_filter = f"scale=1080:1920,fps={fps},vignette='angle=3.141592/4+0.05*sin(2*3.141592*t/4)'"
+    audio_map = f"{video_inputs}:a"
 
 
-    # PROGRESS BAR LOGIK: NUR bei statisch! 10px hoch, y=H-330 für Sichtbarkeit über YouTube UI
-    if anim_type == "static":
-        filter_chains = [
-            f"[0:v]{bg_filter}[bg_base]",
-            f"color=c={accent_hex}@0.9:s=1080x10[bar_src]",
-            f"[bg_base][bar_src]overlay=x='-1080+(1080*t/{duration})':y=H-330:shortest=1[bg_final]"
-        ]
-        last_v_label = "bg_final"
-    else:
-        # Kein Balken bei Cinematic Zoom oder Slow Pan
-        filter_chains = [
-            f"[0:v]{bg_filter}[bg_base]"
-        ]
-        last_v_label = "bg_base"
+    thread_args = ["-threads", str(threads)] if threads else []
 
 
-    # Overlays (Text-Layer)
-    for i, (_, start, end) in enumerate(layer_paths):
+    extra_args = []
 
 
-        next_label = f"ovl{i}"
+    for name, path in extra_outputs.items():
 
 
-        filter_chains.append(
-            f"[{last_v_label}][{i+1}:v]overlay=enable='between(t,{start},{end})'[ {next_label}]"
-        )
+        extra_args += ["-map", labels[name], *_video_encode_args(name, thread_args)]
 
 
-        last_v_label = next_label
+        if name == "alt":
+
 
+            extra_args += ["-map", audio_map, "-c:a", "copy", "-shortest"]
 
-    filter_chains.append(f"[{last_v_label}]format=yuv420p[outv]")
 
+        extra_args += ["-t", str(duration), path]
 
-    # 4. Execute FFmpeg
+
+    # 4. Execute FFmpeg (Fortschritt über -progress auf stdout, Fehlertext in Tempfile)
     cmd = [
-        "ffmpeg", *inputs, "-filter_complex", ";".join(filter_chains),
-        "-map", "[outv]", "-map", f"{len(layer_paths)+1}:a",
-        "-c:v", "libx264", "-preset", "medium", "-tune", "stillimage",
-        "-t", str(duration), "-c:a", "aac", "-b:a", "192k", "-shortest",
-        output_path
+        *inputs, "-i", audio_path, "-filter_complex", ";".join(filter_chains),
+        "-map", labels["master"], "-map", audio_map, *_video_encode_args("master", thread_args),
+        "-t", str(duration), "-c:a", "copy", "-shortest",
+        output_path,
+        *extra_args,
     ]
 
 
-    log(f"🎬 Rendering {mode} with {anim_type} animation ({duration}s)...")
+    last_pct = [-1]
 
 
-    try:
+    def on_progress(seconds):
 
 
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        pct = min(100, seconds / duration * 100)
 
 
-        log(f"✅ Rendering complete.")
+        if pct - last_pct[0] >= 2:
 
 
-    except subprocess.CalledProcessError as e:
+            last_pct[0] = pct
 
 
-        log(f"❌ FFmpeg failed:\n{e.stderr}", "ERROR")
+            publish_status("render", progress=round(pct, 1), mode=mode, anim=anim_type)
 
 
-        raise RuntimeError("FFmpeg rendering failed")
+    frame_source = None
 
 
-# ── Main Pipeline ──────────────────────────────────────────────
-def run(skip_youtube=False, topic=None):
+    if use_compositor:
 
 
-    log("=" * 50)
+        frame_source = (frame_compositor.write_frames, (background_path, layer_paths, anim_type, duration, fps))
 
 
-    log("🚀 AI Fails Bot starting run")
+    _run_ffmpeg_job(cmd, on_progress, frame_source)
 
 
-    log("=" * 50)
+    log(f"✅ Rendering complete.")
+
 
+def _render_segments(background_path: str, layer_paths: list, output_path: str, audio_path: str, mode: str,
+                     anim_type: str, duration: float, fps: int, accent_hex: str, use_compositor: bool,
+                     extra_outputs: dict, threads: int, segments: int):
 
-    config = get_config()
 
+    """
+    Segment-paralleles Rendern: zoompan/overlay laufen in ffmpeg fast nur auf einem Kern,
+    also wird die Zeitachse in Abschnitte geteilt, die gleichzeitig in eigenen ffmpeg-Prozessen
+    rendern (nur Video, jedes Segment beginnt mit einem IDR-Frame, geschlossene GOPs).
+    Danach fügt der concat-Demuxer die Segmente per Stream-Copy zusammen und legt die
+    vorkodierte Tonspur dazu. Zoom/Pan/Layer rechnen mit absoluter Zeit (_video_graph) - an
+    den Nahtstellen springt nichts.
+    """
+    import shutil
 
-    state  = load_state()
 
+    import frame_compositor
 
-    # Falls kein manuelles Thema übergeben wurde, das gespeicherte Standard-Thema nutzen
-    if topic is None:
-        topic = state.get("video_topic", "random")
-        if topic == "random": topic = None
 
+    from concurrent.futures import ThreadPoolExecutor
 
-    mode = state.get("video_mode", "classic")
 
+    total_frames = int(duration * fps)
 
-    anim = state.get("anim_type", "zoom")
 
+    # Grenzen auf ganzen Sekunden: passt auch für den Preview mit halber Framerate
+    bounds = [round(duration * k / segments) * fps for k in range(segments)] + [total_frames]
 
-    duration = float(state.get("duration", 13.0))
 
+    # CPU-Budget (threads) auf die Segmente aufteilen
+    per_segment = max(1, (threads or os.cpu_count() or 1) // segments)
 
-    palette_index = (state.get("last_palette", 0) + 1) % 5
 
+    thread_args = ["-threads", str(per_segment)]
 
-    state["last_palette"] = palette_index
 
+    outputs = {"master": output_path, **extra_outputs}
 
-    run_date  = datetime.now().strftime("%Y-%m-%d")
 
+    work_dir = tempfile.mkdtemp(prefix=".segments_", dir=os.path.dirname(os.path.abspath(output_path)))
 
-    run_time  = datetime.now().strftime("%H%M%S")
 
+    done_seconds = [0.0] * segments
 
-    base_name = f"{run_date}_AIFail_{run_time}"
 
+    last_pct = [-1]
 
-    temp_assets = []
 
+    progress_lock = threading.Lock()
 
-    video_path  = f"/tmp/{base_name}.mp4"
 
+    def render_segment(k):
 
-    try:
 
+        first, count = bounds[k], bounds[k + 1] - bounds[k]
 
-        log(f"📝 Step 1/4: Generating content (Mode: {mode}, Anim: {anim}, Topic: {topic or 'Rotation'})...")
 
+        inputs, filter_chains, last_v_label, _ = _video_graph(
+            background_path, layer_paths, anim_type, duration, fps, accent_hex, use_compositor, first, count)
 
-        fact_data = generate_fact(config["OPENAI_API_KEY"], topic=topic)
 
+        labels = _split_outputs(filter_chains, last_v_label, extra_outputs)
 
-        log(f"   Topic: {fact_data.get('topic', 'General')}")
 
+        cmd = [*inputs, "-filter_complex", ";".join(filter_chains)]
 
-        layers = []
 
+        for name in outputs:
 
-        # FIX: Wenn Pan gewählt ist, behandeln wir auch "Classic" als Layer-System, 
-        # damit der Text nicht mitschwenkt und zentriert bleibt!
-        if mode == "classic" and anim != "pan":
 
+            cmd += ["-map", labels[name], *_video_encode_args(name, thread_args), "-flags", "+cgop", "-an",
+                    "-t", str(count / fps), os.path.join(work_dir, f"{name}_{k:03d}.mp4")]
 
-            img_path = f"/tmp/{base_name}_full.png"
 
+        def on_progress(seconds):
 
-            create_fact_image(fact_data["fact"], fact_data.get("source", ""), img_path, palette_index)
 
+            with progress_lock:
 
-            temp_assets.append(img_path)
 
+                done_seconds[k] = min(seconds, count / fps)
 
-            render_advanced_video(img_path, [], video_path, "classic", anim, duration, palette_index)
 
+                pct = min(100, sum(done_seconds) / duration * 100)
 
-        elif mode == "three_parts" or (mode == "classic" and anim == "pan"):
 
+                if pct - last_pct[0] >= 2:
 
-            bg_path = f"/tmp/{base_name}_bg.png"
 
+                    last_pct[0] = pct
 
-            create_base_background(palette_index, fact_data.get("source", ""), bg_path)
 
+                    publish_status("render", progress=round(pct, 1), mode=mode, anim=anim_type)
 
-            temp_assets.append(bg_path)
 
+        frame_source = None
 
-            if mode == "classic":
 
+        if use_compositor:
 
-                parts = [fact_data["fact"]]
 
+            frame_source = (frame_compositor.write_frames,
+                            (background_path, layer_paths, anim_type, duration, fps, first, count))
 
-                timings = [(0, duration)]
 
+        _run_ffmpeg_job(cmd, on_progress, frame_source)
 
-            else:
 
+    try:
 
-                parts = fact_data.get("parts", ["Hook", fact_data["fact"], "Trigger"])
 
+        with ThreadPoolExecutor(max_workers=segments) as pool:
 
-                timings = [(0, 1.5), (1.5, duration - 2.0), (duration - 2.0, duration)]
 
+            list(pool.map(render_segment, range(segments)))
 
-            for i, text in enumerate(parts):
 
+        # Zusammenfügen per Stream-Copy, Ton (Master/Alt) aus der vorkodierten Spur
+        for name, path in outputs.items():
 
-                l_path = f"/tmp/{base_name}_p{i}.png"
 
+            list_path = os.path.join(work_dir, f"{name}.txt")
 
-                create_text_layer(text, palette_index, l_path)
 
+            with open(list_path, "w") as f:
 
-                temp_assets.append(l_path)
 
+                f.writelines(f"file '{name}_{k:03d}.mp4'\n" for k in range(segments))
 
-                layers.append((l_path, timings[i][0], timings[i][1]))
 
+            cmd = ["-f", "concat", "-safe", "0", "-i", list_path]
 
-            render_advanced_video(bg_path, layers, video_path, mode, anim, duration, palette_index)
 
+            if name == "preview":
 
-        elif mode == "word_by_word":
 
+                cmd += ["-map", "0:v", "-c", "copy", "-movflags", "+faststart", path]
 
-            bg_path = f"/tmp/{base_name}_bg.png"
 
+            else:
 
-            create_base_background(palette_index, fact_data.get("source", ""), bg_path)
 
+                cmd += ["-i", audio_path, "-map", "0:v", "-map", "1:a", "-c", "copy",
+                        *(["-movflags", "+faststart"] if name == "alt" else []),
+                        "-t", str(duration), "-shortest", path]
 
-            temp_assets.append(bg_path)
 
+            _run_ffmpeg_job(cmd, lambda seconds: None)
 
-            words = fact_data.get("words", fact_data["fact"].split())
 
+    finally:
 
-            chunks = [" ".join(words[i:i+3]) for i in range(0, len(words), 3)]
 
+        shutil.rmtree(work_dir, ignore_errors=True)
 
-            chunk_dur = duration / len(chunks)
 
+def _no_stage(name):
 
-            for i, chunk in enumerate(chunks):
 
+    """Profiling aus: jede Stufe läuft in einem leeren Context-Manager."""
+    return nullcontext()
 
-                l_path = f"/tmp/{base_name}_w{i}.png"
 
+def prepare_fact_images(fact_data: dict, base_path: str, mode: str, anim: str, duration: float,
+                        palette_index: int, temp_assets: list, seed: int = None) -> tuple:
 
-                create_text_layer(chunk, palette_index, l_path)
 
+    """
+    Bild-Stufe: Hintergrund + Text-Layer für den Modus erzeugen.
+    Gibt (Hintergrund, [(Layer, Start, Ende)], Render-Modus) zurück.
+    """
+    from generate_image import create_fact_image, create_base_background, create_text_layer
 
-                temp_assets.append(l_path)
 
+    layers = []
 
-                start = i * chunk_dur
-                # FIX: Der letzte Block bleibt bis zum Ende stehen
-                end = duration if i == len(chunks) - 1 else (i + 1) * chunk_dur
 
+    # FIX: Wenn Pan gewählt ist, behandeln wir auch "Classic" als Layer-System, 
+    # damit der Text nicht mitschwenkt und zentriert bleibt!
+    if mode == "classic" and anim != "pan":
 
-                layers.append((l_path, start, end))
 
+        img_path = f"{base_path}_full.png"
 
-            render_advanced_video(bg_path, layers, video_path, "word_by_word", anim, duration, palette_index)
 
+        create_fact_image(fact_data["fact"], fact_data.get("source", ""), img_path, palette_index, seed=seed)
 
-        if not skip_youtube:
 
+        temp_assets.append(img_path)
 
-            log("📤 Step 4/4: Uploading to YouTube API...")
 
+        background, render_mode = img_path, "classic"
 
-            access_token = refresh_access_token(config["YOUTUBE_CLIENT_ID"], config["YOUTUBE_CLIENT_SECRET"], config["YOUTUBE_REFRESH_TOKEN"])
 
+    elif mode == "three_parts" or (mode == "classic" and anim == "pan"):
 
-            topic_tag = fact_data.get('topic', 'AIFails').replace(" ", "")
 
+        bg_path = f"{base_path}_bg.png"
 
-            video_id = upload_short(video_path, fact_data["title"], fact_data["description"], fact_data.get("tags", []) + [topic_tag], access_token)
 
+        create_base_background(palette_index, fact_data.get("source", ""), bg_path, seed=seed)
 
-            state["total_videos"]  = state.get("total_videos", 0) + 1
 
+        temp_assets.append(bg_path)
 
-            state["last_run"], state["last_video_id"] = base_name, video_id
 
+        if mode == "classic":
 
-            save_state(state)
 
+            parts = [fact_data["fact"]]
 
-            log(f"✅ SUCCESS! Published: https://youtube.com/shorts/{video_id}")
+
+            timings = [(0, duration)]
 
 
         else:
 
 
-            state["total_videos"]  = state.get("total_videos", 0) + 1
+            parts = fact_data.get("parts", ["Hook", fact_data["fact"], "Trigger"])
 
 
-            save_state(state)
+            timings = [(0, 1.5), (1.5, duration - 2.0), (duration - 2.0, duration)]
 
 
-        try:
+        for i, text in enumerate(parts):
 
 
-            time.sleep(2) 
+            l_path = f"{base_path}_p{i}.png"
 
 
-            archive_manager.move_to_archive(video_path, fact_data, temp_assets[0])
+            create_text_layer(text, palette_index, l_path)
 
 
-            archive_manager.cleanup_old_videos(30)
+            temp_assets.append(l_path)
 
 
-            log("📦 Archiviert.")
+            layers.append((l_path, timings[i][0], timings[i][1]))
 
 
-        except Exception as e:
+        background, render_mode = bg_path, mode
 
 
-            log(f"⚠️ Archiv-Warnung: {e}", "WARN")
+    elif mode == "word_by_word":
 
 
-    except Exception as e:
+        bg_path = f"{base_path}_bg.png"
 
 
-        log(f"❌ Pipeline failed: {e}", "ERROR")
+        create_base_background(palette_index, fact_data.get("source", ""), bg_path, seed=seed)
 
 
-        log(traceback.format_exc(), "ERROR")
+        temp_assets.append(bg_path)
 
 
-        sys.exit(1)
+        words = fact_data.get("words", fact_data["fact"].split())
 
 
-    finally:
+        chunks = [" ".join(words[i:i+3]) for i in range(0, len(words), 3)]
 
 
-        for path in temp_assets + [video_path]:
+        chunk_dur = duration / len(chunks)
 
 
-            try:
+        for i, chunk in enumerate(chunks):
 
 
-                if os.path.exists(path):
+            l_path = f"{base_path}_w{i}.png"
 
 
-                    os.remove(path)
+            create_text_layer(chunk, palette_index, l_path)
 
 
-                    log(f"🧹 Cleaned up temp: {path}")
+            temp_assets.append(l_path)
 
 
-            except Exception: pass
+            start = i * chunk_dur
+            # FIX: Der letzte Block bleibt bis zum Ende stehen
+            end = duration if i == len(chunks) - 1 else (i + 1) * chunk_dur
 
 
-if __name__ == "__main__":
+            layers.append((l_path, start, end))
 
 
-    should_skip = "--skip-youtube" in sys.argv
-    
-    # NEU: Lese das Thema aus den Kommandozeilen-Argumenten
-    target_topic = None
-    for arg in sys.argv:
-        if arg.startswith("--topic="):
-            target_topic = arg.split("=")[1]
-            if target_topic == "random": target_topic = None
-            
-    run(skip_youtube=should_skip, topic=target_topic)
+        background, render_mode = bg_path, "word_by_word"
+
+
+    else:
+
+
+        raise ValueError(f"Unbekannter Video-Modus: {mode}")
+
+
+    return background, layers, render_mode
+
+
+def render_fact_video(fact_data: dict, video_path: str, mode: str, anim: str, duration: float,
+                      palette_index: int, temp_assets: list, threads: int = None, stage=_no_stage,
+                      seed: int = None, cache: bool = True, backend: str = None, segments: int = None) -> dict:
+
+
+    """
+    Bild- und Render-Stufe für einen fertigen Fakt (genutzt von run() und bulk.py).
+    Zwischendateien landen in temp_assets - aufräumen muss der Aufrufer.
+    seed: Quelle aller Zufallsentscheidungen (Standard: aus dem Fakt abgeleitet).
+    cache: identische Eingaben aus dem Render-Cache holen statt neu zu rendern (render_cache.py).
+    backend: Render-Backend (Standard: RENDER_BACKEND).
+    segments: parallele Render-Segmente (Standard: RENDER_SEGMENTS).
+    Gibt die Dauer der Stufen in Sekunden zurück: {"image": ..., "render": ..., "cached": ...}.
+    """
+    import render_cache
+
+
+    backend = backend or RENDER_BACKEND
+
+
+    segments = segments or RENDER_SEGMENTS
+
+
+    started = time.perf_counter()
+
+
+    base_path = os.path.splitext(video_path)[0]
+
+
+    if seed is None:
+
+
+        seed = render_cache.content_seed(fact_data)
+
+
+    key = render_cache.cache_key(fact_data, palette_index, mode, anim, duration, seed,
+                                 [os.path.basename(path) for path in music_files()], backend, segments,
+                                 threads)
+
+
+    # Preview (und ggf. Plattform-Variante) entstehen im selben ffmpeg-Lauf neben dem Video
+    import thumbnails
+
+
+    extra_outputs = {"preview": thumbnails.preview_path(video_path)}
+
+
+    if RENDER_ALT_BITRATE:
+
+
+        extra_outputs["alt"] = base_path + thumbnails.ALT_SUFFIX
+
+
+    # Im Cache liegen die Nebenausgaben mit eigenem Suffix (Variante inkl. Bitrate)
+    cached_extras = {thumbnails.PREVIEW_SUFFIX: extra_outputs["preview"]}
+
+
+    if RENDER_ALT_BITRATE:
+
+
+        cached_extras[f"_alt-{RENDER_ALT_BITRATE}.mp4"] = extra_outputs["alt"]
+
+
+    if cache:
+
+
+        image_path = render_cache.fetch(key, video_path, base_path, cached_extras)
+
+
+        if image_path is not None:
+
+
+            temp_assets.extend([image_path] if image_path else [])
+
+
+            temp_assets.extend(extra_outputs.values())
+
+
+            log(f"♻️ Render cache hit ({key[:12]}) - skipping image + render stages")
+
+
+            return {"image": 0.0, "render": time.perf_counter() - started, "cached": True}
+
+
+    with stage("images"):
+
+
+        background, layers, render_mode = prepare_fact_images(
+            fact_data, base_path, mode, anim, duration, palette_index, temp_assets, seed=seed)
+
+
+    render_started = time.perf_counter()
+
+
+    with stage("render_advanced_video"):
+
+
+        render_advanced_video(background, layers, video_path, render_mode, anim, duration, palette_index,
+                              threads=threads, seed=seed, extra_outputs=extra_outputs, backend=backend,
+                              segments=segments)
+
+
+    temp_assets.extend(extra_outputs.values())
+
+
+    timings = {"image": render_started - started, "render": time.perf_counter() - render_started, "cached": False}
+
+
+    if cache:
+
+
+        try:
+
+
+            render_cache.store(key, video_path, base_path, temp_assets[0] if temp_assets else None, cached_extras)
+
+
+        except OSError as e:
+
+
+            log(f"⚠️ Render cache not writable: {e}", "WARN")
+
+
+    return timings
+
+
+# ── Main Pipeline ──────────────────────────────────────────────
+def warm_up():
+
+
+    """Lädt alles vor, was jeder Lauf braucht (vom warmen Pipeline-Worker beim Start aufgerufen)."""
+    import generate_fact, youtube_upload, archive_manager  # noqa: F401
+
+
+    from generate_image import preload_fonts
+
+
+    preload_fonts()
+
+
+    # Fehlende Musik-Spuren jetzt kodieren statt im ersten Render
+    try:
+
+
+        import music_library
+
+
+        music_library.prepare_all(music_files())
+
+
+    except (OSError, RuntimeError) as e:
+
+
+        log(f"Could not prepare music library: {e}", "WARN")
+
+
+def _upload_queued(entry: dict, config: dict, profile: dict, youtube_account: str, result: dict) -> dict:
+
+
+    """Lädt ein vorproduziertes Video aus der Upload-Queue hoch und entfernt es danach aus der Queue."""
+    import quota
+    import upload_queue
+    from youtube_upload import refresh_access_token, upload_short
+
+
+    video_name = os.path.basename(entry["video_path"])
+
+
+    log(f"📤 Uploading queued video {video_name} (queued {entry['queued_at']})...")
+
+
+    publish_status("upload", video=video_name)
+
+
+    try:
+
+
+        access_token = refresh_access_token(config["YOUTUBE_CLIENT_ID"], config["YOUTUBE_CLIENT_SECRET"], config["YOUTUBE_REFRESH_TOKEN"])
+
+
+        topic_tag = (entry.get("topic") or "AIFails").replace(" ", "")
+
+
+        video_id = upload_short(entry["video_path"], entry["title"], entry["description"], entry.get("tags", []) + [topic_tag],
+                                access_token, account=youtube_account)
+
+
+    except Exception as e:
+
+
+        log(f"❌ Queue upload failed: {e}", "ERROR")
+
+
+        publish_status("failed", error=str(e))
+
+
+        result["error"] = str(e)
+
+
+        if isinstance(e, quota.QuotaExceeded):
+
+
+            result["deferred_until"] = e.reset_at.isoformat()
+
+
+        return result
+
+
+    upload_queue.remove(entry["id"], profile["archive_dir"])
+
+
+    record_video(profile["state_file"], last_run=os.path.splitext(video_name)[0], last_video_id=video_id)
+
+
+    log(f"✅ SUCCESS! Published: https://youtube.com/shorts/{video_id} ({upload_queue.pending(profile['archive_dir'])} left in queue)")
+
+
+    publish_status("done", video=video_name, channel=profile["name"])
+
+
+    result["success"], result["video"], result["video_id"] = True, video_name, video_id
+
+
+    return result
+
+
+def run(skip_youtube=False, topic=None, mode=None, anim=None, channel=None, from_queue=False, resume=None, backend=None) -> dict:
+
+
+    """
+    Ein kompletter Pipeline-Lauf. Wiederverwendbar (Worker, CLI):
+    gibt {"success", "video", "video_id", "error", "channel", "run_id"} zurück statt den Prozess zu beenden.
+    from_queue: erst die Upload-Queue des Kanals abarbeiten (Scheduler).
+    resume: "latest" setzt den jüngsten abgebrochenen Lauf des Kanals fort (falls es einen gibt),
+            eine Run-ID genau diesen Lauf (Dashboard). Jede Stufe wird unter /data/runs gecheckpointet.
+    backend: Render-Backend für diesen Lauf ("ffmpeg" / "compositor", Standard: RENDER_BACKEND).
+    """
+    import runs  # Checkpoints pro Lauf (Manifest + Artefakte)
+
+
+    result = {"success": False, "video": None, "video_id": None, "error": None, "channel": channel, "run_id": None}
+
+
+    manifest = None
+
+
+    if resume and resume != "latest":
+
+
+        # Prüfen + Übernehmen in einem Schritt: ein zweiter Aufrufer (Dashboard vs. Scheduler) wird abgewiesen
+        manifest = runs.claim(resume, automatic=False)
+
+
+        if not manifest:
+
+
+            result["error"] = f"Run {resume} cannot be resumed (not found, finished or already running)"
+
+
+            return result
+
+
+        channel, skip_youtube = manifest["channel"], manifest["params"]["skip_youtube"]
+
+
+    try:
+
+
+        profile = channels.get_channel(channel)
+
+
+    except (KeyError, ValueError) as e:
+
+
+        if manifest:
+
+
+            runs.release(manifest)
+
+
+        result["error"] = e.args[0]
+
+
+        return result
+
+
+    result["channel"] = profile["name"]
+
+
+    # Kanal steht in jedem Log-Record (und als Präfix in der lesbaren Zeile)
+    structured_log.bind(channel=profile["name"], run_id=None, stage=None)
+
+
+    state_file = profile["state_file"]
+
+
+    log("=" * 50)
+
+
+    log("🚀 AI Fails Bot starting run")
+
+
+    log("=" * 50)
+
+
+    publish_status("start", channel=profile["name"])
+
+
+    try:
+
+
+        config = get_config(profile)
+
+
+    except ConfigError as e:
+
+
+        if manifest:
+
+
+            runs.release(manifest)
+
+
+        result["error"] = str(e)
+
+
+        publish_status("failed", error=str(e))
+
+
+        return result
+
+
+    if resume == "latest":
+
+
+        manifest = runs.claim_latest(profile["name"], skip_youtube=skip_youtube)
+
+
+    # Quota vorab prüfen - ein "quota exceeded" erst beim Upload hätte die Render-CPU verschwendet
+    import quota
+
+
+    openai_account = channels.credential_owner(profile, "OPENAI_API_KEY")
+
+
+    youtube_account = channels.credential_owner(profile, "YOUTUBE_REFRESH_TOKEN")
+
+
+    queued = None
+
+
+    if from_queue and not skip_youtube and not manifest:
+
+
+        import upload_queue
+
+
+        queued = upload_queue.peek(profile["archive_dir"])
+
+
+    try:
+
+
+        if not queued and not (manifest and runs.is_done(manifest, "fact")):
+
+
+            quota.check("openai", quota.OPENAI_CALLS_PER_RUN, openai_account)
+
+
+        if not skip_youtube and not (manifest and runs.is_done(manifest, "upload")):
+
+
+            quota.check("youtube", quota.YOUTUBE_UPLOAD_COST, youtube_account)
+
+
+    except quota.QuotaExceeded as e:
+
+
+        if manifest:
+
+
+            runs.release(manifest)
+
+
+        log(f"⏸️ Lauf verschoben: {e}", "WARN")
+
+
+        result["error"], result["deferred_until"] = str(e), e.reset_at.isoformat()
+
+
+        publish_status("deferred", error=str(e), retry_at=result["deferred_until"])
+
+
+        return result
+
+
+    state  = state_store.load(state_file)
+
+
+    # Vorproduzierte Videos (bulk.py) zuerst hochladen, statt neu zu generieren
+    if queued:
+
+
+        return _upload_queued(queued, config, profile, youtube_account, result)
+
+
+    if manifest:
+
+
+        # Fortsetzen: Einstellungen aus dem Manifest, damit sie zu den Artefakten passen
+        params = manifest["params"]
+
+
+        topic, mode, anim = params["topic"], params["mode"], params["anim"]
+
+
+        duration, palette_index = params["duration"], params["palette_index"]
+
+
+        backend = params.get("backend", "ffmpeg")
+
+
+        base_name = manifest["run_id"]
+
+
+        runs.begin_attempt(manifest)
+
+
+        log(f"♻️ Resuming run {base_name} at stage '{runs.next_stage(manifest)}' (attempt {manifest['attempts']})")
+
+
+    else:
+
+
+        # Falls kein manuelles Thema übergeben wurde, das gespeicherte Standard-Thema nutzen
+        if topic is None:
+            topic = state["video_topic"]
+            if topic == "random": topic = None
+
+
+        # Overrides pro Slot (Scheduler) haben Vorrang vor den Dashboard-Einstellungen
+        mode = mode or state["video_mode"]
+
+
+        anim = anim or state["anim_type"]
+
+
+        duration = float(state["duration"])
+
+
+        backend = backend or RENDER_BACKEND
+
+
+        # Wird erst mit dem fertigen Video gespeichert - ein Fehlschlag verbraucht keine Palette
+        palette_index = (state["last_palette"] + 1) % 5
+
+
+        run_date  = datetime.now().strftime("%Y-%m-%d")
+
+
+        run_time  = datetime.now().strftime("%H%M%S")
+
+
+        channel_tag = "AIFail" if profile["name"] == channels.DEFAULT_CHANNEL else profile["name"]
+
+
+        base_name = f"{run_date}_{channel_tag}_{run_time}"
+
+
+        try:
+
+
+            runs.gc()
+
+
+            manifest = runs.create(base_name, profile["name"], {
+                "topic": topic, "mode": mode, "anim": anim, "duration": duration,
+                "palette_index": palette_index, "skip_youtube": skip_youtube, "backend": backend,
+            })
+
+
+        except OSError as e:
+
+
+            result["error"] = f"Run directory not writable: {e}"
+
+
+            publish_status("failed", error=result["error"])
+
+
+            return result
+
+
+    result["run_id"] = base_name
+
+
+    structured_log.bind(run_id=base_name)
+
+
+    temp_assets = []
+
+
+    video_path  = runs.artifact_path(manifest, f"{base_name}.mp4")
+
+
+    # Ohne Profiling kostet jede Stufe nur einen nullcontext()
+    profiler = None
+
+
+    if PROFILE_RUNS or state.get("profiling"):
+
+
+        from profiling import RunProfiler
+
+
+        profiler = RunProfiler(f"{base_name}_{manifest['attempts']}" if manifest["attempts"] > 1 else base_name)
+
+
+    stage = profiler.stage if profiler else _no_stage
+
+
+    try:
+
+
+        if runs.is_done(manifest, "fact"):
+
+
+            fact_data = runs.load_fact(manifest)
+
+
+            log("📝 Step 1/4: Content from checkpoint")
+
+
+        else:
+
+
+            log(f"📝 Step 1/4: Generating content (Mode: {mode}, Anim: {anim}, Topic: {topic or 'Rotation'})...")
+
+
+            publish_status("fact", topic=topic or "random")
+
+
+            from generate_fact import generate_fact
+
+
+            with stage("generate_fact"):
+
+
+                fact_data = generate_fact(config["OPENAI_API_KEY"], topic=topic, topics=profile["topics"],
+                                          archive_path=os.path.join(profile["archive_dir"], "archive.json"),
+                                          quota_account=openai_account)
+
+
+            runs.save_fact(manifest, fact_data)
+
+
+        log(f"   Topic: {fact_data.get('topic', 'General')}")
+
+
+        outputs = runs.render_outputs(manifest)
+
+
+        if outputs:
+
+
+            video_path, temp_assets = outputs
+
+
+            log("🎬 Video from checkpoint")
+
+
+        else:
+
+
+            publish_status("image", mode=mode)
+
+
+            render_fact_video(fact_data, video_path, mode, anim, duration, palette_index, temp_assets, stage=stage,
+                              backend=backend)
+
+
+            runs.complete(manifest, "render", video=os.path.basename(video_path),
+                          assets=[os.path.basename(path) for path in temp_assets])
+
+
+        if runs.is_done(manifest, "upload"):
+
+
+            result["video_id"] = manifest["stages"]["upload"].get("video_id")
+
+
+        elif not skip_youtube:
+
+
+            log("📤 Step 4/4: Uploading to YouTube API...")
+
+
+            publish_status("upload")
+
+
+            from youtube_upload import refresh_access_token, upload_short
+
+
+            access_token = refresh_access_token(config["YOUTUBE_CLIENT_ID"], config["YOUTUBE_CLIENT_SECRET"], config["YOUTUBE_REFRESH_TOKEN"])
+
+
+            topic_tag = fact_data.get('topic', 'AIFails').replace(" ", "")
+
+
+            with stage("upload_short"):
+
+
+                video_id = upload_short(video_path, fact_data["title"], fact_data["description"], fact_data.get("tags", []) + [topic_tag], access_token,
+                                        account=youtube_account)
+
+
+            # Sofort festhalten - ein späterer Fehler darf nicht zu einem zweiten Upload führen
+            runs.complete(manifest, "upload", video_id=video_id)
+
+
+            # Nur die eigenen Felder schreiben - Dashboard-Änderungen während des Laufs bleiben erhalten
+            record_video(state_file, last_palette=palette_index, last_run=base_name, last_video_id=video_id)
+
+
+            log(f"✅ SUCCESS! Published: https://youtube.com/shorts/{video_id}")
+
+
+            result["video_id"] = video_id
+
+
+        else:
+
+
+            record_video(state_file, last_palette=palette_index)
+
+
+            runs.complete(manifest, "upload", video_id=None, skipped=True)
+
+
+        try:
+
+
+            publish_status("archive")
+
+
+            import archive_manager  # Archiv-Manager für Backup und Drive-Upload
+
+
+            time.sleep(2) 
+
+
+            with stage("move_to_archive"):
+
+
+                archive_manager.move_to_archive(video_path, fact_data, temp_assets[0], archive_dir=profile["archive_dir"],
+                                                state_file=state_file, env_prefix=profile["env_prefix"])
+
+
+            archive_manager.cleanup_old_videos(30, archive_dir=profile["archive_dir"])
+
+
+            log("📦 Archiviert.")
+
+
+        except Exception as e:
+
+
+            log(f"⚠️ Archiv-Warnung: {e}", "WARN")
+
+
+        runs.complete(manifest, "archive")
+
+
+        publish_status("done", video=f"{base_name}.mp4", channel=profile["name"])
+
+
+        result["success"], result["video"] = True, f"{base_name}.mp4"
+
+
+        # Erfolgreich: Artefakte weg, das Manifest bleibt bis zum nächsten gc()
+        runs.finish(manifest)
+
+
+    except Exception as e:
+
+
+        log(f"❌ Pipeline failed: {e}", "ERROR")
+
+
+        log(traceback.format_exc(), "ERROR")
+
+
+        publish_status("failed", error=str(e))
+
+
+        result["error"] = str(e)
+
+
+        if isinstance(e, quota.QuotaExceeded):
+
+
+            result["deferred_until"] = e.reset_at.isoformat()
+
+
+        # Artefakte bleiben liegen - der nächste Versuch setzt bei der offenen Stufe an
+        try:
+
+
+            runs.fail(manifest, str(e))
+
+
+            result["resumable"] = runs.is_resumable(manifest)
+
+
+            log(f"💾 Checkpoint kept: {runs.run_dir(base_name)} (next stage: {manifest['failed_stage']})")
+
+
+        except OSError as save_err:
+
+
+            log(f"⚠️ Checkpoint konnte nicht gespeichert werden: {save_err}", "WARN")
+
+
+    finally:
+
+
+        if profiler:
+
+
+            try:
+
+
+                report_dir = profiler.finish()
+
+
+                result["profile"] = os.path.basename(report_dir)
+
+
+                log(f"🔬 Profil gespeichert: {report_dir}")
+
+
+            except Exception as e:
+
+
+                log(f"⚠️ Profil konnte nicht geschrieben werden: {e}", "WARN")
+
+
+        # Lauf-Ende ist eine Stufengrenze: Puffer schreiben, bevor der Worker auf den nächsten Auftrag wartet
+        structured_log.flush()
+
+
+        structured_log.bind(run_id=None, stage=None)
+
+
+    return result
+
+
+if __name__ == "__main__":
+
+
+    should_skip = "--skip-youtube" in sys.argv
+    
+    # NEU: Lese Thema und Slot-Overrides aus den Kommandozeilen-Argumenten
+    target_topic = None
+    target_mode = None
+    target_anim = None
+    target_channel = None
+    target_resume = None
+    target_backend = None
+    for arg in sys.argv:
+        if arg.startswith("--topic="):
+            target_topic = arg.split("=", 1)[1]
+            if target_topic == "random": target_topic = None
+        elif arg.startswith("--mode="):
+            target_mode = arg.split("=", 1)[1]
+        elif arg.startswith("--anim="):
+            target_anim = arg.split("=", 1)[1]
+        elif arg.startswith("--channel="):
+            target_channel = arg.split("=", 1)[1]
+        elif arg.startswith("--backend="):
+            target_backend = arg.split("=", 1)[1]
+        elif arg == "--resume" or arg.startswith("--resume="):
+            target_resume = arg.split("=", 1)[1] if "=" in arg else "latest"
+            
+    outcome = run(skip_youtube=should_skip, topic=target_topic, mode=target_mode, anim=target_anim, channel=target_channel,
+                  from_queue="--from-queue" in sys.argv, resume=target_resume, backend=target_backend)
+
+
+    sys.exit(0 if outcome["success"] else 1)
@@ -0,0 +1,231 @@
+"""
+bulk.py
+Backlog-Modus: N Videos auf einmal produzieren (z.B. eine Woche Content).
+
+1. N Fakten generieren (nacheinander - OpenAI läuft über das Quota-Ledger)
+2. Rendern in einem Prozess-Pool: ein Job pro Kern, ffmpeg mit begrenzten Threads pro Job
+3. Archivieren OHNE YouTube-Upload und in die Upload-Queue des Kanals stellen -
+   der Scheduler lädt sie zu den geplanten Zeiten hoch
+4. Report: Videos/Stunde, CPU-Auslastung, Perzentile pro Stufe
+
+    python3 /app/src/bulk.py --count=14 [--jobs=4] [--channel=science]
+                             [--mode=three_parts] [--anim=pan] [--topic=...]
+"""
+
+import os
+import sys
+import time
+import argparse
+import resource
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import bot
+import channels
+import state_store
+import structured_log
+
+STAGES = ("fact", "image", "render", "archive")
+
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _init_render_worker():
+    """Fonts einmal pro Pool-Prozess laden, nicht pro Video."""
+    from generate_image import preload_fonts
+    preload_fonts()
+
+
+def _render_job(fact_data, video_path, mode, anim, duration, palette_index, threads):
+    """Läuft im Pool-Prozess: Bild + Render. Gibt (Pfade, Stufen-Zeiten) zurück."""
+    temp_assets = []
+    try:
+        # Parallel wird hier schon über mehrere Videos - keine Segmente pro Video
+        timings = bot.render_fact_video(fact_data, video_path, mode, anim, duration,
+                                        palette_index, temp_assets, threads=threads, segments=1)
+    except BaseException:
+        for path in temp_assets + [video_path]:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    return temp_assets, timings
+
+
+def percentile(values, pct):
+    """Nearest-Rank-Perzentil (ohne NumPy)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        "=" * 60,
+        f"  📦 Bulk-Lauf: {report['done']}/{report['requested']} Videos in {report['wall_seconds']:.1f}s"
+        f" ({report['failed']} fehlgeschlagen)",
+        f"  🚀 Durchsatz:  {report['videos_per_hour']:.1f} Videos/Stunde",
+        f"  🧠 CPU:        {report['cpu_utilization'] * 100:.0f}% von {report['cores']} Kernen"
+        f" ({report['jobs']} Jobs × {report['ffmpeg_threads']} ffmpeg-Threads)",
+        f"  {'Stufe':<10}{'p50':>9}{'p90':>9}{'max':>9}",
+    ]
+    for stage in STAGES:
+        stats = report["stages"][stage]
+        lines.append(f"  {stage:<10}{stats['p50']:>8.2f}s{stats['p90']:>8.2f}s{stats['max']:>8.2f}s")
+    lines.append(f"  📬 Upload-Queue: {report['queued_total']} Videos warten")
+    lines.append("=" * 60)
+    return "\n".join(lines)
+
+
+def run_bulk(count: int, jobs: int = None, channel: str = None, mode: str = None,
+             anim: str = None, topic: str = None) -> dict:
+    import archive_manager
+    import upload_queue
+    from generate_fact import generate_fact
+
+    profile = channels.get_channel(channel)
+    structured_log.bind(channel=profile["name"], stage="bulk")
+    api_key = channels.credential(profile, "OPENAI_API_KEY")
+    if not api_key:
+        raise bot.ConfigError(f"Missing environment variable: {profile['env_prefix']}OPENAI_API_KEY")
+
+    cores = available_cores()
+    jobs = max(1, min(jobs or cores, count))
+    threads = max(1, cores // jobs)
+
+    state = state_store.load(profile["state_file"])
+    mode = mode or state["video_mode"]
+    anim = anim or state["anim_type"]
+    duration = float(state["duration"])
+    if topic is None and state["video_topic"] != "random":
+        topic = state["video_topic"]
+    channel_tag = "AIFail" if profile["name"] == channels.DEFAULT_CHANNEL else profile["name"]
+    batch = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+    archive_path = os.path.join(profile["archive_dir"], "archive.json")
+    openai_account = channels.credential_owner(profile, "OPENAI_API_KEY")
+
+    bot.log(f"📦 Bulk: {count} Videos, {jobs} Jobs × {threads} ffmpeg-Threads (Mode: {mode}, Anim: {anim})")
+    timings = {stage: [] for stage in STAGES}
+    done, failed = 0, 0
+
+    wall_start = time.perf_counter()
+    cpu_start = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=mp.get_context("spawn"),
+                             initializer=_init_render_worker) as pool:
+        futures = {}
+        for i in range(count):
+            # 1. Fakt im Hauptprozess - Renders laufen währenddessen schon im Pool
+            started = time.perf_counter()
+            try:
+                fact_data = generate_fact(api_key, topic=topic, topics=profile["topics"],
+                                          archive_path=archive_path, quota_account=openai_account)
+            except Exception as e:
+                bot.log(f"❌ Fakt {i + 1}/{count} fehlgeschlagen: {e}", "ERROR")
+                failed += 1
+                continue
+            timings["fact"].append(time.perf_counter() - started)
+
+            palette_index = (state["last_palette"] + 1) % 5
+            state["last_palette"] = palette_index
+            video_path = f"/tmp/{batch}_{channel_tag}_{i + 1:03d}.mp4"
+            future = pool.submit(_render_job, fact_data, video_path, mode, anim, duration, palette_index, threads)
+            futures[future] = (fact_data, video_path)
+
+        # 2. Fertige Renders archivieren + einreihen (im Hauptprozess: Archiv-Index ist nicht prozesssicher)
+        for future in as_completed(futures):
+            fact_data, video_path = futures[future]
+            try:
+                temp_assets, stage_times = future.result()
+            except Exception as e:
+                bot.log(f"❌ Render {os.path.basename(video_path)} fehlgeschlagen: {e}", "ERROR")
+                failed += 1
+                continue
+            timings["image"].append(stage_times["image"])
+            timings["render"].append(stage_times["render"])
+
+            started = time.perf_counter()
+            try:
+                archived = archive_manager.move_to_archive(
+                    video_path, fact_data, temp_assets[0] if temp_assets else None,
+                    archive_dir=profile["archive_dir"], state_file=profile["state_file"],
+                    env_prefix=profile["env_prefix"])
+                if not archived:
+                    raise RuntimeError("Archivieren fehlgeschlagen")
+                upload_queue.enqueue(archived, fact_data, profile["archive_dir"])
+                done += 1
+                bot.log(f"✅ {done}/{count} archiviert: {os.path.basename(archived)}")
+            except Exception as e:
+                bot.log(f"❌ {os.path.basename(video_path)}: {e}", "ERROR")
+                failed += 1
+            finally:
+                timings["archive"].append(time.perf_counter() - started)
+                for path in temp_assets + [video_path]:
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    # Pool ist beendet -> RUSAGE_CHILDREN enthält die Worker inkl. ihrer ffmpeg-Prozesse
+    wall = time.perf_counter() - wall_start
+    cpu_end = resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu_seconds = sum(
+        (end.ru_utime - start.ru_utime) + (end.ru_stime - start.ru_stime)
+        for start, end in zip(cpu_start, cpu_end)
+    )
+    state_store.update(profile["state_file"], last_palette=state["last_palette"])
+
+    report = {
+        "channel": profile["name"],
+        "requested": count,
+        "done": done,
+        "failed": failed,
+        "cores": cores,
+        "jobs": jobs,
+        "ffmpeg_threads": threads,
+        "wall_seconds": wall,
+        "cpu_seconds": cpu_seconds,
+        "cpu_utilization": cpu_seconds / (wall * cores) if wall else 0.0,
+        "videos_per_hour": done / wall * 3600 if wall else 0.0,
+        "stages": {
+            stage: {
+                "p50": percentile(values, 50),
+                "p90": percentile(values, 90),
+                "max": max(values, default=0.0),
+            }
+            for stage, values in timings.items()
+        },
+        "queued_total": upload_queue.pending(profile["archive_dir"]),
+    }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mehrere Videos auf Vorrat rendern (ohne Upload).")
+    parser.add_argument("--count", type=int, required=True, help="Anzahl Videos")
+    parser.add_argument("--jobs", type=int, default=None, help="Parallele Render-Jobs (Standard: Anzahl Kerne)")
+    parser.add_argument("--channel", default=None)
+    parser.add_argument("--mode", default=None, choices=("classic", "three_parts", "word_by_word"))
+    parser.add_argument("--anim", default=None, choices=("zoom", "static", "pan"))
+    parser.add_argument("--topic", default=None)
+    args = parser.parse_args(argv)
+
+    try:
+        report = run_bulk(args.count, jobs=args.jobs, channel=args.channel,
+                          mode=args.mode, anim=args.anim,
+                          topic=None if args.topic == "random" else args.topic)
+    except (bot.ConfigError, KeyError) as e:
+        print(f"❌ {e}")
+        return 1
+    print(format_report(report))
+    return 0 if report["done"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
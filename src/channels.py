@@ -0,0 +1,126 @@
+"""
+channels.py
+Kanal-Profile: mehrere YouTube-Kanäle aus einem Deployment.
+
+Der Kanal "default" entspricht dem bisherigen Setup (globale ENV-Variablen,
+/app/logs/state.json, /data/archive) und existiert immer. Weitere Kanäle kommen
+aus CHANNELS_FILE (JSON-Datei) oder CHANNELS (JSON direkt in der Variable):
+
+    {
+      "science": {
+        "env_prefix": "SCIENCE_",
+        "post_times": "09:00, 17:30?mode=three_parts",
+        "topics": ["weird physics experiments", "space mission glitches"]
+      }
+    }
+
+Zugangsdaten stehen nie in der Datei, sondern in ENV-Variablen mit Präfix
+(z.B. SCIENCE_YOUTUBE_REFRESH_TOKEN). Der OpenAI-Key darf geteilt werden.
+"""
+
+import os
+import json
+
+DEFAULT_CHANNEL = "default"
+
+CREDENTIAL_KEYS = (
+    "OPENAI_API_KEY",
+    "YOUTUBE_CLIENT_ID",
+    "YOUTUBE_CLIENT_SECRET",
+    "YOUTUBE_REFRESH_TOKEN",
+)
+# Diese Keys fallen auf die globale Variable zurück, wenn der Kanal keinen eigenen hat
+SHARED_CREDENTIAL_KEYS = ("OPENAI_API_KEY",)
+
+LOGS_DIR = "/app/logs"
+ARCHIVE_ROOT = "/data/archive"
+
+_PROFILE_KEYS = ("env_prefix", "post_times", "topics", "state_file", "archive_dir", "title")
+
+_channels_cache = None
+
+
+def _default_profile(name: str) -> dict:
+    if name == DEFAULT_CHANNEL:
+        return {
+            "name": name,
+            "title": "AI Fails",
+            "env_prefix": "",
+            "post_times": None,  # None = POST_TIMES / POST_HOUR_UTC aus der Umgebung
+            "topics": None,      # None = generate_fact.TOPICS
+            "state_file": os.path.join(LOGS_DIR, "state.json"),
+            "archive_dir": ARCHIVE_ROOT,
+        }
+    return {
+        "name": name,
+        "title": name,
+        "env_prefix": f"{name.upper()}_",
+        "post_times": "",
+        "topics": None,
+        "state_file": os.path.join(LOGS_DIR, "channels", name, "state.json"),
+        "archive_dir": os.path.join(ARCHIVE_ROOT, "channels", name),
+    }
+
+
+def _read_config() -> dict:
+    path = os.environ.get("CHANNELS_FILE")
+    if path and os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    raw = os.environ.get("CHANNELS")
+    if raw:
+        return json.loads(raw)
+    return {}
+
+
+def load_channels(reload: bool = False) -> dict:
+    """Alle Kanal-Profile {name: profile}. 'default' ist immer dabei."""
+    global _channels_cache
+    if _channels_cache is not None and not reload:
+        return _channels_cache
+
+    config = _read_config()
+    channels = {DEFAULT_CHANNEL: _default_profile(DEFAULT_CHANNEL)}
+    for name, overrides in config.items():
+        if not name.replace("_", "").replace("-", "").isalnum():
+            raise ValueError(f"Ungültiger Kanalname: {name!r}")
+        unknown = set(overrides) - set(_PROFILE_KEYS)
+        if unknown:
+            raise ValueError(f"Unbekannte Felder für Kanal {name!r}: {', '.join(sorted(unknown))}")
+        profile = channels.get(name) or _default_profile(name)
+        profile.update(overrides)
+        channels[name] = profile
+
+    _channels_cache = channels
+    return channels
+
+
+def get_channel(name: str = None) -> dict:
+    channels = load_channels()
+    name = name or DEFAULT_CHANNEL
+    if name not in channels:
+        raise KeyError(f"Unbekannter Kanal: {name}")
+    return channels[name]
+
+
+def credential(profile: dict, key: str):
+    """ENV-Wert für den Kanal: PRÄFIX_KEY, bei geteilten Keys sonst KEY."""
+    value = os.environ.get(profile["env_prefix"] + key)
+    if not value and (key in SHARED_CREDENTIAL_KEYS or not profile["env_prefix"]):
+        value = os.environ.get(key)
+    return value
+
+
+def credential_owner(profile: dict, key: str) -> str:
+    """Kanal, dem der Wert von credential() gehört (für das Quota-Konto)."""
+    if profile["env_prefix"] and os.environ.get(profile["env_prefix"] + key):
+        return profile["name"]
+    return DEFAULT_CHANNEL
+
+
+def schedule_for(profile: dict) -> list:
+    """Geparster Posting-Plan des Kanals."""
+    from post_schedule import parse_schedule, schedule_from_env
+    if profile["post_times"] is None:
+        return schedule_from_env()
+    return parse_schedule(profile["post_times"])
@@ -0,0 +1,103 @@
+"""
+frame_compositor.py
+Alternatives Render-Backend (RENDER_BACKEND=compositor): Zoom/Pan und Text-Layer
+werden hier in Python berechnet, ffmpeg bekommt fertige RGB-Frames über stdin
+und kodiert nur noch.
+
+Der ffmpeg-Pfad braucht für zoompan ein 2160x3840-Zwischenbild, weil zoompan die
+Crop-Koordinaten auf ganze Pixel rundet und sonst ruckelt. Hier wird jeder Frame
+direkt aus dem 1080x1920-Bild gesampelt: Zoom + Verschiebung ist eine affine
+Abbildung ohne Drehung, also reicht Image.resize() mit einer Float-Box (separabel,
+bikubisch, Subpixel-genau) - ohne Supersampling und etwa 3x schneller als
+Image.transform(AFFINE). Die Bewegung folgt denselben Formeln wie die
+zoompan-Ausdrücke in bot.render_advanced_video.
+
+Nur zoom und pan; static (Vignette + Fortschrittsbalken) bleibt beim ffmpeg-Pfad.
+"""
+
+import math
+
+from PIL import Image
+
+WIDTH, HEIGHT = 1080, 1920
+ANIMS = ("zoom", "pan")
+
+ZOOM_STEP = 0.001
+ZOOM_MAX = 1.15
+PAN_ZOOM = 1.15
+# Tempo der Bewegung: ZOOM_STEP pro 1/25 s (Standardrate von zoompan, auf der die Werte beruhen)
+MOTION_RATE = 25
+
+
+def input_args(fps: int) -> list:
+    """ffmpeg-Eingabe für die Frames aus write_frames()."""
+    return ["-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{WIDTH}x{HEIGHT}", "-r", str(fps), "-i", "pipe:0"]
+
+
+def crop_window(anim_type: str, frame: int, total_frames: int, fps: int) -> tuple:
+    """(x, y, zoom) des sichtbaren Ausschnitts im Frame - wie zoompan, aber ohne Rundung."""
+    step = frame * MOTION_RATE / fps
+    if anim_type == "zoom":
+        zoom = min(1 + ZOOM_STEP * (step + 1), ZOOM_MAX)
+        return (WIDTH - WIDTH / zoom) / 2, (HEIGHT - HEIGHT / zoom) / 2, zoom
+    if anim_type == "pan":
+        zoom = PAN_ZOOM
+        x = (WIDTH - WIDTH / zoom) / 2 * (1 + math.sin(2 * math.pi * step / (total_frames * 2)))
+        return x, (HEIGHT - HEIGHT / zoom) / 2, zoom
+    raise ValueError(f"Compositor cannot render '{anim_type}'")
+
+
+def _load_layers(layer_paths: list) -> list:
+    """
+    Text-Layer einmal laden und auf den sichtbaren Bereich zuschneiden:
+    (RGB, Alpha-Maske, Position, Start, Ende). Ein Vollbild-Layer mit etwas Text
+    kostet beim Einfügen so nur noch die Textfläche.
+    """
+    layers = []
+    for path, start, end in layer_paths:
+        with Image.open(path) as img:
+            rgba = img.convert("RGBA")
+        box = rgba.getchannel("A").getbbox()
+        if not box:
+            continue  # komplett transparent
+        sprite = rgba.crop(box)
+        layers.append((sprite.convert("RGB"), sprite.getchannel("A"), box[:2], float(start), float(end)))
+    return layers
+
+
+def frames(background_path: str, layer_paths: list, anim_type: str, duration: float, fps: int,
+           first_frame: int = 0, frame_count: int = None):
+    """
+    Erzeugt die Frames als RGB-Bilder (ein Bild pro Frame, Layer wie overlay=enable='between(t,..)').
+    first_frame/frame_count: nur ein Abschnitt (Segment-Rendering), Bewegung und Layer nach absoluter Zeit.
+    """
+    with Image.open(background_path) as img:
+        background = img.convert("RGB")
+    if background.size != (WIDTH, HEIGHT):
+        background = background.resize((WIDTH, HEIGHT), Image.LANCZOS)
+    layers = _load_layers(layer_paths)
+    total_frames = int(duration * fps)
+    last_frame = total_frames if frame_count is None else first_frame + frame_count
+    for index in range(first_frame, last_frame):
+        x, y, zoom = crop_window(anim_type, index, total_frames, fps)
+        frame = background.resize((WIDTH, HEIGHT), Image.BICUBIC, box=(x, y, x + WIDTH / zoom, y + HEIGHT / zoom))
+        t = index / fps
+        for rgb, alpha, position, start, end in layers:
+            if start <= t <= end:
+                frame.paste(rgb, position, alpha)
+        yield frame
+
+
+def write_frames(pipe, background_path: str, layer_paths: list, anim_type: str, duration: float, fps: int,
+                 first_frame: int = 0, frame_count: int = None):
+    """Schreibt die Frames nach pipe (ffmpeg-stdin) und schließt sie. Bricht ffmpeg ab, endet das still."""
+    try:
+        for frame in frames(background_path, layer_paths, anim_type, duration, fps, first_frame, frame_count):
+            pipe.write(frame.tobytes())
+    except BrokenPipeError:
+        pass  # ffmpeg ist weg - den Fehler meldet sein Exit-Code
+    finally:
+        try:
+            pipe.close()
+        except BrokenPipeError:
+            pass
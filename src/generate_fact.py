@@ -2,6 +2,8 @@
 generate_fact.py
 Uses OpenAI GPT-4o-mini to generate a fresh, viral-worthy AI Fail.
 Includes Archive-Check to prevent repetition of the same content.
+Ein Request liefert mehrere Kandidaten; der beste (Wortzahl, Zeilen im Bild,
+Abstand zum Archiv) wird genommen, die übrigen landen in der Reserve.
 Costs ~0.001€ per call.
 """
 
@@ -12,6 +14,8 @@ import os
 import random
 from datetime import datetime
 
+import quota
+
 
 # Topic rotation — Speziell für KI-Fehler und Technik-Glitches
 TOPICS = [
@@ -29,132 +33,331 @@ TOPICS = [
 
 
 SYSTEM_PROMPT = """You are a viral YouTube Shorts writer specializing in "AI Fails".
-Your job: Write ONE hilarious or shocking instance where an Artificial Intelligence completely failed or made a ridiculous mistake.
+Your job: Write ONE hilarious or shocking instance where an Artificial Intelligence completely failed or made a ridiculous mistake,
+together with the YouTube metadata for the video.
 
-Rules:
+Rules for "fact":
 - Start with the most absurd part
 - Maximum 35 words
 - NO emojis in the text itself
 - Must be a real, documented or highly relatable AI glitch
-- Write ONLY the fail description, nothing else
 - Make it punchy: "Imagine an AI...", "This chatbot...", "A computer once..."
+
+Other fields:
+- "title": YouTube title max 60 chars, start with emoji, hook first
+- "description": 2-3 sentences about this AI glitch, conversational, end with a question. No hashtags.
+- "tags": 5 short tags without '#', e.g. the topic, "AIFail", "Funny", "Glitches", "Shorts"
+- "source": short source credit e.g. "Source: Reddit"
+- "parts": exactly 3 strings: hook (max 4 words), the core fail description, final punchline/trigger
 """
 
 
-def generate_fact(api_key: str, topic: str = None) -> dict:
+# Eine Antwort mit allem (Structured Outputs): Fakt + Metadaten in einem Request.
+# "words" fehlt absichtlich - das ist nur der Fakt in Wörtern und wird lokal gebildet.
+FACT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "fact": {"type": "string"},
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "tags": {"type": "array", "items": {"type": "string"}},
+        "source": {"type": "string"},
+        "parts": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["fact", "title", "description", "tags", "source", "parts"],
+    "additionalProperties": False,
+}
+
+RESPONSE_FORMAT = {"type": "json_schema", "json_schema": {"name": "ai_fail", "strict": True, "schema": FACT_SCHEMA}}
+
+DEFAULT_TITLE = "🤖 Epic AI Fail"
+DEFAULT_TAGS = ["AI", "Fail", "Funny", "Tech", "Shorts"]
+DEFAULT_SOURCE = "Source: AI Archives"
+TITLE_MAX_CHARS = 100  # YouTube-Limit
+
+
+ARCHIVE_DB = "/data/archive/archive.json"
+
+# Kandidaten pro Request (API-Parameter n): ein Call, lokal bewertet, der beste gewinnt
+CANDIDATES = int(os.environ.get("FACT_CANDIDATES", "3"))
+
+# Reserve: die übrigen Kandidaten (fact_reserve.json neben archive.json des Kanals).
+# Der nächste Lauf nimmt erst von hier, bevor er die API fragt.
+RESERVE_FILE = "fact_reserve.json"
+RESERVE_MAX = 20
+RESERVE_MAX_AGE_DAYS = 14
+RESERVE_MIN_SCORE = 0.6
+RESERVE_MIN_NOVELTY = 0.5  # Beinahe-Wiederholungen eines Archiv-Fakts nie aus der Reserve nehmen
+
+# Bewertung: Wortzahl (35-Wort-Regel), Zeilen im Bild, Abstand zum Archiv
+MAX_WORDS = 35
+MIN_WORDS = 12
+SCORE_WEIGHTS = {"words": 0.3, "layout": 0.3, "novelty": 0.4}
+
+
+def generate_fact(api_key: str, topic: str = None, topics: list = None, archive_path: str = None,
+                  quota_account: str = quota.DEFAULT_ACCOUNT, use_reserve: bool = True) -> dict:
     """
+    topics       : Themen-Rotation des Kanals (Standard: TOPICS)
+    archive_path : archive.json des Kanals für den Wiederholungs-Check
+    quota_account: Konto im Quota-Ledger (wem der OpenAI-Key gehört)
+    use_reserve  : zuerst einen passenden Kandidaten aus der Reserve nehmen (kein API-Call)
     Returns: { "fact": str, "source": str, "topic": str, "title": str, "description": str, "tags": list, "parts": list, "words": list }
     """
-    if topic is None or topic == "random":
-        topic = random.choice(TOPICS)
+    topics = topics or TOPICS
+    wanted_topic = None if topic in (None, "random") else topic
+    topic = wanted_topic or random.choice(topics)
+
+    archive_path = archive_path or ARCHIVE_DB
+    archive_facts = _archive_facts(archive_path)
+    reserve_path = os.path.join(os.path.dirname(archive_path), RESERVE_FILE)
+
+    if use_reserve:
+        entry = take_reserve(reserve_path, archive_facts, [wanted_topic] if wanted_topic else topics)
+        if entry:
+            return _result(entry["meta"], entry["topic"])
 
-    # REPETITION FIX: Lade die letzten Fakten aus dem Archiv
+    # REPETITION FIX: Die letzten 10 Fail-Inhalte als Ausschlusskriterium im Prompt
     history_context = ""
-    try:
-        archive_path = "/data/archive/archive.json"
-        if os.path.exists(archive_path):
-            with open(archive_path, "r") as f:
-                data = json.load(f)
-                # Wir nehmen die letzten 10 Fail-Inhalte als Ausschlusskriterium
-                recent_fails = [item.get("fact", "") for item in data[-10:]]
-                if recent_fails:
-                    history_context = "IMPORTANT: Do NOT repeat the content of these recent AI fails: " + " | ".join(recent_fails)
-    except:
-        pass
+    if archive_facts:
+        history_context = "IMPORTANT: Do NOT repeat the content of these recent AI fails: " + " | ".join(archive_facts[-10:])
 
     user_prompt = f"{history_context}\n\nWrite one fresh, obscure, and hilarious AI fail about: {topic}. Surprise me!"
 
-    # First call: get the fail
-    fact_response = _call_gpt(
+    # Ein Call: Fakt + Metadaten nach FACT_SCHEMA, CANDIDATES Varianten (n) im selben Request
+    responses = _call_gpt(
         api_key=api_key,
         system=SYSTEM_PROMPT,
         user=user_prompt,
-        max_tokens=100
+        max_tokens=500,
+        account=quota_account,
+        response_format=RESPONSE_FORMAT,
+        n=CANDIDATES,
     )
 
-    fact_text = fact_response.strip().strip('"')
-
-    # Second call: generate YouTube metadata including parts for retention modes
-    meta_prompt = f"""For this YouTube Shorts AI Fail video, write:
-Fail: "{fact_text}"
-Topic: "{topic}"
+    candidates = []
+    for response in responses:
+        try:
+            meta = repair(_parse_json(response), topic)
+        except RuntimeError:
+            continue  # eine kaputte Variante kostet nichts, solange eine andere taugt
+        if all(meta["fact"] != other["meta"]["fact"] for other in candidates):
+            candidates.append({"meta": meta, "topic": topic, "score": score(meta, archive_facts)})
+    if not candidates:
+        raise RuntimeError(f"OpenAI returned no usable candidate: {responses[0][:200]!r}")
 
-Return ONLY valid JSON with these exact keys:
-{{
-  "title": "YouTube title max 60 chars, start with emoji, hook first",
-  "description": "2-3 sentences about this AI glitch, conversational, end with a question. Do NOT include hashtags here.",
-  "tags": ["{topic.replace(' ', '').replace('(', '').replace(')', '')}", "AIFail", "Funny", "Glitches", "Shorts"],
-  "source": "Short source credit e.g. 'Source: Reddit'",
-  "parts": ["Hook (max 4 words)", "The core fail description", "Final punchline/trigger"],
-  "words": ["List", "of", "every", "single", "word", "from", "the", "fail", "text"]
-}}"""
+    candidates.sort(key=lambda c: c["score"]["total"], reverse=True)
+    if len(candidates) > 1:
+        try:
+            add_reserve(reserve_path, candidates[1:])
+        except OSError:
+            pass  # Reserve ist nur eine Ersparnis
+    return _result(candidates[0]["meta"], topic)
 
-    meta_response = _call_gpt(
-        api_key=api_key,
-        system="You write YouTube metadata and segment text for viral retention. Return only valid JSON, no markdown.",
-        user=meta_prompt,
-        max_tokens=500
-    )
 
-    # Parse JSON safely
-    try:
-        clean = meta_response.strip()
-        if clean.startswith("```"):
-            clean = clean.split("```")[1]
-            if clean.startswith("json"):
-                clean = clean[4:]
-        meta = json.loads(clean.strip())
-    except json.JSONDecodeError:
-        meta = {
-            "title": f"🤖 AI Fail: You won't believe this...",
-            "description": f"{fact_text}\n\nIs AI taking over or just failing? 😂",
-            "tags": ["AI", "Fail", "Funny", "Tech", "Shorts"],
-            "source": "Source: AI Archives",
-            "parts": ["AI Fails...", fact_text, "Unbelievable."],
-            "words": fact_text.split()
-        }
-
-    # Ensure keys exist for retention modes
-    if "parts" not in meta or not meta["parts"]:
-        meta["parts"] = ["AI Fails...", fact_text, "Unbelievable."]
-    if "words" not in meta or not meta["words"]:
-        meta["words"] = fact_text.split()
-
-    tags_str = " ".join([f"#{t.replace(' ', '')}" for t in meta.get("tags", [])])
+def _result(meta: dict, topic: str) -> dict:
+    tags_str = " ".join([f"#{t}" for t in meta["tags"]])
     if "#Shorts" not in tags_str:
         tags_str += " #Shorts #AIFails"
-    
-    full_description = f"{meta.get('description', '')}\n\n{tags_str}"
-
-    # --- PRO-CLEANING: TITEL BEREINIGUNG ---
-    # Sicherstellen, dass der Titel ein sauberer String ohne Artefakte ist
-    raw_title = meta.get("title", "🤖 Epic AI Fail")
-    if isinstance(raw_title, list):
-        final_title = str(raw_title[0]) if raw_title else "🤖 Epic AI Fail"
-    else:
-        final_title = str(raw_title)
-    
-    # Entferne explizit '[]' falls die KI sie als Text zurückgegeben hat
-    final_title = final_title.replace("[]", "").strip()
-    # --------------------------------------
 
     return {
-        "fact": fact_text,
+        "fact": meta["fact"],
         "topic": topic,
-        "title": final_title,
-        "description": full_description,
-        "tags": meta.get("tags", ["AI", "Fail"]),
-        "source": meta.get("source", ""),
-        "parts": meta.get("parts"),
-        "words": meta.get("words"),
+        "title": meta["title"],
+        "description": f"{meta['description']}\n\n{tags_str}",
+        "tags": meta["tags"],
+        "source": meta["source"],
+        "parts": meta["parts"],
+        "words": meta["words"],
         "generated_at": datetime.now().isoformat()
     }
 
 
+def _archive_facts(archive_path: str) -> list:
+    """Alle Fakten aus archive.json (älteste zuerst)."""
+    try:
+        with open(archive_path, "r") as f:
+            return [item.get("fact", "") for item in json.load(f) if item.get("fact")]
+    except (OSError, ValueError, AttributeError):
+        return []
+
+
+# ── Bewertung ─────────────────────────────────────────────────
+def _word_set(text: str) -> set:
+    return {w for w in "".join(c if c.isalnum() else " " for c in text.lower()).split() if len(w) > 3}
+
+
+def novelty(fact: str, archive_facts: list) -> float:
+    """1 - größte Wort-Überlappung (Jaccard) mit einem Archiv-Fakt: 1 = ganz neu, 0 = schon dagewesen."""
+    words = _word_set(fact)
+    if not words:
+        return 0.0
+    overlap = 0.0
+    for other in archive_facts:
+        other_words = _word_set(other)
+        if other_words:
+            overlap = max(overlap, len(words & other_words) / len(words | other_words))
+    return 1.0 - overlap
+
+
+def layout_fit(fact: str) -> float:
+    """
+    Wie gut der Fakt ins Bild passt (derselbe Umbruch wie generate_image):
+    1 = volle Schriftgröße, jede Verkleinerung kostet, über 8 Zeilen = 0.
+    Ein einzelnes Wort in der letzten Zeile kostet etwas extra.
+    """
+    from PIL import Image, ImageDraw
+    from generate_image import fit_text, FONT_SIZE_MAX, FONT_SIZE_MIN, TEXT_MAX_LINES
+
+    draw = ImageDraw.Draw(Image.new("L", (1, 1)))
+    _, font_size, lines = fit_text(fact, draw)
+    if len(lines) > TEXT_MAX_LINES:
+        return 0.0
+    fit = 1.0 - 0.5 * (FONT_SIZE_MAX - font_size) / (FONT_SIZE_MAX - FONT_SIZE_MIN)
+    if len(lines) > 1 and len(lines[-1].split()) == 1:
+        fit -= 0.1
+    return max(fit, 0.0)
+
+
+def word_fit(fact: str) -> float:
+    """35-Wort-Regel: 1 bis MAX_WORDS, darüber fällt es schnell ab; sehr kurze Fakten tragen kein Video."""
+    count = len(fact.split())
+    if count > MAX_WORDS:
+        return max(0.0, 1.0 - (count - MAX_WORDS) / 10)
+    return min(1.0, count / MIN_WORDS)
+
+
+def score(meta: dict, archive_facts: list) -> dict:
+    """Einzelwerte + gewichtete Summe ("total") eines Kandidaten."""
+    result = {
+        "words": word_fit(meta["fact"]),
+        "layout": layout_fit(meta["fact"]),
+        "novelty": novelty(meta["fact"], archive_facts),
+    }
+    result["total"] = round(sum(SCORE_WEIGHTS[k] * v for k, v in result.items()), 4)
+    return {k: round(v, 4) for k, v in result.items()}
+
+
+# ── Reserve ───────────────────────────────────────────────────
+def _reserve_worthy(scores: dict) -> bool:
+    return scores["total"] >= RESERVE_MIN_SCORE and scores["novelty"] >= RESERVE_MIN_NOVELTY
+
+
+def add_reserve(reserve_path: str, candidates: list):
+    """Legt nicht gewählte Kandidaten ab (die besten RESERVE_MAX bleiben)."""
+    from state_store import locked_json
+
+    now = datetime.now().isoformat()
+    with locked_json(reserve_path, list) as reserve:
+        known = {entry["meta"]["fact"] for entry in reserve}
+        reserve.extend(dict(c, added_at=now) for c in candidates
+                       if c["meta"]["fact"] not in known and _reserve_worthy(c["score"]))
+        reserve.sort(key=lambda entry: entry["score"]["total"], reverse=True)
+        del reserve[RESERVE_MAX:]
+
+
+def take_reserve(reserve_path: str, archive_facts: list, topics: list):
+    """
+    Nimmt den besten noch brauchbaren Kandidaten zu einem der topics aus der Reserve.
+    Novelty wird gegen das aktuelle Archiv neu bewertet; veraltete oder inzwischen
+    zu ähnliche Einträge fliegen raus.
+    """
+    if not os.path.exists(reserve_path):
+        return None
+    from state_store import locked_json
+
+    cutoff = datetime.now().timestamp() - RESERVE_MAX_AGE_DAYS * 86400
+    try:
+        with locked_json(reserve_path, list) as reserve:
+            fresh = []
+            for entry in reserve:
+                try:
+                    if datetime.fromisoformat(entry["added_at"]).timestamp() < cutoff:
+                        continue
+                    entry["score"] = score(entry["meta"], archive_facts)
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if _reserve_worthy(entry["score"]):
+                    fresh.append(entry)
+            fresh.sort(key=lambda entry: entry["score"]["total"], reverse=True)
+            chosen = next((entry for entry in fresh if entry.get("topic") in topics), None)
+            reserve[:] = [entry for entry in fresh if entry is not chosen]
+    except OSError:
+        return None
+    return chosen
+
+
+def _parse_json(text: str) -> dict:
+    """Antwort -> dict. Toleriert Code-Fences und Text um das Objekt herum."""
+    clean = text.strip()
+    try:
+        data = json.loads(clean)
+    except json.JSONDecodeError:
+        start, end = clean.find("{"), clean.rfind("}")
+        try:
+            data = json.loads(clean[start:end + 1]) if 0 <= start < end else None
+        except json.JSONDecodeError:
+            data = None
+    if not isinstance(data, dict):
+        raise RuntimeError(f"OpenAI returned no JSON object: {text[:200]!r}")
+    return data
+
+
+def _text(value) -> str:
+    """Feld als sauberer String (Listen -> erstes Element, '[]'-Artefakte raus)."""
+    if isinstance(value, list):
+        value = value[0] if value else ""
+    return str(value or "").replace("[]", "").strip()
+
+
+def repair(meta: dict, topic: str) -> dict:
+    """
+    Prüft die Felder lokal und repariert, was fehlt oder nicht passt - ohne weiteren API-Call.
+    Nur ein fehlender Fakt ist nicht zu retten.
+    """
+    fact = _text(meta.get("fact")).strip('"').strip()
+    if not fact:
+        raise RuntimeError("OpenAI returned no fact")
+
+    title = _text(meta.get("title")) or DEFAULT_TITLE
+    if len(title) > TITLE_MAX_CHARS:
+        title = title[:TITLE_MAX_CHARS - 1].rstrip() + "…"
+
+    description = _text(meta.get("description")) or f"{fact}\n\nIs AI taking over or just failing? 😂"
+
+    tags = []
+    for tag in meta.get("tags") if isinstance(meta.get("tags"), list) else []:
+        tag = str(tag).replace("#", "").replace(" ", "").strip()
+        if tag and tag not in tags:
+            tags.append(tag)
+    if not tags:
+        tags = [topic.replace(" ", "").replace("(", "").replace(")", "")] + DEFAULT_TAGS
+
+    parts = [_text(part) for part in meta.get("parts") or [] if _text(part)] if isinstance(meta.get("parts"), list) else []
+    if len(parts) != 3:
+        parts = ["AI Fails...", fact, "Unbelievable."]
+
+    return {
+        "fact": fact,
+        "title": title,
+        "description": description,
+        "tags": tags,
+        "source": _text(meta.get("source")) or DEFAULT_SOURCE,
+        "parts": parts,
+        "words": fact.split(),
+    }
+
+
 def _call_gpt(api_key: str, system: str, user: str,
-              max_tokens: int = 200) -> str:
-    """Raw OpenAI API call via urllib (no SDK needed)."""
-    payload = json.dumps({
+              max_tokens: int = 200, account: str = quota.DEFAULT_ACCOUNT, response_format: dict = None,
+              n: int = 1) -> list:
+    """
+    Raw OpenAI API call via urllib (no SDK needed). Rate-limited and counted in the quota ledger.
+    response_format: z.B. RESPONSE_FORMAT (JSON nach Schema statt Freitext)
+    n              : Anzahl Varianten (choices) im selben Request - ein Call im Ledger
+    Returns: Liste der Antworttexte, eine pro Variante
+    """
+    body = {
         "model": "gpt-4o-mini",
         "messages": [
             {"role": "system", "content": system},
@@ -162,7 +365,12 @@ def _call_gpt(api_key: str, system: str, user: str,
         ],
         "max_tokens": max_tokens,
         "temperature": 1.0 
-    }).encode("utf-8")
+    }
+    if response_format:
+        body["response_format"] = response_format
+    if n > 1:
+        body["n"] = n
+    payload = json.dumps(body).encode("utf-8")
 
     req = urllib.request.Request(
         "https://api.openai.com/v1/chat/completions",
@@ -174,13 +382,22 @@ def _call_gpt(api_key: str, system: str, user: str,
         method="POST"
     )
 
+    quota.acquire("openai", account)
+    quota.charge("openai", 1, account)
+
     try:
         with urllib.request.urlopen(req, timeout=30) as resp:
             data = json.loads(resp.read().decode())
-            return data["choices"][0]["message"]["content"]
+            return [choice["message"]["content"] for choice in data["choices"]]
     except urllib.error.HTTPError as e:
         error_body = e.read().decode()
+        if e.code == 429 and "insufficient_quota" in error_body:
+            quota.exhaust("openai", account)
         raise RuntimeError(f"OpenAI API error {e.code}: {error_body}")
+    except (urllib.error.URLError, TimeoutError):
+        # Netzwerkfehler/Timeout - den Call nicht gegen das Tagesbudget zählen
+        quota.refund("openai", 1, account)
+        raise
 
 
 if __name__ == "__main__":
@@ -10,6 +10,7 @@ import textwrap
 import math
 import random
 import os
+from functools import lru_cache
 
 # Pfade zu den System-Schriftarten
 FONT_BOLD = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
@@ -17,6 +18,25 @@ FONT_REGULAR = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
 
 W, H = 1080, 1920
 
+# Pillow gibt freigegebene Bildspeicher-Blöcke sonst sofort ans OS zurück. Mit ein paar
+# gecachten Blöcken übernimmt das nächste Bild im warmen Worker den Puffer des letzten.
+if "PILLOW_BLOCKS_MAX" not in os.environ:
+    Image.core.set_blocks_max(4)
+
+
+@lru_cache(maxsize=32)
+def load_font(path: str, size: int):
+    """Fonts nur einmal pro Prozess laden (wichtig für den warmen Pipeline-Worker)."""
+    return ImageFont.truetype(path, size)
+
+
+def preload_fonts():
+    """Lädt alle Schriftgrößen, die die Layouts benutzen, vorab in den Cache."""
+    for size in range(48, 73, 4):
+        load_font(FONT_BOLD, size)
+    load_font(FONT_BOLD, 42)
+    load_font(FONT_REGULAR, 32)
+
 # Color palettes — Spezielle AI Fail Paletten (identische Struktur wie Mindblown)
 PALETTES = [
     {"bg": (15, 15, 5),    "accent": (255, 215, 0),  "text": (255, 255, 255), "sub": (255, 235, 120)}, # Gold
@@ -27,13 +47,13 @@ PALETTES = [
 ]
 
 
-def draw_particles(draw, palette, count=60):
-    """Draw subtle glowing dots in background."""
+def draw_particles(draw, palette, count=60, rng=random):
+    """Draw subtle glowing dots in background (rng: random.Random des Laufs für reproduzierbare Bilder)."""
     for _ in range(count):
-        x = random.randint(0, W)
-        y = random.randint(0, H)
-        size = random.randint(1, 4)
-        alpha = random.randint(40, 140)
+        x = rng.randint(0, W)
+        y = rng.randint(0, H)
+        size = rng.randint(1, 4)
+        alpha = rng.randint(40, 140)
         r, g, b = palette["accent"]
         draw.ellipse([x-size, y-size, x+size, y+size],
                      fill=(r, g, b, alpha))
@@ -49,10 +69,27 @@ def draw_gradient_bg(img, palette):
         r = min(255, int(r1 * factor))
         g = min(255, int(g1 * factor))
         b = min(255, int(b1 * factor))
-        draw.line([(0, y), (W, y)], fill=(r, g, b))
+        draw.line([(0, y), (img.width, y)], fill=(r, g, b))
     return draw
 
 
+@lru_cache(maxsize=None)
+def _gradient_column(palette_index: int):
+    """Eine 1px-Spalte des Verlaufs pro Palette (wenige KB, bleibt im Cache)."""
+    column = Image.new("RGB", (1, H))
+    draw_gradient_bg(column, PALETTES[palette_index])
+    return column
+
+
+def gradient_background(palette_index: int):
+    """
+    Vollbild mit Verlauf - genau eine Vollbild-Allokation pro Aufruf.
+    Der Verlauf ist nur vertikal, also reicht es, die gecachte Spalte in die
+    Breite zu ziehen (NEAREST = pixelgleich mit draw_gradient_bg).
+    """
+    return _gradient_column(palette_index % len(PALETTES)).resize((W, H), Image.NEAREST)
+
+
 def draw_glow_line(draw, palette, y_pos):
     """Draw a glowing horizontal accent line."""
     r, g, b = palette["accent"]
@@ -81,20 +118,32 @@ def wrap_text(text, font, max_width, draw):
     return lines
 
 
+# Layout des Haupttexts: 120px Rand links/rechts, höchstens 8 Zeilen (sonst kleinere Schrift)
+TEXT_MAX_W = W - 240
+TEXT_MAX_LINES = 8
+FONT_SIZE_MAX, FONT_SIZE_MIN = 72, 48
+
+
+def fit_text(text, draw, font_size=FONT_SIZE_MAX):
+    """Umbruch wie im Bild: verkleinert die Schrift in 4er-Schritten, bis der Text auf 8 Zeilen passt."""
+    font = load_font(FONT_BOLD, font_size)
+    lines = wrap_text(text, font, TEXT_MAX_W, draw)
+    while len(lines) > TEXT_MAX_LINES and font_size > FONT_SIZE_MIN:
+        font_size -= 4
+        font = load_font(FONT_BOLD, font_size)
+        lines = wrap_text(text, font, TEXT_MAX_W, draw)
+    return font, font_size, lines
+
+
 # --- NEUE FUNKTION: Nur den Hintergrund erstellen (PRO) ---
-def create_base_background(palette_index: int, source_text: str, output_path: str):
-    """Erstellt das Grundgerüst ohne Haupttext."""
+def create_base_background(palette_index: int, source_text: str, output_path: str, seed: int = None):
+    """Erstellt das Grundgerüst ohne Haupttext (gleicher Seed -> gleiches Bild)."""
     palette = PALETTES[palette_index % len(PALETTES)]
-    img = Image.new("RGB", (W, H), palette["bg"])
-    draw = draw_gradient_bg(img, palette)
-
-    overlay = Image.new("RGBA", (W, H), (0, 0, 0, 0))
-    odraw = ImageDraw.Draw(overlay)
-    draw_particles(odraw, palette)
-    img.paste(Image.new("RGB", (W, H)), mask=overlay.split()[3])
-    img = img.convert("RGBA")
-    img.alpha_composite(overlay)
-    img = img.convert("RGB")
+    img = gradient_background(palette_index)
+    # Partikel direkt mit Alpha-Blending auf die Basis - kein Overlay, keine RGBA-Konvertierung
+    draw = ImageDraw.Draw(img, "RGBA")
+    draw_particles(draw, palette, rng=random.Random(seed))
+    # Balken, Linien und Text deckend zeichnen (wie vorher auf dem RGB-Bild, ohne Alpha-Blending)
     draw = ImageDraw.Draw(img)
 
     # ── TOP BAR (Der dicke Balken oben - Linksbündig bei 80) ──
@@ -107,14 +156,14 @@ def create_base_background(palette_index: int, source_text: str, output_path: st
     draw_glow_line(draw, palette, 1700)
 
     # Tag & Quelle
-    tag_font = ImageFont.truetype(FONT_BOLD, 42)
+    tag_font = load_font(FONT_BOLD, 42)
     tag_text = "AI Fails & Glitches • Join the Chaos"
     tbbox = draw.textbbox((0, 0), tag_text, font=tag_font)
     tx = (W - (tbbox[2] - tbbox[0])) // 2
     draw.text((tx, 1740), tag_text, font=tag_font, fill=palette["sub"])
 
     if source_text:
-        src_font = ImageFont.truetype(FONT_REGULAR, 32)
+        src_font = load_font(FONT_REGULAR, 32)
         sbbox = draw.textbbox((0, 0), source_text, font=src_font)
         sx = (W - (sbbox[2] - sbbox[0])) // 2
         draw.text((sx, 1830), source_text, font=src_font, fill=(150, 150, 150))
@@ -130,14 +179,7 @@ def create_text_layer(text: str, palette_index: int, output_path: str, font_size
     img = Image.new("RGBA", (W, H), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
 
-    fact_font = ImageFont.truetype(FONT_BOLD, font_size)
-    max_text_w = W - 240
-    lines = wrap_text(text, fact_font, max_text_w, draw)
-
-    while len(lines) > 8 and font_size > 48:
-        font_size -= 4
-        fact_font = ImageFont.truetype(FONT_BOLD, font_size)
-        lines = wrap_text(text, fact_font, max_text_w, draw)
+    fact_font, font_size, lines = fit_text(text, draw, font_size)
 
     line_height = font_size + 20
     total_text_h = len(lines) * line_height
@@ -159,25 +201,21 @@ def create_text_layer(text: str, palette_index: int, output_path: str, font_size
 
 
 def create_fact_image(fact_text: str, source_text: str,
-                      output_path: str, palette_index: int = None):
+                      output_path: str, palette_index: int = None, seed: int = None):
     """
-    Klassische Funktion (bleibt unverändert für Kompatibilität).
+    Klassische Funktion (bleibt kompatibel). seed bestimmt Partikel und - ohne
+    palette_index - die Palette; gleicher Seed -> gleiches Bild.
     """
+    rng = random.Random(seed)
     if palette_index is None:
-        palette_index = random.randint(0, len(PALETTES) - 1)
+        palette_index = rng.randint(0, len(PALETTES) - 1)
     palette = PALETTES[palette_index % len(PALETTES)]
 
-    img = Image.new("RGB", (W, H), palette["bg"])
-    draw = draw_gradient_bg(img, palette)
+    img = gradient_background(palette_index)
 
-    # Particles layer
-    overlay = Image.new("RGBA", (W, H), (0, 0, 0, 0))
-    odraw = ImageDraw.Draw(overlay)
-    draw_particles(odraw, palette)
-    img.paste(Image.new("RGB", (W, H)), mask=overlay.split()[3])
-    img = img.convert("RGBA")
-    img.alpha_composite(overlay)
-    img = img.convert("RGB")
+    # Particles (direkt auf die Basis geblendet)
+    draw = ImageDraw.Draw(img, "RGBA")
+    draw_particles(draw, palette, rng=rng)
 
     draw = ImageDraw.Draw(img)
 
@@ -190,17 +228,8 @@ def create_fact_image(fact_text: str, source_text: str,
     draw_glow_line(draw, palette, 260)
 
     # ── MAIN FACT TEXT ──
-    fact_font_size = 72
-    fact_font = ImageFont.truetype(FONT_BOLD, fact_font_size)
-
-    max_text_w = W - 240  # 120px margin each side
-    lines = wrap_text(fact_text, fact_font, max_text_w, draw)
-
     # If too many lines, reduce font size
-    while len(lines) > 8 and fact_font_size > 48:
-        fact_font_size -= 4
-        fact_font = ImageFont.truetype(FONT_BOLD, fact_font_size)
-        lines = wrap_text(fact_text, fact_font, max_text_w, draw)
+    fact_font, fact_font_size, lines = fit_text(fact_text, draw)
 
     line_height = fact_font_size + 20
     total_text_h = len(lines) * line_height
@@ -221,7 +250,7 @@ def create_fact_image(fact_text: str, source_text: str,
     draw_glow_line(draw, palette, 1700)
 
     # ── CHANNEL TAG ──
-    tag_font = ImageFont.truetype(FONT_BOLD, 42)
+    tag_font = load_font(FONT_BOLD, 42)
     tag_text = "AI Fails & Glitches • Join the Chaos"
     tbbox = draw.textbbox((0, 0), tag_text, font=tag_font)
     tx = (W - (tbbox[2] - tbbox[0])) // 2
@@ -229,7 +258,7 @@ def create_fact_image(fact_text: str, source_text: str,
 
     # ── SOURCE ──
     if source_text:
-        src_font = ImageFont.truetype(FONT_REGULAR, 32)
+        src_font = load_font(FONT_REGULAR, 32)
         sbbox = draw.textbbox((0, 0), source_text, font=src_font)
         sx = (W - (sbbox[2] - sbbox[0])) // 2
         draw.text((sx, 1830), source_text, font=src_font,
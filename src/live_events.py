@@ -0,0 +1,249 @@
+"""
+live_events.py
+Live-Daten für das Web-Dashboard:
+- Tail/Delta-Reader für die bot.log (Kosten unabhängig von der Dateigröße)
+- Lauf-Status (Pipeline-Stufe + Render-Fortschritt) als kleine JSON-Datei
+- In-Process Event-Bus + File-Watcher, der daraus Server-Sent Events macht
+
+Der Bot läuft in einem eigenen Prozess, deshalb geht alles über Dateien:
+bot.py schreibt Status + Log, der Watcher im Web-Prozess verteilt die Änderungen.
+Status und State gibt es pro Kanal (run_status.json liegt neben der state.json
+des Kanal-Profils); Status- und State-Events tragen den Kanal.
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+from datetime import datetime
+
+import channels
+import state_store
+from structured_log import LOG_FILE, format_line
+
+STATUS_FILENAME = "run_status.json"
+
+LOG_TAIL_LINES = 50
+LOG_MAX_DELTA_BYTES = 64 * 1024
+
+# Wie oft der Watcher die Dateien per stat() prüft (nur solange jemand zuschaut)
+WATCH_INTERVAL = 0.5
+# Langsame Clients verlieren lieber Events, als den Watcher zu blockieren
+SUBSCRIBER_QUEUE_SIZE = 500
+
+
+# ── Log-Reader ────────────────────────────────────────────────
+def _readable(raw: bytes) -> str:
+    """bot.log enthält JSON-Lines - fürs Dashboard als lesbare Zeilen."""
+    text = raw.decode("utf-8", errors="replace")
+    return "\n".join(format_line(line) for line in text.split("\n"))
+
+
+def tail_log(path=LOG_FILE, lines=LOG_TAIL_LINES, block_size=8192):
+    """
+    Liest die letzten N Zeilen, indem vom Dateiende rückwärts gesucht wird.
+    Kosten hängen nur von N ab, nicht von der Größe der bot.log.
+    Gibt (text, end_offset) zurück.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        pos = end
+        data = b""
+        # +1, weil die Datei normalerweise mit einem Zeilenumbruch endet
+        while pos > 0 and data.count(b"\n") <= lines:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    tail = b"\n".join(data.split(b"\n")[-(lines + 1):])
+    return _readable(tail), end
+
+
+def read_log_after(path=LOG_FILE, offset=0, max_bytes=LOG_MAX_DELTA_BYTES):
+    """
+    Gibt nur die seit `offset` neu geschriebenen, vollständigen Zeilen zurück.
+    Wurde die Datei inzwischen rotiert (kürzer als der Offset, oder der Offset liegt
+    nicht mehr hinter einem Zeilenumbruch), wird der Tail der neuen Datei geliefert.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        rotated = offset > size or offset < 0
+        if not rotated and offset > 0:
+            f.seek(offset - 1)
+            rotated = f.read(1) != b"\n"
+        if rotated:
+            text, end = tail_log(path)
+            return {"text": text, "start": 0, "next": end, "reset": True}
+        f.seek(offset)
+        chunk = f.read(min(max_bytes, size - offset))
+    # Nur bis zum letzten Zeilenumbruch liefern - halbe Zeilen kommen beim nächsten Poll
+    cut = chunk.rfind(b"\n") + 1
+    if cut == 0 and len(chunk) < max_bytes:
+        chunk = b""
+    elif cut:
+        chunk = chunk[:cut]
+    return {
+        "text": _readable(chunk) if chunk else "",
+        "start": offset,
+        "next": offset + len(chunk),
+        "reset": False,
+    }
+
+
+# ── Lauf-Status ───────────────────────────────────────────────
+def state_file(channel: str = None) -> str:
+    """state.json des Kanals (wie bot.py/state_store: aus dem Kanal-Profil)."""
+    return channels.get_channel(channel)["state_file"]
+
+
+def status_file(channel: str = None) -> str:
+    """run_status.json des Kanals - neben seiner state.json (Standard: /app/logs/run_status.json)."""
+    return os.path.join(os.path.dirname(state_file(channel)), STATUS_FILENAME)
+
+
+def _write_json_atomic(path, data):
+    real_path = os.path.realpath(path)
+    os.makedirs(os.path.dirname(real_path), exist_ok=True)
+    tmp_path = f"{real_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, real_path)
+
+
+def publish_status(stage: str, channel: str = None, **fields):
+    """
+    Meldet eine Pipeline-Stufe (z.B. 'fact', 'render', 'upload', 'done') des Kanals.
+    Wird in dessen run_status.json geschrieben, damit auch der Web-Prozess es sieht.
+    """
+    channel = channel or channels.DEFAULT_CHANNEL
+    status = {"stage": stage, "channel": channel, "updated": datetime.now().isoformat(timespec="seconds")}
+    status.update(fields)
+    try:
+        _write_json_atomic(status_file(channel), status)
+    except Exception:
+        pass  # Status ist nur Anzeige - darf den Bot nie abbrechen
+    bus.publish("status", status)
+
+
+def read_status(channel: str = None) -> dict:
+    channel = channel or channels.DEFAULT_CHANNEL
+    try:
+        with open(status_file(channel), "r") as f:
+            status = json.load(f)
+    except (OSError, ValueError):
+        status = {"stage": "idle"}
+    status.setdefault("channel", channel)
+    return status
+
+
+def read_state_summary(channel: str = None) -> dict:
+    channel = channel or channels.DEFAULT_CHANNEL
+    return {"channel": channel, "total_videos": state_store.load(state_file(channel))["total_videos"]}
+
+
+# ── Event-Bus ─────────────────────────────────────────────────
+class EventBus:
+    """Verteilt Events an alle offenen SSE-Verbindungen (eine Queue pro Client)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def subscribe(self) -> queue.Queue:
+        q = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def publish(self, event: str, data: dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait((event, data))
+            except queue.Full:
+                pass
+
+
+bus = EventBus()
+
+
+class FileWatcher(threading.Thread):
+    """
+    Beobachtet bot.log sowie run_status.json und state.json jedes Kanals per stat()
+    und veröffentlicht Änderungen auf dem Bus. Schläft, solange niemand verbunden ist.
+    """
+
+    def __init__(self, event_bus: EventBus):
+        super().__init__(daemon=True, name="live-events-watcher")
+        self.bus = event_bus
+        self.log_offset = None
+        self._mtimes = {}
+
+    def _changed(self, path) -> bool:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return False
+        if self._mtimes.get(path) == mtime:
+            return False
+        self._mtimes[path] = mtime
+        return True
+
+    def poll(self):
+        try:
+            if self.log_offset is None:
+                self.log_offset = os.path.getsize(LOG_FILE)
+            delta = read_log_after(LOG_FILE, self.log_offset)
+            while delta["text"] or delta["reset"]:
+                self.bus.publish("log", delta)
+                self.log_offset = delta["next"]
+                if delta["reset"]:
+                    break
+                delta = read_log_after(LOG_FILE, self.log_offset)
+        except OSError:
+            pass
+
+        try:
+            names = list(channels.load_channels())
+        except ValueError:
+            names = [channels.DEFAULT_CHANNEL]  # kaputte Kanal-Konfiguration: wenigstens der Standard-Kanal
+        for channel in names:
+            if self._changed(status_file(channel)):
+                self.bus.publish("status", read_status(channel))
+            if self._changed(state_file(channel)):
+                self.bus.publish("state", read_state_summary(channel))
+
+    def run(self):
+        while True:
+            if self.bus.has_subscribers():
+                self.poll()
+                time.sleep(WATCH_INTERVAL)
+            else:
+                # Beim nächsten Client wieder ab aktuellem Ende starten
+                self.log_offset = None
+                time.sleep(1.0)
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def ensure_watcher():
+    """Startet den File-Watcher beim ersten SSE-Client (einmal pro Prozess)."""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = FileWatcher(bus)
+            _watcher.start()
+    return _watcher
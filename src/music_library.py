@@ -0,0 +1,137 @@
+"""
+music_library.py
+Vorbereitete Hintergrundmusik für den Render (/data/music_library).
+
+Jede MP3 aus /app/assets wird einmal lautheitsnormalisiert (loudnorm, zwei
+Durchgänge) und als AAC mit derselben Abtastrate wie im Video kodiert. Dazu
+kommt eine gecachte Stille-Spur für den Fall ohne Musik. Der Render hängt die
+Spur dann nur per Stream-Copy an (-c:a copy, -t schneidet ab) - pro Video
+kostet Audio kein Encoding mehr.
+
+Der Dateiname enthält einen Schlüssel aus Quelldatei (Name, Größe, mtime) und
+Encoder-Einstellungen: eine geänderte MP3 oder neue Einstellungen ergeben
+automatisch eine neue Datei, veraltete räumt prepare_all() weg.
+"""
+
+import os
+import json
+import hashlib
+import subprocess
+
+LIBRARY_DIR = os.environ.get("MUSIC_LIBRARY_DIR", "/data/music_library")
+
+# 48 kHz: ein AAC-Frame (1024 Samples) ist 21,3 ms - der Schnitt per Stream-Copy
+# liegt damit höchstens einen Frame neben der Videolänge
+SAMPLE_RATE = 48000
+BITRATE = "192k"
+LOUDNORM = "I=-14:TP=-1.5:LRA=11"  # Shorts-Zielpegel
+# Länger als jedes Video (per -t gekürzt)
+SILENCE_SECONDS = 180
+
+SILENCE_NAME = "silence"
+
+
+def _library_path(name: str) -> str:
+    return os.path.join(os.path.realpath(LIBRARY_DIR), name)
+
+
+def _settings() -> str:
+    return f"{SAMPLE_RATE}|{BITRATE}|{LOUDNORM}"
+
+
+def _track_name(source: str) -> str:
+    st = os.stat(source)
+    key = hashlib.sha256(
+        f"{os.path.basename(source)}|{st.st_size}|{st.st_mtime_ns}|{_settings()}".encode("utf-8")
+    ).hexdigest()[:16]
+    return f"{os.path.splitext(os.path.basename(source))[0]}.{key}.m4a"
+
+
+def _silence_name() -> str:
+    key = hashlib.sha256(f"{SILENCE_SECONDS}|{_settings()}".encode("utf-8")).hexdigest()[:16]
+    return f"{SILENCE_NAME}.{key}.m4a"
+
+
+def _run_ffmpeg(args, target):
+    """Kodiert in eine Temp-Datei und benennt erst bei Erfolg um (parallele Worker sehen nie halbe Dateien)."""
+    root, ext = os.path.splitext(target)
+    tmp_target = f"{root}.tmp{os.getpid()}{ext}"
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        subprocess.run(["ffmpeg", "-y", "-loglevel", "error", *args, tmp_target],
+                       check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        os.replace(tmp_target, target)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"FFmpeg music encode failed: {e.stderr[-300:]}")
+    finally:
+        if os.path.exists(tmp_target):
+            os.remove(tmp_target)
+
+
+def _measure(source: str) -> dict:
+    """Erster loudnorm-Durchgang: gemessene Werte für die lineare Normalisierung."""
+    proc = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-nostats", "-i", source,
+         "-af", f"loudnorm={LOUDNORM}:print_format=json", "-f", "null", "-"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    report = proc.stderr[proc.stderr.rfind("{"):proc.stderr.rfind("}") + 1]
+    try:
+        return json.loads(report)
+    except ValueError:
+        raise RuntimeError(f"FFmpeg loudness scan failed: {proc.stderr[-300:]}")
+
+
+def track(source: str) -> str:
+    """Normalisierte AAC-Fassung einer MP3 (beim ersten Aufruf kodiert, danach nur ein stat())."""
+    target = _library_path(_track_name(source))
+    if os.path.exists(target):
+        return target
+    m = _measure(source)
+    loudnorm = (f"loudnorm={LOUDNORM}:measured_I={m['input_i']}:measured_TP={m['input_tp']}"
+                f":measured_LRA={m['input_lra']}:measured_thresh={m['input_thresh']}"
+                f":offset={m['target_offset']}:linear=true")
+    _run_ffmpeg([
+        "-i", source, "-map", "0:a:0", "-af", loudnorm,
+        "-ar", str(SAMPLE_RATE), "-ac", "2", "-c:a", "aac", "-b:a", BITRATE,
+    ], target)
+    return target
+
+
+def silence() -> str:
+    """Gecachte Stille-Spur (ersetzt anullsrc + Encoding pro Video)."""
+    target = _library_path(_silence_name())
+    if not os.path.exists(target):
+        _run_ffmpeg([
+            "-f", "lavfi", "-i", f"anullsrc=channel_layout=stereo:sample_rate={SAMPLE_RATE}",
+            "-t", str(SILENCE_SECONDS), "-c:a", "aac", "-b:a", BITRATE,
+        ], target)
+    return target
+
+
+def audio_for(music_file) -> str:
+    """Spur für den Render: die vorbereitete Musik oder Stille."""
+    return track(music_file) if music_file else silence()
+
+
+def prepare_all(sources: list) -> list:
+    """Kodiert alle fehlenden Spuren vorab und löscht veraltete Fassungen. Gibt die Spuren zurück."""
+    tracks = [silence()] + [track(source) for source in sources]
+    keep = {os.path.basename(path) for path in tracks}
+    library_dir = os.path.realpath(LIBRARY_DIR)
+    for name in os.listdir(library_dir):
+        if name.endswith(".m4a") and name not in keep and ".tmp" not in name:
+            try:
+                os.remove(os.path.join(library_dir, name))
+            except OSError:
+                pass
+    return tracks
+
+
+if __name__ == "__main__":
+    # python3 music_library.py [mp3 ...]  -> Bibliothek vorab füllen (Standard: alle MP3s aus /app/assets)
+    import sys
+    import glob
+    sources = sys.argv[1:] or sorted(glob.glob("/app/assets/*.mp3"))
+    for path in prepare_all(sources):
+        print(path)
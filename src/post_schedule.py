@@ -0,0 +1,91 @@
+"""
+post_schedule.py
+Parst den Posting-Plan aus POST_TIMES und berechnet die nächsten Termine.
+
+Format (UTC, kommagetrennt), optional mit Overrides pro Slot im Query-Stil:
+    POST_TIMES="11:15, 19:15?mode=three_parts&anim=pan&topic=AI translation errors"
+
+Erlaubte Overrides: mode, anim, topic, backend (Render-Backend, siehe bot.RENDER_BACKEND).
+Wird vom Scheduler und vom Dashboard ("Next Post") gemeinsam genutzt.
+"""
+
+import os
+import urllib.parse
+from datetime import datetime, timedelta
+
+SLOT_OVERRIDES = ("mode", "anim", "topic", "backend")
+DEFAULT_POST_TIMES = "11:00,19:00"
+
+
+def parse_slot(raw: str) -> dict:
+    """'19:15?mode=three_parts' -> {'key', 'time', 'hour', 'minute', 'overrides'}"""
+    time_part, _, query = raw.strip().partition("?")
+    hour_s, _, minute_s = time_part.strip().partition(":")
+    hour, minute = int(hour_s), int(minute_s or 0)
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Ungültige Uhrzeit im Plan: {raw!r}")
+
+    overrides = {}
+    for key, value in urllib.parse.parse_qsl(query):
+        if key not in SLOT_OVERRIDES:
+            raise ValueError(f"Unbekannter Override '{key}' in {raw!r} (erlaubt: {', '.join(SLOT_OVERRIDES)})")
+        overrides[key] = value
+
+    time_str = f"{hour:02d}:{minute:02d}"
+    return {
+        "key": raw.strip() if overrides else time_str,
+        "time": time_str,
+        "hour": hour,
+        "minute": minute,
+        "overrides": overrides,
+    }
+
+
+def parse_schedule(raw: str) -> list:
+    """Kompletten Plan parsen, nach Uhrzeit sortiert."""
+    slots = [parse_slot(part) for part in raw.split(",") if part.strip()]
+    return sorted(slots, key=lambda s: (s["hour"], s["minute"]))
+
+
+def schedule_from_env(default=None) -> list:
+    """
+    POST_TIMES aus der Umgebung. Fallback: die alten Variablen
+    POST_HOUR_UTC / POST_MINUTE_UTC, sonst `default`.
+    """
+    raw = os.environ.get("POST_TIMES")
+    if not raw:
+        if default is not None:
+            raw = default
+        else:
+            h = int(os.environ.get("POST_HOUR_UTC", "10"))
+            m = int(os.environ.get("POST_MINUTE_UTC", "0"))
+            raw = f"{h:02d}:{m:02d}"
+    return parse_schedule(raw)
+
+
+def next_fire(slot: dict, after: datetime) -> datetime:
+    """Nächster Termin des Slots strikt nach `after` (naive UTC)."""
+    candidate = after.replace(hour=slot["hour"], minute=slot["minute"], second=0, microsecond=0)
+    if candidate <= after:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def previous_fires(slot: dict, since: datetime, until: datetime) -> list:
+    """Alle Termine des Slots mit since < t <= until (für Catch-up nach Neustart)."""
+    fires = []
+    t = next_fire(slot, since)
+    while t <= until:
+        fires.append(t)
+        t += timedelta(days=1)
+    return fires
+
+
+def next_post(slots: list, now: datetime = None):
+    """(slot, fire_time) des nächsten Posts über alle Slots - oder (None, None)."""
+    now = now or datetime.utcnow()
+    upcoming = [(next_fire(slot, now), slot) for slot in slots]
+    if not upcoming:
+        return None, None
+    fire_at, slot = min(upcoming, key=lambda item: item[0])
+    return slot, fire_at
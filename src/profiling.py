@@ -0,0 +1,173 @@
+"""
+profiling.py
+Opt-in Profiling pro Pipeline-Stufe (PROFILE_RUNS=1 oder Dashboard-Schalter).
+
+Jede Stufe läuft unter cProfile und zwischen zwei tracemalloc-Snapshots.
+Pro Lauf entsteht /app/logs/profiles/<run>/ mit:
+- profile.collapsed : Collapsed Stacks (Stufe;Modul:Funktion;... µs) für flamegraph.pl / speedscope
+- allocations.txt   : Top-Allokationen pro Stufe (Zuwachs nach Zeile)
+- summary.json      : Dauer und Speicher-Peak pro Stufe
+- <stufe>.pstats    : Rohdaten für pstats / snakeviz
+
+bot.py importiert dieses Modul nur, wenn Profiling an ist - sonst bleibt es
+bei einem nullcontext() pro Stufe.
+"""
+
+import os
+import json
+import time
+import pstats
+import cProfile
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_DIR = "/app/logs/profiles"
+TOP_ALLOCATIONS = 15
+# Alte Reports aufräumen - Profile sind groß und nur für die letzten Läufe interessant
+KEEP_RUNS = 20
+TRACEMALLOC_FRAMES = 1
+# Pfade mit weniger Zeit werden im Collapsed-Report weggelassen (hält den Graphen klein)
+MIN_PATH_SECONDS = 1e-5
+
+
+def _frame_name(func) -> str:
+    filename, line, name = func
+    if filename == "~":
+        frame = name.strip("<>")  # Builtins wie <built-in method posix.stat>
+    else:
+        frame = f"{os.path.splitext(os.path.basename(filename))[0]}:{name}:{line}"
+    # Leerzeichen trennen im Collapsed-Format Stack und Zähler
+    return frame.replace(" ", "_").replace(";", ":")
+
+
+def _snapshot():
+    """tracemalloc-Snapshot ohne die Allokationen des Profilers selbst."""
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ))
+
+
+def collapsed_stacks(profile: cProfile.Profile, root: str) -> list:
+    """
+    cProfile kennt nur Aufrufer->Aufgerufener-Kanten, keine vollständigen Stacks.
+    Die Stacks werden deshalb aus dem Aufrufgraphen rekonstruiert: die Zeit einer
+    Kante wird anteilig auf die Kinder des Aufgerufenen verteilt (Näherung wie bei
+    gprof2dot/flameprof). Rekursion wird pro Pfad abgeschnitten.
+    """
+    stats = pstats.Stats(profile).stats
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge))
+
+    lines = {}
+
+    def walk(func, path, tt, ct, scale):
+        # tt/ct: Zeit der Kante in diese Funktion, scale: Anteil dieses Pfads daran
+        if ct * scale < MIN_PATH_SECONDS:
+            return
+        own_us = int(tt * scale * 1_000_000)
+        if own_us:
+            key = ";".join(path)
+            lines[key] = lines.get(key, 0) + own_us
+        child_scale = scale * min(1.0, ct / (stats[func][3] or ct or 1.0))
+        for child, (_, _, child_tt, child_ct) in callees.get(func, []):
+            name = _frame_name(child)
+            if name in path:
+                continue
+            walk(child, path + [name], child_tt, child_ct, child_scale)
+
+    roots = [func for func, (_, _, _, _, callers) in stats.items() if not callers]
+    for func in roots:
+        _, _, tt, ct, _ = stats[func]
+        walk(func, [root, _frame_name(func)], tt, ct, 1.0)
+    return [f"{stack} {us}" for stack, us in sorted(lines.items())]
+
+
+class RunProfiler:
+    """Profiler für einen Pipeline-Lauf; stage(name) als Context-Manager pro Stufe."""
+
+    def __init__(self, run_id: str, profile_dir: str = PROFILE_DIR):
+        self.run_id = run_id
+        self.out_dir = os.path.join(os.path.realpath(profile_dir), run_id)
+        self.stages = []
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    @contextmanager
+    def stage(self, name: str):
+        tracemalloc.reset_peak()
+        before = _snapshot()
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            wall = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            after = _snapshot()
+            self.stages.append({
+                "name": name,
+                "wall_s": wall,
+                "peak_traced_bytes": peak,
+                "profile": profile,
+                "allocations": after.compare_to(before, "lineno")[:TOP_ALLOCATIONS],
+            })
+
+    def finish(self) -> str:
+        """Schreibt die Reports und gibt das Verzeichnis zurück."""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        os.makedirs(self.out_dir, exist_ok=True)
+
+        collapsed, alloc_lines, summary = [], [], []
+        for index, stage in enumerate(self.stages):
+            label = stage["name"] if [s["name"] for s in self.stages].count(stage["name"]) == 1 \
+                else f"{stage['name']}#{index}"
+            stage["profile"].dump_stats(os.path.join(self.out_dir, f"{label}.pstats"))
+            collapsed.extend(collapsed_stacks(stage["profile"], label))
+
+            alloc_lines.append(f"== {label} ({stage['wall_s']:.2f}s, peak {stage['peak_traced_bytes'] / 1024 / 1024:.1f} MB)")
+            for diff in stage["allocations"]:
+                frame = diff.traceback[0]
+                alloc_lines.append(
+                    f"  {diff.size_diff / 1024:+10.1f} KB  {diff.count_diff:+7d} blocks  "
+                    f"{os.path.basename(frame.filename)}:{frame.lineno}"
+                )
+            alloc_lines.append("")
+            summary.append({"stage": label, "wall_s": round(stage["wall_s"], 4),
+                            "peak_traced_bytes": stage["peak_traced_bytes"]})
+
+        with open(os.path.join(self.out_dir, "profile.collapsed"), "w") as f:
+            f.write("\n".join(collapsed) + "\n")
+        with open(os.path.join(self.out_dir, "allocations.txt"), "w") as f:
+            f.write("\n".join(alloc_lines))
+        with open(os.path.join(self.out_dir, "summary.json"), "w") as f:
+            json.dump({"run": self.run_id, "created": datetime.now().isoformat(timespec="seconds"),
+                       "stages": summary}, f, indent=2)
+
+        prune_runs(os.path.dirname(self.out_dir))
+        return self.out_dir
+
+
+def list_runs(profile_dir: str = PROFILE_DIR, limit: int = None) -> list:
+    """Run-IDs mit Report, neueste zuerst."""
+    try:
+        runs = [name for name in os.listdir(profile_dir)
+                if os.path.isfile(os.path.join(profile_dir, name, "summary.json"))]
+    except OSError:
+        return []
+    runs.sort(key=lambda name: os.path.getmtime(os.path.join(profile_dir, name)), reverse=True)
+    return runs[:limit] if limit else runs
+
+
+def prune_runs(profile_dir: str = PROFILE_DIR, keep: int = KEEP_RUNS):
+    import shutil
+    for name in list_runs(profile_dir)[keep:]:
+        shutil.rmtree(os.path.join(profile_dir, name), ignore_errors=True)
@@ -0,0 +1,198 @@
+"""
+quota.py
+Quota-Ledger + Rate-Limiter für YouTube und OpenAI.
+
+- Tagesbudget pro Provider und Konto, persistent in /app/logs/quota.json
+  (überlebt Neustarts, wird von allen Worker-Prozessen geteilt)
+- Reset nach dem Zeitplan des Providers: YouTube um Mitternacht Pacific Time,
+  das eigene OpenAI-Tagesbudget um Mitternacht UTC
+- Token-Bucket für OpenAI-Requests pro Minute (ebenfalls im Ledger, damit
+  parallele Worker sich das Limit teilen)
+
+bot.py prüft vor dem Rendern mit can_afford(), ob das Restbudget reicht;
+upload_short() und _call_gpt() buchen mit charge() ab.
+"""
+
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import state_store
+
+try:
+    from zoneinfo import ZoneInfo
+    _PACIFIC = ZoneInfo("America/Los_Angeles")
+except Exception:  # kein tzdata im Image -> PST; Reset wird eher zu spät als zu früh angenommen
+    _PACIFIC = timezone(timedelta(hours=-8))
+
+LEDGER_FILE = "/app/logs/quota.json"
+DEFAULT_ACCOUNT = "default"
+
+# videos.insert kostet laut YouTube Data API ~1600 Units
+YOUTUBE_UPLOAD_COST = 1600
+# generate_fact macht einen Chat-Call pro Video (Fakt + Metadaten nach Schema)
+OPENAI_CALLS_PER_RUN = 1
+
+PROVIDERS = {
+    "youtube": {
+        "label": "YouTube",
+        "unit": "Units",
+        "daily": int(os.environ.get("YOUTUBE_DAILY_QUOTA", "10000")),
+        "tz": _PACIFIC,
+        "per_minute": None,
+    },
+    "openai": {
+        "label": "OpenAI",
+        "unit": "Requests",
+        "daily": int(os.environ.get("OPENAI_DAILY_REQUESTS", "500")),
+        "tz": timezone.utc,
+        "per_minute": float(os.environ.get("OPENAI_RPM", "20")),
+    },
+}
+
+# Wie lange _call_gpt höchstens auf einen freien Token wartet
+RATE_WAIT_MAX_SECONDS = 120
+
+
+class QuotaExceeded(RuntimeError):
+    """Das Tagesbudget reicht nicht - reset_at sagt, wann es wieder geht (UTC)."""
+
+    def __init__(self, provider: str, needed: int, remaining: int, reset_at: datetime):
+        self.provider = provider
+        self.reset_at = reset_at
+        super().__init__(
+            f"{PROVIDERS[provider]['label']} quota exhausted: need {needed}, "
+            f"{remaining} left until {reset_at.strftime('%Y-%m-%d %H:%M')} UTC"
+        )
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def period_key(provider: str, now: datetime = None) -> str:
+    """Aktueller Quota-Tag im Kalender des Providers."""
+    now = now or _utcnow()
+    return now.astimezone(PROVIDERS[provider]["tz"]).date().isoformat()
+
+
+def next_reset(provider: str, now: datetime = None) -> datetime:
+    """Nächster Reset als naive UTC-Zeit (wie im Scheduler)."""
+    now = now or _utcnow()
+    local = now.astimezone(PROVIDERS[provider]["tz"])
+    midnight = (local + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _ledger():
+    """Liest den Ledger unter exklusivem Lock und schreibt ihn atomar zurück."""
+    return state_store.locked_json(LEDGER_FILE, dict)
+
+
+def _used(ledger: dict, provider: str, account: str, now: datetime) -> int:
+    """Verbrauch heute, nur lesend (ein Eintrag von gestern zählt als 0 - ohne ihn umzuschreiben)."""
+    entry = ledger.get(f"{provider}:{account}", {})
+    return entry.get("used", 0) if entry.get("day") == period_key(provider, now) else 0
+
+
+def _entry(ledger: dict, provider: str, account: str, now: datetime) -> dict:
+    """Eintrag für (Provider, Konto) - beim Tageswechsel zurückgesetzt."""
+    entry = ledger.setdefault(f"{provider}:{account}", {})
+    day = period_key(provider, now)
+    if entry.get("day") != day:
+        entry.update(day=day, used=0)
+    return entry
+
+
+def remaining(provider: str, account: str = DEFAULT_ACCOUNT) -> int:
+    """Lesend, ohne Lock (der Ledger wird nur atomar ersetzt) - blockiert keinen laufenden Bot."""
+    used = _used(state_store.read_json(LEDGER_FILE), provider, account, _utcnow())
+    return max(0, PROVIDERS[provider]["daily"] - used)
+
+
+def can_afford(provider: str, units: int, account: str = DEFAULT_ACCOUNT) -> bool:
+    return remaining(provider, account) >= units
+
+
+def check(provider: str, units: int, account: str = DEFAULT_ACCOUNT):
+    """Wie can_afford(), wirft aber QuotaExceeded (für die Vorprüfung vor dem Rendern)."""
+    left = remaining(provider, account)
+    if left < units:
+        raise QuotaExceeded(provider, units, left, next_reset(provider))
+
+
+def charge(provider: str, units: int, account: str = DEFAULT_ACCOUNT):
+    """Bucht Units ab, bevor der API-Call passiert - oder wirft QuotaExceeded."""
+    now = _utcnow()
+    with _ledger() as ledger:
+        entry = _entry(ledger, provider, account, now)
+        left = PROVIDERS[provider]["daily"] - entry["used"]
+        if left < units:
+            raise QuotaExceeded(provider, units, max(0, left), next_reset(provider, now))
+        entry["used"] += units
+
+
+def refund(provider: str, units: int, account: str = DEFAULT_ACCOUNT):
+    """Gibt Units zurück, wenn der Call gar nicht beim Provider ankam."""
+    now = _utcnow()
+    with _ledger() as ledger:
+        entry = _entry(ledger, provider, account, now)
+        entry["used"] = max(0, entry["used"] - units)
+
+
+def exhaust(provider: str, account: str = DEFAULT_ACCOUNT):
+    """Der Provider meldet 'quota exceeded' - Rest des Tages als verbraucht markieren."""
+    now = _utcnow()
+    with _ledger() as ledger:
+        entry = _entry(ledger, provider, account, now)
+        entry["used"] = max(entry["used"], PROVIDERS[provider]["daily"])
+
+
+def acquire(provider: str, account: str = DEFAULT_ACCOUNT, max_wait: float = RATE_WAIT_MAX_SECONDS):
+    """
+    Token-Bucket: nimmt einen Token (Kapazität = Limit pro Minute) oder wartet,
+    bis einer nachgefüllt ist. Ohne Minutenlimit sofort zurück.
+    """
+    per_minute = PROVIDERS[provider]["per_minute"]
+    if not per_minute:
+        return
+    rate = per_minute / 60.0
+    deadline = time.monotonic() + max_wait
+    while True:
+        with _ledger() as ledger:
+            bucket = ledger.setdefault(f"{provider}:{account}:bucket", {})
+            now = time.time()
+            tokens = min(per_minute, bucket.get("tokens", per_minute) + (now - bucket.get("at", now)) * rate)
+            if tokens >= 1:
+                bucket.update(tokens=tokens - 1, at=now)
+                return
+            wait = (1 - tokens) / rate
+        if time.monotonic() + wait > deadline:
+            raise RuntimeError(f"{PROVIDERS[provider]['label']} rate limit: no request slot within {max_wait:.0f}s")
+        time.sleep(wait)
+
+
+def summary() -> list:
+    """Restbudget aller bekannten (Provider, Konto)-Paare fürs Dashboard (lesend, ohne Lock)."""
+    now = _utcnow()
+    ledger = state_store.read_json(LEDGER_FILE)
+    accounts = {tuple(key.split(":", 1)) for key in ledger if key.count(":") == 1}
+    for provider in PROVIDERS:
+        accounts.add((provider, DEFAULT_ACCOUNT))
+    rows = []
+    for provider, account in sorted(accounts):
+        if provider not in PROVIDERS:
+            continue
+        used = _used(ledger, provider, account, now)
+        daily = PROVIDERS[provider]["daily"]
+        rows.append({
+            "provider": provider,
+            "label": PROVIDERS[provider]["label"],
+            "unit": PROVIDERS[provider]["unit"],
+            "account": account,
+            "used": used,
+            "daily": daily,
+            "remaining": max(0, daily - used),
+            "reset_at": next_reset(provider, now).isoformat(timespec="minutes"),
+        })
+    return rows
@@ -0,0 +1,151 @@
+"""
+render_cache.py
+Inhaltsadressierter Cache fertiger Videos (/data/render_cache).
+
+Rendering ist deterministisch: alle Zufallsentscheidungen (Partikel, Musik)
+kommen aus einem Seed, der aus dem Fakt abgeleitet wird. Gleiche Eingaben
+(Texte, Palette, Mode, Anim, Dauer, Seed, Musik-Auswahl, Backend, Encoder-Threads, Code-Version) ergeben
+also dasselbe MP4 - ein erneuter Trigger oder Testlauf mit identischem Inhalt
+bekommt die Datei sofort aus dem Cache statt neu zu rendern.
+
+Pro Eintrag: <key>.mp4 + <key><suffix>.png (Vorschaubild fürs Archiv) + Nebenausgaben
+des Renders (<key>_preview.mp4, Plattform-Variante). Fehlt eine angefragte
+Nebenausgabe, zählt der Eintrag als Miss - sonst gäbe es sie für Treffer nie.
+Ältere Einträge fliegen raus, sobald RENDER_CACHE_MAX_MB überschritten ist.
+"""
+
+import os
+import glob
+import json
+import shutil
+import hashlib
+from functools import lru_cache
+
+CACHE_DIR = os.environ.get("RENDER_CACHE_DIR", "/data/render_cache")
+ENABLED = os.environ.get("RENDER_CACHE", "1") == "1"
+MAX_BYTES = int(float(os.environ.get("RENDER_CACHE_MAX_MB", "1024")) * 1024 * 1024)
+
+# Dateien, deren Inhalt das Ergebnis bestimmt (Layouts, Filtergraph, Encoder-Einstellungen)
+CODE_FILES = ("generate_image.py", "bot.py", "music_library.py", "frame_compositor.py")
+
+
+def content_seed(fact_data: dict) -> int:
+    """Seed aus dem Fakt: gleicher Inhalt -> gleiche Partikel, gleiche Musik."""
+    digest = hashlib.sha256(fact_data["fact"].encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big")
+
+
+@lru_cache(maxsize=1)
+def code_version() -> str:
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in CODE_FILES:
+        with open(os.path.join(src_dir, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def cache_key(fact_data: dict, palette_index: int, mode: str, anim: str, duration: float,
+              seed: int, music: list, backend: str = "ffmpeg", segments: int = 1, threads: int = None) -> str:
+    """
+    threads: -threads des Renders. x264 teilt die Frames je nach Thread-Zahl anders auf,
+    das Video ist also nur bei gleicher Zahl identisch. Ohne Angabe wählt ffmpeg selbst
+    (nach Kernzahl) - dann zählt die Kernzahl.
+    """
+    payload = {
+        "fact": fact_data["fact"],
+        "source": fact_data.get("source", ""),
+        "parts": fact_data.get("parts"),
+        "words": fact_data.get("words"),
+        "palette": palette_index,
+        "mode": mode,
+        "anim": anim,
+        "duration": float(duration),
+        "seed": seed,
+        "music": music,
+        "backend": backend,
+        "segments": segments,
+        "threads": threads or f"auto:{os.cpu_count()}",
+        "code": code_version(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(os.path.realpath(CACHE_DIR), key)
+
+
+def _place(src: str, dst: str):
+    """Hardlink, wenn möglich (gleiches Volume), sonst kopieren - atomar über eine Temp-Datei."""
+    tmp_path = f"{dst}.{os.getpid()}.tmp"
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        shutil.copy2(src, tmp_path)
+    os.replace(tmp_path, dst)
+
+
+def fetch(key: str, video_path: str, base_path: str, extras: dict = None):
+    """
+    Cache-Treffer nach video_path (+ Vorschaubild nach base_path<suffix>) legen.
+    extras: {Cache-Suffix: Zielpfad} der Nebenausgaben, die der Lauf braucht.
+    Gibt den Pfad des Vorschaubilds zurück (oder "" ohne Bild), None bei Cache-Miss.
+    """
+    if not ENABLED:
+        return None
+    entry = _entry_path(key)
+    extras = extras or {}
+    if not all(os.path.exists(entry + suffix) for suffix in [".mp4", *extras]):
+        return None
+    for suffix, target in extras.items():
+        _place(entry + suffix, target)
+    images = glob.glob(glob.escape(entry) + "_*.png")
+    _place(entry + ".mp4", video_path)
+    os.utime(entry + ".mp4")  # LRU: Treffer bleiben länger
+    if not images:
+        return ""
+    image_path = base_path + images[0][len(entry):]
+    _place(images[0], image_path)
+    return image_path
+
+
+def store(key: str, video_path: str, base_path: str, image_path: str = None, extras: dict = None):
+    """extras: {Cache-Suffix: Pfad} der Nebenausgaben (wie bei fetch)."""
+    if not ENABLED:
+        return
+    entry = _entry_path(key)
+    os.makedirs(os.path.dirname(entry), exist_ok=True)
+    if image_path and image_path.startswith(base_path):
+        _place(image_path, entry + image_path[len(base_path):])
+    for suffix, path in (extras or {}).items():
+        _place(path, entry + suffix)
+    _place(video_path, entry + ".mp4")  # Video zuletzt: erst dann zählt der Eintrag
+    prune()
+
+
+def prune(max_bytes: int = MAX_BYTES):
+    """Älteste Einträge (nach letzter Nutzung) löschen, bis der Cache unter max_bytes liegt."""
+    cache_dir = os.path.realpath(CACHE_DIR)
+    try:
+        # Einträge sind <key>.mp4; <key>_*.mp4 sind ihre Nebenausgaben
+        videos = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+                  if name.endswith(".mp4") and "_" not in name]
+    except OSError:
+        return
+    entries = []
+    for video in videos:
+        files = [video] + glob.glob(glob.escape(video[:-4]) + "_*")
+        try:
+            entries.append((os.path.getmtime(video), sum(os.path.getsize(f) for f in files), files))
+        except OSError:
+            continue
+    total = sum(size for _, size, _ in entries)
+    for _, size, files in sorted(entries):
+        if total <= max_bytes:
+            break
+        for path in files:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        total -= size
@@ -0,0 +1,242 @@
+"""
+runs.py
+Checkpoints pro Pipeline-Lauf unter /data/runs/<run_id>/.
+
+manifest.json hält fest, welche Stufen fertig sind und wo ihre Artefakte liegen:
+  fact    -> fact.json (Ergebnis von GPT)
+  render  -> <run_id>.mp4 + Bilder (erstes Bild = Archiv-Vorschau)
+  upload  -> video_id
+  archive -> fertig
+Scheitert ein Lauf (Netzwerk, Quota, Token), bleiben die Artefakte liegen. Der
+nächste Versuch (Scheduler oder Dashboard) setzt bei der ersten offenen Stufe an -
+ohne neuen GPT-Aufruf und ohne neuen Render. Fertige Läufe löschen ihre Artefakte
+sofort; gc() räumt alte Manifeste und aufgegebene Läufe weg.
+"""
+
+import os
+import json
+import shutil
+from datetime import datetime, timedelta
+
+import state_store
+
+RUNS_DIR = os.environ.get("RUNS_DIR", "/data/runs")
+MANIFEST = "manifest.json"
+FACT_FILE = "fact.json"
+
+STAGES = ("fact", "render", "upload", "archive")
+
+# Automatische Versuche pro Lauf (der Dashboard-Knopf darf darüber hinaus)
+MAX_ATTEMPTS = int(os.environ.get("RUN_MAX_ATTEMPTS", "3"))
+# Ältere abgebrochene Läufe werden nicht mehr fortgesetzt, sondern aufgeräumt
+RESUME_MAX_HOURS = float(os.environ.get("RUN_RESUME_MAX_HOURS", "48"))
+# So lange bleiben Manifeste (ohne Artefakte) für die Fehlersuche liegen
+KEEP_DAYS = 7
+
+
+def run_dir(run_id: str) -> str:
+    return os.path.join(os.path.realpath(RUNS_DIR), os.path.basename(run_id))
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _pid_alive(pid) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except (OSError, TypeError):
+        return False
+
+
+def save(manifest: dict):
+    """Schreibt das Manifest atomar (ein Absturz mitten im Schreiben lässt das alte stehen)."""
+    manifest["updated"] = _now()
+    path = os.path.join(run_dir(manifest["run_id"]), MANIFEST)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load(run_id: str):
+    try:
+        with open(os.path.join(run_dir(run_id), MANIFEST), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def create(run_id: str, channel: str, params: dict) -> dict:
+    os.makedirs(run_dir(run_id), exist_ok=True)
+    manifest = {
+        "run_id": run_id,
+        "channel": channel,
+        "params": params,
+        "status": "running",
+        "pid": os.getpid(),
+        "attempts": 1,
+        "created": _now(),
+        "stages": {},
+        "error": None,
+    }
+    save(manifest)
+    return manifest
+
+
+def claim(run_id: str, automatic: bool = True):
+    """
+    Übernimmt einen abgebrochenen Lauf atomar für diesen Prozess (status "running" + pid
+    unter dem Lock von state_store). Prüfen und Setzen passieren in einem Schritt - starten
+    Dashboard und Scheduler denselben Lauf gleichzeitig, bekommt nur einer das Manifest,
+    der andere None.
+    """
+    path = os.path.join(run_dir(run_id), MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with state_store.locked_json(path) as manifest:
+        if not manifest or not is_resumable(manifest, automatic):
+            return None
+        manifest["status"], manifest["pid"] = "running", os.getpid()
+        manifest["updated"] = _now()
+    return manifest
+
+
+def release(manifest: dict):
+    """Gibt einen übernommenen Lauf wieder frei, ohne dass ein Versuch gezählt wird."""
+    manifest["status"], manifest["pid"] = "failed", None
+    save(manifest)
+
+
+def begin_attempt(manifest: dict):
+    manifest["attempts"] = manifest.get("attempts", 0) + 1
+    manifest["status"], manifest["pid"], manifest["error"] = "running", os.getpid(), None
+    save(manifest)
+
+
+def is_done(manifest: dict, stage: str) -> bool:
+    return stage in manifest["stages"]
+
+
+def next_stage(manifest: dict):
+    return next((stage for stage in STAGES if not is_done(manifest, stage)), None)
+
+
+def complete(manifest: dict, stage: str, **data):
+    manifest["stages"][stage] = dict(data, done_at=_now())
+    save(manifest)
+
+
+def fail(manifest: dict, error: str):
+    manifest["status"], manifest["error"], manifest["pid"] = "failed", error, None
+    manifest["failed_stage"] = next_stage(manifest)
+    save(manifest)
+
+
+def finish(manifest: dict):
+    """Lauf erfolgreich: Artefakte löschen, Manifest bleibt bis zum nächsten gc()."""
+    manifest["status"], manifest["pid"] = "done", None
+    _drop_artifacts(manifest["run_id"])
+    save(manifest)
+
+
+def _drop_artifacts(run_id: str):
+    folder = run_dir(run_id)
+    for name in os.listdir(folder):
+        if name not in (MANIFEST, MANIFEST + ".lock"):
+            path = os.path.join(folder, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+
+
+# ── Artefakte ─────────────────────────────────────────────────
+def artifact_path(manifest: dict, name: str) -> str:
+    return os.path.join(run_dir(manifest["run_id"]), name)
+
+
+def save_fact(manifest: dict, fact_data: dict):
+    with open(artifact_path(manifest, FACT_FILE), "w", encoding="utf-8") as f:
+        json.dump(fact_data, f, indent=2, ensure_ascii=False)
+    complete(manifest, "fact", file=FACT_FILE)
+
+
+def load_fact(manifest: dict) -> dict:
+    with open(artifact_path(manifest, FACT_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def render_outputs(manifest: dict):
+    """(Video, [Bilder]) aus einer fertigen Render-Stufe - None, wenn Dateien fehlen."""
+    stage = manifest["stages"].get("render")
+    if not stage:
+        return None
+    video = artifact_path(manifest, stage["video"])
+    assets = [artifact_path(manifest, name) for name in stage.get("assets", [])]
+    if not all(os.path.exists(path) for path in [video] + assets):
+        return None
+    return video, assets
+
+
+# ── Auswahl & Aufräumen ───────────────────────────────────────
+def list_runs(limit: int = None) -> list:
+    """Alle Manifeste, neueste zuerst."""
+    try:
+        names = os.listdir(os.path.realpath(RUNS_DIR))
+    except OSError:
+        return []
+    manifests = [m for m in (load(name) for name in names) if m]
+    manifests.sort(key=lambda m: m.get("created", ""), reverse=True)
+    return manifests[:limit] if limit else manifests
+
+
+def is_resumable(manifest: dict, automatic: bool = True) -> bool:
+    """
+    Abgebrochen und jung genug. "running" zählt als abgebrochen, wenn der Prozess
+    nicht mehr lebt (Worker-Absturz, Redeploy).
+    """
+    if manifest.get("status") in ("done", "abandoned"):
+        return False
+    if manifest.get("status") == "running" and _pid_alive(manifest.get("pid")):
+        return False
+    if automatic and manifest.get("attempts", 0) >= MAX_ATTEMPTS:
+        return False
+    created = datetime.fromisoformat(manifest["created"])
+    return datetime.now() - created < timedelta(hours=RESUME_MAX_HOURS)
+
+
+def claim_latest(channel: str, skip_youtube: bool = False):
+    """
+    Jüngster abgebrochener Lauf des Kanals, den der Scheduler fortsetzen darf (Testläufe nur
+    für Testläufe) - per claim() übernommen. Hat ihn schon jemand, kommt der nächste dran.
+    """
+    for m in list_runs():
+        if (m.get("channel") == channel and is_resumable(m)
+                and m["params"].get("skip_youtube", False) == skip_youtube):
+            claimed = claim(m["run_id"])
+            if claimed:
+                return claimed
+    return None
+
+
+def gc(keep_days: float = KEEP_DAYS) -> int:
+    """
+    Löscht Manifeste älter als keep_days und die Artefakte aufgegebener Läufe
+    (älter als RESUME_MAX_HOURS). Gibt die Zahl gelöschter Läufe zurück.
+    """
+    now = datetime.now()
+    removed = 0
+    for manifest in list_runs():
+        if manifest.get("status") == "running" and _pid_alive(manifest.get("pid")):
+            continue
+        age = now - datetime.fromisoformat(manifest["created"])
+        if age > timedelta(days=keep_days):
+            shutil.rmtree(run_dir(manifest["run_id"]), ignore_errors=True)
+            removed += 1
+        elif manifest.get("status") not in ("done", "abandoned") and age > timedelta(hours=RESUME_MAX_HOURS):
+            _drop_artifacts(manifest["run_id"])
+            manifest["status"] = "abandoned"
+            save(manifest)
+    return removed
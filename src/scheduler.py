@@ -1,72 +1,222 @@
 """
 scheduler.py
 Keeps the bot running on Railway 24/7.
-Posts videos at scheduled UTC times.
+Posts videos at scheduled UTC times (deadline-based: sleeps until the next slot,
+catches up on slots missed during restarts).
 
 Also runs a web dashboard for manual triggers.
+
+Every channel profile (see channels.py) has its own slots; runs of different
+channels can overlap and share the pool of RENDER_WORKERS warm workers.
 """
 
 import time
+import json
+import heapq
 import subprocess
 import sys
 import os
-from datetime import datetime
-from http.server import HTTPServer
-from threading import Thread
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer
+from threading import Thread, Lock, Timer
 
 # Import the web interface
 sys.path.insert(0, os.path.dirname(__file__))
-try:
-    from web_interface import DashboardHandler
-    WEB_AVAILABLE = True
-except Exception as e:
-    print(f"⚠️  Web interface import failed: {e}")
-    print("   Continuing with basic health check only")
-    WEB_AVAILABLE = False
-    from http.server import BaseHTTPRequestHandler
-    
-    class DashboardHandler(BaseHTTPRequestHandler):
-        def do_GET(self):
-            self.send_response(200)
-            self.send_header("Content-type", "text/plain")
-            self.end_headers()
-            self.wfile.write(b"FactDrop Bot Running - Web UI unavailable")
-        def log_message(self, format, *args):
-            pass
-
-# NEU: Liest eine Liste von Zeiten aus Railway (z.B. "11:15, 19:15")
-# Falls die neue Variable nicht da ist, nutzt er die alten Variablen als Backup
-POST_TIMES_RAW = os.environ.get("POST_TIMES")
-
-if POST_TIMES_RAW:
-    POST_TIMES = [t.strip() for t in POST_TIMES_RAW.split(",")]
-else:
-    # Backup: Nutzt die alten Variablen, falls POST_TIMES nicht gesetzt ist
-    h = int(os.environ.get("POST_HOUR_UTC", "10"))
-    m = int(os.environ.get("POST_MINUTE_UTC", "0"))
-    POST_TIMES = [f"{h:02d}:{m:02d}"]
-
-def should_run_now() -> bool:
-    """Prüft, ob die aktuelle UTC-Zeit in der Liste der geplanten Zeiten steht."""
-    now = datetime.utcnow()
-    current_time = now.strftime("%H:%M")
-    return current_time in POST_TIMES
+from post_schedule import SLOT_OVERRIDES, next_fire, previous_fires
+import channels
+import worker
+WEB_AVAILABLE = False
+
+
+def load_dashboard_handler():
+    """
+    Importiert das Web-Dashboard erst beim Start des Servers (große HTML-Konstanten,
+    Templates, Archiv-Index). Fällt bei Fehlern auf einen reinen Health-Check zurück.
+    """
+    global WEB_AVAILABLE
+    try:
+        from web_interface import DashboardHandler
+        WEB_AVAILABLE = True
+        return DashboardHandler
+    except Exception as e:
+        print(f"⚠️  Web interface import failed: {e}")
+        print("   Continuing with basic health check only")
+        WEB_AVAILABLE = False
+        from http.server import BaseHTTPRequestHandler
+        
+        class DashboardHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header("Content-type", "text/plain")
+                self.end_headers()
+                self.wfile.write(b"FactDrop Bot Running - Web UI unavailable")
+            def log_message(self, format, *args):
+                pass
+        return DashboardHandler
+
+# Posting-Plan aus Railway (z.B. "11:15, 19:15?mode=three_parts&anim=pan")
+# Falls POST_TIMES nicht gesetzt ist, gelten die alten Variablen POST_HOUR_UTC/POST_MINUTE_UTC.
+# Weitere Kanäle bringen ihren eigenen Plan im Profil mit (CHANNELS / CHANNELS_FILE).
+CHANNELS = channels.load_channels()
+SCHEDULES = {name: channels.schedule_for(profile) for name, profile in CHANNELS.items()}
+SCHEDULE = [(name, slot) for name, slots in SCHEDULES.items() for slot in slots]
+POST_TIMES = [slot["key"] for slot in SCHEDULES[channels.DEFAULT_CHANNEL]]
+
+# Letzte ausgeführte Termine pro Slot - überlebt Neustarts/Redeploys
+MARKS_FILE = "/app/logs/scheduler.json"
+_marks_lock = Lock()
+
+# Ein Lauf pro Kanal gleichzeitig - verschiedene Kanäle dürfen parallel rendern
+_channel_locks = {name: Lock() for name in CHANNELS}
+
+# Was passiert mit Terminen, die verpasst wurden, während der Container down war?
+#   skip   -> nichts nachholen
+#   latest -> nur den jüngsten verpassten Termin nachholen (Standard)
+#   all    -> jeden verpassten Termin nachholen
+MISSED_SLOT_POLICY = os.environ.get("MISSED_SLOT_POLICY", "latest").lower()
+CATCHUP_MAX_HOURS = float(os.environ.get("CATCHUP_MAX_HOURS", "6"))
+
+# Reicht die API-Quota nicht, Slot nach dem Reset nachholen statt ihn fallen zu lassen
+QUOTA_DEFER = os.environ.get("QUOTA_DEFER", "1") == "1"
+
+# Abgebrochener Lauf -> nach so vielen Minuten automatisch fortsetzen (0 = erst beim nächsten Slot)
+RUN_RETRY_MINUTES = float(os.environ.get("RUN_RETRY_MINUTES", "10"))
+
+# Spätestens so oft aufwachen, um einen Heartbeat zu loggen
+HEARTBEAT_SECONDS = 600
+
+
+def load_marks() -> dict:
+    try:
+        with open(MARKS_FILE, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_marks(marks: dict):
+    try:
+        real_path = os.path.realpath(MARKS_FILE)
+        os.makedirs(os.path.dirname(real_path), exist_ok=True)
+        tmp_path = real_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(marks, f, indent=2)
+        os.replace(tmp_path, real_path)
+    except Exception as e:
+        print(f"⚠️  Could not save scheduler marks: {e}")
+
+
+def mark_key(channel: str, slot: dict) -> str:
+    """Schlüssel in scheduler.json - der Standard-Kanal behält die alten Keys."""
+    if channel == channels.DEFAULT_CHANNEL:
+        return slot["key"]
+    return f"{channel}:{slot['key']}"
 
-def run_bot():
+
+def missed_runs(slots: list, marks: dict, now: datetime) -> list:
+    """
+    Verpasste Termine seit dem letzten Lauf (gemäß MISSED_SLOT_POLICY), älteste zuerst.
+    slots: Liste von (Kanal, Slot); Ergebnis: Liste von (Zeit, Kanal, Slot).
+    "latest" gilt pro Kanal.
+    """
+    if MISSED_SLOT_POLICY == "skip":
+        return []
+    window_start = now - timedelta(hours=CATCHUP_MAX_HOURS)
+    missed = {}
+    for channel, slot in slots:
+        last = marks.get(mark_key(channel, slot))
+        if not last:
+            continue  # Slot ist neu - nichts nachzuholen
+        since = max(datetime.fromisoformat(last), window_start)
+        missed.setdefault(channel, []).extend(
+            (fire_at, channel, slot) for fire_at in previous_fires(slot, since, now)
+        )
+    result = []
+    for runs in missed.values():
+        runs.sort(key=lambda item: item[0])
+        result.extend(runs[-1:] if MISSED_SLOT_POLICY == "latest" else runs)
+    result.sort(key=lambda item: item[0])
+    return result
+
+
+def run_bot(overrides: dict = None, channel: str = channels.DEFAULT_CHANNEL, resume: str = "latest"):
+    overrides = overrides or {}
     print(f"\n{'='*50}")
-    print(f"[{datetime.utcnow().isoformat()}] 🤖 Triggering scheduled bot run...")
+    print(f"[{datetime.utcnow().isoformat()}] 🤖 Triggering scheduled bot run ({channel})...")
+    if overrides:
+        print(f"   Overrides: {overrides}")
     print(f"{'='*50}\n")
 
-    # capture_output=False bleibt, damit die Logs direkt in Railway erscheinen
-    result = subprocess.run(
-        [sys.executable, "/app/src/bot.py"],
-        capture_output=False 
-    )
+    kwargs = {key: overrides[key] for key in SLOT_OVERRIDES if overrides.get(key)}
+    if kwargs.get("topic") == "random":
+        kwargs["topic"] = None
+    kwargs["channel"] = channel
+    kwargs["from_queue"] = True  # vorproduzierte Videos aus bulk.py haben Vorrang
+    # abgebrochene Läufe aus ihrem Checkpoint fortsetzen (runs.py): "latest" des Kanals oder eine Run-ID
+    kwargs["resume"] = resume
+
+    result = None
+    try:
+        # Warmer Worker: keine neuen Imports, Fonts & Caches sind schon geladen
+        result = worker.run_pipeline(**kwargs)
+        returncode = 0 if result["success"] else 1
+    except Exception as e:
+        print(f"⚠️  Pipeline worker unavailable ({e}) - falling back to subprocess")
+        cmd = [sys.executable, "/app/src/bot.py", "--from-queue"] + [
+            f"--{k}={v}" for k, v in kwargs.items() if v and k != "from_queue"
+        ]
+        # capture_output=False bleibt, damit die Logs direkt in Railway erscheinen
+        returncode = subprocess.run(cmd, capture_output=False).returncode
+
+    if returncode != 0:
+        print(f"⚠️  Bot exited with code {returncode} ({channel})")
+    else:
+        print(f"✅ Bot run complete ({channel})")
+    return result
+
 
-    if result.returncode != 0:
-        print(f"⚠️  Bot exited with code {result.returncode}")
+def fire(channel: str, slot: dict, fire_at: datetime, marks: dict, resume: str = "latest", retry: bool = False):
+    """
+    Führt einen Slot aus und merkt sich den Termin (vor dem Lauf - kein Doppel-Post nach Crash).
+    resume: "latest" für planmäßige Termine; Wiederholungen setzen genau den abgebrochenen Lauf fort.
+    retry : Wiederholung per Timer - die Marke bleibt beim geplanten Termin, sonst rechnet der
+            Catch-up nach einem Neustart ab der Wiederholungszeit statt ab dem echten Slot.
+    """
+    if not retry:
+        with _marks_lock:
+            marks[mark_key(channel, slot)] = fire_at.isoformat()
+            save_marks(marks)
+    with _channel_locks[channel]:
+        result = run_bot(slot["overrides"], channel, resume)
+
+    result = result or {}
+    # Die Wiederholung hängt an diesem Lauf: wurde er inzwischen (z.B. per /resume im Dashboard)
+    # fertig, lehnt bot.run ihn ab, statt einen neuen, ungeplanten Lauf zu starten
+    if result.get("resumable") and result.get("run_id"):
+        resume = result["run_id"]
+    # Quota erschöpft -> nach dem Provider-Reset erneut versuchen
+    deferred_until = result.get("deferred_until")
+    if deferred_until and QUOTA_DEFER:
+        retry_at = datetime.fromisoformat(deferred_until) + timedelta(minutes=1)
+        reason = "Quota"
+    # Sonst abgebrochen (Netzwerk, Token ...) -> bald erneut, ab dem Checkpoint des Laufs
+    elif not deferred_until and result.get("resumable") and RUN_RETRY_MINUTES > 0:
+        retry_at = datetime.utcnow() + timedelta(minutes=RUN_RETRY_MINUTES)
+        reason = f"Fortsetzen von {result['run_id']}"
     else:
-        print(f"✅ Bot run complete")
+        return
+    delay = max(0.0, (retry_at - datetime.utcnow()).total_seconds())
+    print(f"⏸️  [{channel}] {slot['key']} verschoben auf {retry_at.strftime('%Y-%m-%d %H:%M')} UTC ({reason})")
+    timer = Timer(delay, fire, args=(channel, slot, retry_at, marks, resume), kwargs={"retry": True})
+    timer.daemon = True
+    timer.start()
+
+
+def fire_async(channel: str, slot: dict, fire_at: datetime, marks: dict):
+    """Startet den Lauf im Hintergrund, damit andere Kanäle nicht warten müssen."""
+    Thread(target=fire, args=(channel, slot, fire_at, marks),
+           name=f"run-{channel}", daemon=True).start()
+
 
 def main():
     print("\n" + "="*60)
@@ -76,7 +226,7 @@ def main():
     port = int(os.environ.get("PORT", "8080"))
     
     try:
-        server = HTTPServer(("0.0.0.0", port), DashboardHandler)
+        server = ThreadingHTTPServer(("0.0.0.0", port), load_dashboard_handler())
         web_thread = Thread(target=server.serve_forever, daemon=True)
         web_thread.start()
         
@@ -88,32 +238,61 @@ def main():
     except Exception as e:
         print(f"  ⚠️  Failed to start web server: {e}")
         print("  Continuing without web interface...")
+
+    # Pipeline-Worker beim Boot vorwärmen, damit der erste Post keine Startkosten hat
+    try:
+        worker.get_pool().start()
+    except Exception as e:
+        print(f"  ⚠️  Pipeline worker failed to start: {e} (runs will use subprocess)")
     
     print(f"\n{'='*60}")
     print(f"  📅 FactDrop Scheduler Started")
-    print(f"  ⏰ Geplante Zeiten (UTC): {', '.join(POST_TIMES)}")
-    print(f"  ⏱️  Checking every 30 seconds...")
+    for name, slots in SCHEDULES.items():
+        print(f"  ⏰ [{name}] Geplante Zeiten (UTC): {', '.join(slot['key'] for slot in slots) or '-'}")
+    print(f"  🧵 Render-Worker: {worker.RENDER_WORKERS}")
+    print(f"  ⏪ Verpasste Termine: {MISSED_SLOT_POLICY} (max. {CATCHUP_MAX_HOURS:g}h zurück)")
     print(f"{'='*60}\n")
 
-    # Wir tracken jetzt die letzte Minute, um Doppel-Posts in derselben Minute zu verhindern
-    last_run_minute = None
-    check_count = 0
+    marks = load_marks()
+    now = datetime.utcnow()
 
-    while True:
-        check_count += 1
-        now = datetime.utcnow()
-        current_minute = now.strftime("%Y-%m-%d %H:%M")
-        
-        # Log heartbeat every 10 minutes (alle 20 Checks à 30s)
-        if check_count % 20 == 0:
-            print(f"💓 Heartbeat [{now.strftime('%H:%M:%S UTC')}] - Aktiv & Geplant: {', '.join(POST_TIMES)}", flush=True)
+    # Neue Slots ab jetzt tracken, damit ein späterer Neustart weiß, was verpasst wurde
+    with _marks_lock:
+        for channel, slot in SCHEDULE:
+            marks.setdefault(mark_key(channel, slot), now.isoformat())
+        save_marks(marks)
+
+    # 1. Catch-up: Termine nachholen, die während eines Neustarts verpasst wurden
+    #    (pro Kanal der Reihe nach - der Kanal-Lock hält die Reihenfolge ein)
+    for fire_at, channel, slot in missed_runs(SCHEDULE, marks, now):
+        print(f"⏪ [{channel}] Hole verpassten Termin nach: {slot['key']} ({fire_at.isoformat()} UTC)")
+        fire_async(channel, slot, fire_at, marks)
+
+    # 2. Heap der nächsten Termine: (Zeit, Reihenfolge, Kanal, Slot)
+    heap = []
+    start = datetime.utcnow()
+    for order, (channel, slot) in enumerate(SCHEDULE):
+        heapq.heappush(heap, (next_fire(slot, start), order, channel, slot))
 
-        if should_run_now():
-            if last_run_minute != current_minute:
-                last_run_minute = current_minute
-                run_bot()
+    while heap:
+        fire_at, order, channel, slot = heap[0]
+        remaining = (fire_at - datetime.utcnow()).total_seconds()
 
-        time.sleep(30)
+        if remaining > 0:
+            # Bis zum Termin schlafen - höchstens bis zum nächsten Heartbeat
+            time.sleep(min(remaining, HEARTBEAT_SECONDS))
+            if remaining > HEARTBEAT_SECONDS:
+                print(f"💓 Heartbeat [{datetime.utcnow().strftime('%H:%M:%S UTC')}] - Nächster Post: [{channel}] {slot['key']} um {fire_at.strftime('%Y-%m-%d %H:%M')} UTC", flush=True)
+            continue
+
+        heapq.heappop(heap)
+        fire_async(channel, slot, fire_at, marks)
+        # Nächster Termin strikt nach diesem - läuft ein Post zu lange, wartet der nächste am Kanal-Lock
+        heapq.heappush(heap, (next_fire(slot, fire_at), order, channel, slot))
+
+    print("⚠️  Kein Termin geplant (POST_TIMES leer) - Scheduler wartet nur noch auf das Dashboard.")
+    while True:
+        time.sleep(HEARTBEAT_SECONDS)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,133 @@
+"""
+state_store.py
+Gemeinsamer Zugriff auf state.json (Bot, Dashboard, Archiv, Bulk) und kleine
+JSON-Dateien mit Lock (Quota-Ledger, Upload-Queue).
+
+- Schreiben nur in einer Transaktion: exklusiver flock, frisch lesen, ändern,
+  atomar per os.replace() zurückschreiben. Ein Dashboard-Speichern, das einen
+  laufenden Bot kreuzt, geht so nicht mehr verloren - jeder schreibt nur die
+  Felder, die er ändert.
+- Lesen ohne Lock (die Datei wird nur atomar ersetzt) und aus einem Cache, der
+  über (mtime, Größe, Inode) validiert wird: ein stat() statt open+json pro Abruf.
+- Standardwerte stehen nur hier (DEFAULTS).
+"""
+
+import os
+import json
+import fcntl
+import threading
+from contextlib import contextmanager
+
+STATE_FILE = "/app/logs/state.json"
+
+DEFAULTS = {
+    "last_palette": 0,
+    "total_videos": 0,
+    "video_mode": "classic",
+    "anim_type": "zoom",
+    "video_topic": "random",
+    "duration": 13.0,
+    "drive_enabled": True,
+    "profiling": False,
+}
+
+_cache_lock = threading.Lock()
+_cache = {}  # echter Pfad -> (Stempel, Daten)
+
+
+def _real(path) -> str:
+    return os.path.realpath(str(path))
+
+
+def _stamp(real_path: str):
+    st = os.stat(real_path)
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def read_json(path, default=dict):
+    """Gecachter Lesezugriff auf eine atomar geschriebene JSON-Datei. Gibt eine Kopie zurück."""
+    real_path = _real(path)
+    try:
+        stamp = _stamp(real_path)
+    except OSError:
+        return default()
+    with _cache_lock:
+        cached = _cache.get(real_path)
+    if cached and cached[0] == stamp:
+        return json.loads(cached[1])
+    try:
+        with open(real_path, "r") as f:
+            raw = f.read()
+        data = json.loads(raw)
+    except (OSError, ValueError):
+        return default()
+    with _cache_lock:
+        _cache[real_path] = (stamp, raw)
+    return data
+
+
+def write_json_atomic(path, data, indent=2):
+    """Schreibt in eine Temp-Datei daneben und ersetzt per os.replace() - Leser sehen nie eine halbe Datei."""
+    real_path = _real(path)
+    tmp_path = f"{real_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=indent)
+        os.replace(tmp_path, real_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@contextmanager
+def locked_json(path, default=dict):
+    """
+    Liest die Datei unter exklusivem Lock (<datei>.lock) und schreibt sie atomar zurück,
+    falls sich der Inhalt geändert hat.
+    """
+    real_path = _real(path)
+    os.makedirs(os.path.dirname(real_path), exist_ok=True)
+    with open(real_path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(real_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = default()
+        before = json.dumps(data, sort_keys=True)
+        yield data
+        if json.dumps(data, sort_keys=True) != before:
+            write_json_atomic(real_path, data)
+
+
+# ── state.json ────────────────────────────────────────────────
+def load(state_file=STATE_FILE) -> dict:
+    """State mit allen Standardwerten (Kopie - Änderungen daran werden nicht gespeichert)."""
+    state = dict(DEFAULTS)
+    state.update(read_json(state_file))
+    return state
+
+
+@contextmanager
+def transaction(state_file=STATE_FILE):
+    """Read-modify-write unter Lock: `with transaction() as state: state["x"] += 1`."""
+    with locked_json(state_file) as stored:
+        state = dict(DEFAULTS)
+        state.update(stored)
+        yield state
+        stored.update(state)
+
+
+def update(state_file=STATE_FILE, **changes) -> dict:
+    """Setzt einzelne Felder (alle anderen bleiben, wie sie gerade auf der Platte stehen)."""
+    with transaction(state_file) as state:
+        state.update(changes)
+    return state
+
+
+def record_video(state_file=STATE_FILE, **fields) -> dict:
+    """Zählt ein fertiges Video (total_videos + 1) und setzt fields - in einer Transaktion."""
+    with transaction(state_file) as state:
+        state["total_videos"] = state.get("total_videos", 0) + 1
+        state.update(fields)
+    return state
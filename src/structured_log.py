@@ -0,0 +1,208 @@
+"""
+structured_log.py
+Gemeinsame Log-Schicht für Bot, Worker und Archiv.
+
+- bot.log enthält JSON-Lines: {"ts", "level", "msg", "channel", "run_id", "stage", ...}
+- stdout bekommt weiterhin lesbare Zeilen ([Zeit] [LEVEL] Nachricht) für Railway
+- Die Datei bleibt offen (O_APPEND, mehrere Prozesse dürfen anhängen); Records werden
+  gepuffert und an Stufengrenzen, bei WARN/ERROR, nach FLUSH_RECORDS Zeilen oder
+  spätestens FLUSH_SECONDS nach der ersten gepufferten Zeile geschrieben (Timer-Thread,
+  auch wenn danach nichts mehr geloggt wird, z.B. während eines langen Renders) -
+  ein write() pro Flush statt open/realpath pro Zeile
+- Ab LOG_MAX_MB wird rotiert: bot.log -> bot.log.1.gz ... bot.log.<LOG_BACKUPS>.gz
+
+Leser (live_events) wandeln die Records mit format_line() wieder in lesbaren Text.
+"""
+
+import os
+import sys
+import json
+import time
+import fcntl
+import atexit
+import threading
+from datetime import datetime
+
+LOG_FILE = "/app/logs/bot.log"
+MAX_BYTES = int(float(os.environ.get("LOG_MAX_MB", "5")) * 1024 * 1024)
+BACKUPS = int(os.environ.get("LOG_BACKUPS", "5"))
+
+FLUSH_RECORDS = 50
+FLUSH_SECONDS = 2.0
+# Sofort schreiben - Fehler sollen auch bei einem Absturz direkt danach in der Datei stehen
+FLUSH_LEVELS = ("WARN", "ERROR")
+
+# Kanal, der in der lesbaren Zeile nicht extra angezeigt wird (wie channels.DEFAULT_CHANNEL)
+DEFAULT_CHANNEL = "default"
+
+
+def format_record(record: dict) -> str:
+    """JSON-Record -> lesbare Zeile (gleiches Format wie vor den JSON-Lines)."""
+    timestamp = record.get("ts", "")[:19].replace("T", " ")
+    message = record.get("msg", "")
+    channel = record.get("channel")
+    if channel and channel != DEFAULT_CHANNEL:
+        message = f"[{channel}] {message}"
+    return f"[{timestamp}] [{record.get('level', 'INFO')}] {message}"
+
+
+def format_line(line: str) -> str:
+    """Eine Zeile aus bot.log lesbar machen (alte Klartext-Zeilen bleiben, wie sie sind)."""
+    if not line.startswith("{"):
+        return line
+    try:
+        return format_record(json.loads(line))
+    except ValueError:
+        return line
+
+
+class StructuredLog:
+    def __init__(self, path: str = LOG_FILE):
+        self.path = path
+        self.context = {}
+        self._lock = threading.RLock()
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._fd = None
+        self._inode = None
+        self._real_path = None
+        self._timer = None
+
+    # ── Kontext ───────────────────────────────────────────────
+    def bind(self, **fields):
+        """Felder für alle folgenden Records setzen (None entfernt ein Feld)."""
+        with self._lock:
+            for key, value in fields.items():
+                if value is None:
+                    self.context.pop(key, None)
+                else:
+                    self.context[key] = value
+
+    def set_stage(self, stage: str):
+        """Stufengrenze: Puffer der alten Stufe schreiben, dann die neue Stufe binden."""
+        with self._lock:
+            if self.context.get("stage") == stage:
+                return
+            self.flush()
+            self.bind(stage=stage)
+
+    # ── Schreiben ─────────────────────────────────────────────
+    def log(self, message: str, level: str = "INFO", **fields) -> str:
+        record = {"ts": datetime.now().isoformat(timespec="milliseconds"), "level": level, "msg": message}
+        with self._lock:
+            record.update(self.context)
+            record.update(fields)
+            line = format_record(record)
+            print(line)
+            self._buffer.append(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            if (level in FLUSH_LEVELS or len(self._buffer) >= FLUSH_RECORDS
+                    or time.monotonic() - self._last_flush >= FLUSH_SECONDS):
+                self.flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(FLUSH_SECONDS, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return line
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()  # Aufruf aus dem Timer selbst: cancel() ist dann wirkungslos
+                self._timer = None
+            self._last_flush = time.monotonic()
+            if not self._buffer:
+                return
+            data = "".join(self._buffer).encode("utf-8")
+            self._buffer.clear()
+            try:
+                self._ensure_open()
+                os.write(self._fd, data)
+                if os.fstat(self._fd).st_size >= MAX_BYTES:
+                    self._rotate()
+            except OSError:
+                self._close()  # Log ist nur Beiwerk - darf den Bot nie abbrechen
+
+    # ── Datei ─────────────────────────────────────────────────
+    def _ensure_open(self):
+        """Öffnet die Datei neu, wenn ein anderer Prozess rotiert hat (anderer Inode unter dem Pfad)."""
+        if self._fd is not None:
+            try:
+                if os.stat(self._real_path).st_ino == self._inode:
+                    return
+            except FileNotFoundError:
+                pass
+            self._close()
+        # Symlink auflösen (Railway-Volume), einmal pro Öffnen statt pro Zeile
+        real_dir = os.path.realpath(os.path.dirname(self.path))
+        os.makedirs(real_dir, exist_ok=True)
+        self._real_path = os.path.join(real_dir, os.path.basename(self.path))
+        self._fd = os.open(self._real_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._inode = os.fstat(self._fd).st_ino
+
+    def _close(self):
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+        self._fd = self._inode = None
+
+    def _rotate(self):
+        """bot.log -> bot.log.1.gz, ältere Archive eins weiter. Unter Lock, nur ein Prozess rotiert."""
+        import gzip
+        import shutil
+        with open(self._real_path + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                st = os.stat(self._real_path)
+            except FileNotFoundError:
+                return
+            if st.st_ino != self._inode or st.st_size < MAX_BYTES:
+                return  # schon von einem anderen Prozess erledigt
+            for index in range(BACKUPS - 1, 0, -1):
+                older = f"{self._real_path}.{index}.gz"
+                if os.path.exists(older):
+                    os.replace(older, f"{self._real_path}.{index + 1}.gz")
+            rotated = f"{self._real_path}.1"
+            os.replace(self._real_path, rotated)
+            self._close()
+            with open(rotated, "rb") as src, gzip.open(rotated + ".gz.tmp", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(rotated + ".gz.tmp", rotated + ".gz")
+            os.remove(rotated)
+
+
+_default = StructuredLog()
+atexit.register(_default.flush)
+
+
+def log(message: str, level: str = "INFO", **fields) -> str:
+    return _default.log(message, level, **fields)
+
+
+def bind(**fields):
+    _default.bind(**fields)
+
+
+def context() -> dict:
+    """Aktuell gebundene Felder (Kopie)."""
+    with _default._lock:
+        return dict(_default.context)
+
+
+def set_stage(stage: str):
+    _default.set_stage(stage)
+
+
+def flush():
+    _default.flush()
+
+
+if __name__ == "__main__":
+    # python3 structured_log.py [datei]  -> lesbare Ausgabe (auch für .gz-Archive)
+    import gzip
+    path = sys.argv[1] if len(sys.argv) > 1 else LOG_FILE
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+        for raw in f:
+            print(format_line(raw.rstrip("\n")))
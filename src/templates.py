@@ -0,0 +1,45 @@
+"""
+templates.py
+Mini-Template-Layer für das Web-Dashboard.
+Die HTML-Konstanten werden einmal beim Import in Text-Stücke und Platzhalter
+zerlegt; render() setzt die Werte ein und macht genau ein "".join().
+Kein Ersatz für Jinja - nur '{name}' Platzhalter, keine Logik.
+"""
+
+import re
+
+_PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+
+class Template:
+    """
+    Vorkompiliertes Template.
+    fields: Namen, die als Platzhalter gelten. Alles andere in geschweiften
+            Klammern (CSS, JavaScript wie `${mode}`) bleibt unverändert.
+    """
+
+    def __init__(self, source: str, fields=None):
+        allowed = set(fields) if fields is not None else None
+        self._parts = []
+        self._slots = []
+        pos = 0
+        for match in _PLACEHOLDER.finditer(source):
+            name = match.group(1)
+            if allowed is not None and name not in allowed:
+                continue
+            self._parts.append(source[pos:match.start()])
+            self._slots.append((len(self._parts), name))
+            self._parts.append(None)
+            pos = match.end()
+        self._parts.append(source[pos:])
+        self.fields = frozenset(name for _, name in self._slots)
+
+        if allowed is not None and allowed - self.fields:
+            missing = ", ".join(sorted(allowed - self.fields))
+            raise ValueError(f"Template hat keine Platzhalter für: {missing}")
+
+    def render(self, **values) -> str:
+        parts = self._parts.copy()
+        for index, name in self._slots:
+            parts[index] = str(values[name])
+        return "".join(parts)
@@ -0,0 +1,109 @@
+"""
+thumbnails.py
+Kleine Vorschau-Dateien für das Archiv:
+- Poster: ein JPEG-Standbild (270px breit, ein paar KB)
+- Preview: stummer Low-Bitrate-Clip (540x960, 15 fps)
+
+Beide liegen neben dem Original im Archiv (<name>_poster.jpg / <name>_preview.mp4).
+Den Preview schreibt normalerweise schon der Render mit (zweiter Encoder im selben
+ffmpeg-Prozess); fehlt er (Cache-Treffer, alte Videos), wird er hier beim ersten
+Abruf nachgerendert. Das Poster entsteht beim Archivieren.
+Optional liegt daneben <name>_alt.mp4 (Render-Variante für andere Plattformen).
+"""
+
+import os
+import subprocess
+import threading
+
+POSTER_SUFFIX = "_poster.jpg"
+PREVIEW_SUFFIX = "_preview.mp4"
+ALT_SUFFIX = "_alt.mp4"
+DERIVED_SUFFIXES = (POSTER_SUFFIX, PREVIEW_SUFFIX, ALT_SUFFIX)
+
+POSTER_WIDTH = 270
+POSTER_SEEK_SECONDS = 1.0
+PREVIEW_SIZE = "540:960"
+PREVIEW_FPS = 15
+# Gilt für den Preview aus dem Render (bot.render_advanced_video) und den nachgerenderten
+PREVIEW_FILTER = f"scale={PREVIEW_SIZE},fps={PREVIEW_FPS}"
+PREVIEW_ENCODE = [
+    "-an", "-c:v", "libx264", "-preset", "veryfast", "-crf", "32",
+    "-maxrate", "500k", "-bufsize", "1000k",
+    "-pix_fmt", "yuv420p", "-movflags", "+faststart",
+]
+
+# Feste Menge Locks (Zieldatei -> hash % LOCK_STRIPES), damit parallele Requests nicht
+# doppelt rendern. Wächst nicht mit dem Archiv; zwei Dateien im selben Streifen warten nur aufeinander.
+LOCK_STRIPES = 32
+_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+
+def _lock_for(path):
+    return _locks[hash(path) % LOCK_STRIPES]
+
+
+def poster_path(video_path: str) -> str:
+    return os.path.splitext(video_path)[0] + POSTER_SUFFIX
+
+
+def preview_path(video_path: str) -> str:
+    return os.path.splitext(video_path)[0] + PREVIEW_SUFFIX
+
+
+def is_derived(filename: str) -> bool:
+    return filename.endswith(DERIVED_SUFFIXES)
+
+
+def source_for_derived(derived_path: str) -> str:
+    """Pfad des Original-Videos zu einem Poster/Preview."""
+    for suffix in DERIVED_SUFFIXES:
+        if derived_path.endswith(suffix):
+            return derived_path[:-len(suffix)] + ".mp4"
+    return derived_path
+
+
+def _is_fresh(target: str, source: str) -> bool:
+    try:
+        return os.path.getmtime(target) >= os.path.getmtime(source)
+    except OSError:
+        return False
+
+
+def _run_ffmpeg(args, target):
+    """Rendert in eine Temp-Datei und benennt erst bei Erfolg um (keine halben Dateien)."""
+    root, ext = os.path.splitext(target)
+    tmp_target = f"{root}.tmp{os.getpid()}{ext}"
+    try:
+        subprocess.run(["ffmpeg", "-y", "-loglevel", "error", *args, tmp_target],
+                       check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        os.replace(tmp_target, target)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"FFmpeg thumbnail failed: {e.stderr[-300:]}")
+    finally:
+        if os.path.exists(tmp_target):
+            os.remove(tmp_target)
+
+
+def ensure_poster(video_path: str) -> str:
+    """Erzeugt das Poster-JPEG, falls es fehlt oder älter als das Video ist."""
+    target = poster_path(video_path)
+    if _is_fresh(target, video_path):
+        return target
+    with _lock_for(target):
+        if not _is_fresh(target, video_path):
+            _run_ffmpeg([
+                "-ss", str(POSTER_SEEK_SECONDS), "-i", video_path,
+                "-frames:v", "1", "-vf", f"scale={POSTER_WIDTH}:-2", "-q:v", "5",
+            ], target)
+    return target
+
+
+def ensure_preview(video_path: str) -> str:
+    """Erzeugt den stummen Low-Bitrate Preview-Clip, falls er fehlt."""
+    target = preview_path(video_path)
+    if _is_fresh(target, video_path):
+        return target
+    with _lock_for(target):
+        if not _is_fresh(target, video_path):
+            _run_ffmpeg(["-i", video_path, "-vf", PREVIEW_FILTER, *PREVIEW_ENCODE], target)
+    return target
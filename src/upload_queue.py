@@ -0,0 +1,59 @@
+"""
+upload_queue.py
+Warteschlange fertiger, archivierter Videos pro Kanal (<archive_dir>/upload_queue.json).
+
+bulk.py füllt sie (rendern ohne Upload), der Scheduler leert sie: solange
+Einträge warten, lädt ein geplanter Slot das älteste Video hoch, statt ein
+neues zu generieren. Ein Eintrag wird erst nach erfolgreichem Upload entfernt.
+"""
+
+import os
+import uuid
+from datetime import datetime
+
+import state_store
+
+QUEUE_FILENAME = "upload_queue.json"
+ARCHIVE_DIR = "/data/archive"
+
+
+def _queue_file(archive_dir=None) -> str:
+    return os.path.join(os.path.realpath(archive_dir or ARCHIVE_DIR), QUEUE_FILENAME)
+
+
+def _locked_queue(archive_dir=None):
+    """Liest die Queue unter exklusivem Lock und schreibt sie atomar zurück."""
+    return state_store.locked_json(_queue_file(archive_dir), list)
+
+
+def enqueue(video_path: str, fact_data: dict, archive_dir=None) -> dict:
+    """Hängt ein archiviertes Video hinten an die Queue an."""
+    entry = {
+        "id": uuid.uuid4().hex[:12],
+        "video_path": video_path,
+        "title": fact_data.get("title", ""),
+        "description": fact_data.get("description", ""),
+        "tags": fact_data.get("tags", []),
+        "topic": fact_data.get("topic", ""),
+        "queued_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    with _locked_queue(archive_dir) as entries:
+        entries.append(entry)
+    return entry
+
+
+def peek(archive_dir=None):
+    """Ältester Eintrag, dessen Video noch existiert (verwaiste werden verworfen)."""
+    with _locked_queue(archive_dir) as entries:
+        while entries and not os.path.exists(entries[0]["video_path"]):
+            entries.pop(0)
+        return dict(entries[0]) if entries else None
+
+
+def remove(entry_id: str, archive_dir=None):
+    with _locked_queue(archive_dir) as entries:
+        entries[:] = [e for e in entries if e["id"] != entry_id]
+
+
+def pending(archive_dir=None) -> int:
+    return len(state_store.read_json(_queue_file(archive_dir), list))
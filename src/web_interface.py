@@ -4,21 +4,68 @@ Simple web dashboard for AI Fails Bot.
 Login: admin / a763763B!
 """
 
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import urllib.parse
 import json
-import subprocess
 import sys
 import os
+import mimetypes
+import secrets
+from email.utils import formatdate, parsedate_to_datetime
 from datetime import datetime
 import hashlib
+import html as html_lib
+import gzip
+import queue
+import threading
+
+try:
+    import brotli  # optional - nur wenn im Container installiert
+except ImportError:
+    brotli = None
+
+sys.path.insert(0, os.path.dirname(__file__))
+import archive_manager
+import thumbnails
+import post_schedule
+import worker
+import quota
+import state_store
+import channels
+from templates import Template
+from live_events import LOG_FILE, LOG_TAIL_LINES, tail_log, read_log_after, read_status, read_state_summary, bus, ensure_watcher
 
 # Password hash (sha256 of "a763763B!")
 PASSWORD_HASH = hashlib.sha256("a763763B!".encode()).hexdigest()
 
-# Pfade für das Archiv
-ARCHIVE_DIR = "/data/archive"
-DB_FILE = os.path.join(ARCHIVE_DIR, "archive.json")
+# Abstand der Keepalive-Kommentare im SSE-Stream (Proxies schließen sonst die Verbindung)
+SSE_KEEPALIVE_SECONDS = 15
+
+# Downloads werden in Blöcken gestreamt statt komplett in den RAM geladen
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+# Archiv-Liste: Seitengröße und Render-Cache (pro Kanal, gültig pro Archiv-Version)
+ARCHIVE_PAGE_SIZE = 30
+ARCHIVE_API_MAX_LIMIT = 200
+ARCHIVE_PAGE_CACHE_SIZE = 64
+_archive_page_cache = {}  # Kanal -> {"version", "pages"}
+# Handler-Threads des ThreadingHTTPServer teilen sich den Cache
+_archive_page_lock = threading.Lock()
+
+# Poster/Previews ändern sich nie (Dateiname enthält Datum + Uhrzeit)
+THUMB_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+# Profil-Reports (bot.py mit PROFILE_RUNS=1 / Dashboard-Schalter)
+PROFILE_LINKS = 5
+PROFILE_REPORTS = (("summary.json", "Summary"), ("allocations.txt", "Allokationen"), ("profile.collapsed", "Collapsed Stacks"))
+
+# Abgebrochene Läufe mit Checkpoint (runs.py), die im Dashboard fortgesetzt werden können
+FAILED_RUN_LINKS = 5
+
+# Antworten ab dieser Größe werden komprimiert (darunter lohnt der Header-Overhead nicht)
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
 
 # Simple session management
 sessions = {}
@@ -253,6 +300,19 @@ HTML_DASHBOARD = """
             line-height: 1.5;
             max-height: 300px;
         }
+        .run-progress {
+            margin-top: 8px;
+            height: 6px;
+            background: #e0e0e0;
+            border-radius: 3px;
+            overflow: hidden;
+        }
+        .run-progress div {
+            height: 100%;
+            width: 0;
+            background: #667eea;
+            transition: width 0.5s;
+        }
         .count-setter {
             margin-top: 10px;
             display: flex;
@@ -308,6 +368,7 @@ HTML_DASHBOARD = """
         <div class="header">
             <h1>🤖 AI Fails Bot</h1>
             <p class="subtitle">Admin Dashboard</p>
+            {channel_select}
         </div>
 
         <div class="card">
@@ -321,10 +382,19 @@ HTML_DASHBOARD = """
                     <div class="status-label">Next Post</div>
                     <div class="status-value">{next_post}</div>
                 </div>
+                <div class="status-item">
+                    <div class="status-label">Aktueller Lauf</div>
+                    <div class="status-value" id="runStage">–</div>
+                    <div class="run-progress"><div id="runProgress"></div></div>
+                </div>
+                <div class="status-item">
+                    <div class="status-label">API Quota (heute)</div>
+                    <div class="status-value" style="font-size: 13px;">{quota}</div>
+                </div>
                 <div class="status-item">
                     <div class="status-label">Total Videos</div>
                     <div class="status-value">
-                        {total_videos}
+                        <span id="totalVideos">{total_videos}</span>
                         <div class="count-setter">
                             <input type="number" id="newCount" placeholder="Nr.">
                             <button onclick="setCustomCount()">Setzen</button>
@@ -377,6 +447,13 @@ HTML_DASHBOARD = """
                         <option value="false" {drive_disabled_selected}>Deaktiviert (Nur lokal)</option>
                     </select>
                 </div>
+                <div class="setting-item">
+                    <label>Profiling (pro Stufe)</label>
+                    <select id="profilingEnabled">
+                        <option value="false" {profiling_disabled_selected}>Aus</option>
+                        <option value="true" {profiling_enabled_selected}>An (cProfile + tracemalloc)</option>
+                    </select>
+                </div>
             </div>
             <button class="btn" onclick="saveSettings()" style="background: #667eea; width: 100%;">Einstellungen Speichern</button>
         </div>
@@ -414,12 +491,22 @@ HTML_DASHBOARD = """
             <div class="info" style="background: #e8f5e9; color: #2e7d32;">
                 Hier findest du alle generierten Videos der letzten 30 Tage zum Download.
             </div>
-            <a href="/archive" class="btn" style="background: linear-gradient(135deg, #43a047 0%, #2e7d32 100%);">Zum Archiv</a>
+            <a href="/archive" id="archiveLink" class="btn" style="background: linear-gradient(135deg, #43a047 0%, #2e7d32 100%);">Zum Archiv</a>
         </div>
         
         <div class="card">
-            <h2>📜 Live Logs (Letzte 15 Zeilen)</h2>
-            <pre>{logs}</pre>
+            <h2>♻️ Abgebrochene Läufe</h2>
+            {failed_runs}
+        </div>
+
+        <div class="card">
+            <h2>🔬 Profile</h2>
+            {profile_links}
+        </div>
+
+        <div class="card">
+            <h2>📜 Live Logs (Letzte {log_tail_lines} Zeilen, alle Kanäle)</h2>
+            <pre id="logBox" data-offset="{log_offset}">{logs}</pre>
         </div>
 
         <div class="logout">
@@ -428,17 +515,90 @@ HTML_DASHBOARD = """
     </div>
 
     <script>
+        // Live-Updates per Server-Sent Events, Fallback: Log-Delta-Polling
+        const LOG_TAIL_LINES = {log_tail_lines};
+        const STAGE_LABELS = {
+            idle: 'Bereit', start: '🚀 Startet', fact: '📝 Text', image: '🎨 Bild',
+            render: '🎬 Rendern', upload: '📤 Upload', archive: '📦 Archiv',
+            done: '✅ Fertig', failed: '❌ Fehler'
+        };
+
+        function appendLog(data) {
+            const box = document.getElementById('logBox');
+            if (data.reset) box.textContent = '';
+            if (data.text) {
+                const lines = (box.textContent + data.text).split('\n');
+                box.textContent = lines.slice(-LOG_TAIL_LINES - 1).join('\n');
+                box.scrollTop = box.scrollHeight;
+            }
+            box.dataset.offset = data.next;
+        }
+
+        function showStatus(status) {
+            let label = STAGE_LABELS[status.stage] || status.stage;
+            const pct = status.progress != null ? Math.round(status.progress) : null;
+            if (pct != null && status.stage === 'render') label += ' ' + pct + '%';
+            document.getElementById('runStage').textContent = label;
+            document.getElementById('runProgress').style.width =
+                (status.stage === 'done' ? 100 : (pct || 0)) + '%';
+        }
+
+        function pollLogs() {
+            const box = document.getElementById('logBox');
+            fetch('/logs?after=' + box.dataset.offset)
+                .then(r => r.json())
+                .then(appendLog)
+                .catch(() => {});
+        }
+
+        // Kanal für Status, Zähler und Archiv-Link (Log und Einstellungen gelten für alle Kanäle)
+        let es = null;
+        function currentChannel() {
+            const select = document.getElementById('channelSelect');
+            return select ? select.value : 'default';
+        }
+
+        function switchChannel() {
+            const channel = encodeURIComponent(currentChannel());
+            document.getElementById('archiveLink').href = '/archive?channel=' + channel;
+            if (es) {
+                es.close();
+                connectEvents();
+            }
+        }
+
+        function connectEvents() {
+            const box = document.getElementById('logBox');
+            if (!window.EventSource) {
+                setInterval(pollLogs, 5000);
+                return;
+            }
+            es = new EventSource('/events?after=' + box.dataset.offset + '&channel=' + encodeURIComponent(currentChannel()));
+            es.addEventListener('log', e => appendLog(JSON.parse(e.data)));
+            es.addEventListener('status', e => showStatus(JSON.parse(e.data)));
+            es.addEventListener('state', e => {
+                document.getElementById('totalVideos').textContent = JSON.parse(e.data).total_videos;
+            });
+            es.onerror = () => {
+                // Browser verbindet selbst neu - dann ab dem aktuellen Offset weiterlesen
+                es.close();
+                setTimeout(connectEvents, 3000);
+            };
+        }
+        connectEvents();
+
         function saveSettings() {
             const mode = document.getElementById('videoMode').value;
             const anim = document.getElementById('animType').value;
             const topic = document.getElementById('videoTopic').value;
             const duration = document.getElementById('videoDuration').value;
             const drive = document.getElementById('driveEnabled').value;
+            const profiling = document.getElementById('profilingEnabled').value;
             
            fetch('/save_settings', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-                body: `mode=${mode}&anim=${anim}&duration=${duration}&drive=${drive}&topic=${encodeURIComponent(topic)}`
+                body: `mode=${mode}&anim=${anim}&duration=${duration}&drive=${drive}&profiling=${profiling}&topic=${encodeURIComponent(topic)}`
             })
             .then(r => r.json())
             .then(data => {
@@ -487,6 +647,22 @@ HTML_DASHBOARD = """
                 });
         }
         
+        function resumeRun(runId) {
+            if(!confirm('Lauf ' + runId + ' ab der abgebrochenen Stufe fortsetzen?')) return;
+            document.querySelectorAll('.btn').forEach(b => b.disabled = true);
+            fetch('/resume', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+                body: 'run_id=' + encodeURIComponent(runId)
+            })
+            .then(r => r.json())
+            .then(data => {
+                alert((data.success ? '✅ ' : '❌ ') + data.message);
+                location.reload();
+            })
+            .catch(err => alert('Fehler: ' + err));
+        }
+
         function setCustomCount() {
             const newCount = document.getElementById('newCount').value;
             if(!newCount || newCount < 0) {
@@ -516,18 +692,197 @@ HTML_DASHBOARD = """
 </html>
 """
 
-class DashboardHandler(BaseHTTPRequestHandler):
-    
-    def _get_archive_db(self):
-        """Lädt die archive.json Metadaten-Datenbank."""
-        if os.path.exists(DB_FILE):
+HTML_ARCHIVE = """
+<html>
+    <head>
+        <meta name="viewport" content="width=device-width, initial-scale=1">
+        <title>Video Archiv</title>
+        <style>
+            body { font-family: -apple-system, sans-serif; padding: 20px; background: #f5f5f7; color: #333; }
+            .container { max-width: 800px; margin: auto; background: white; padding: 30px; border-radius: 12px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
+            table { width: 100%; border-collapse: collapse; margin-top: 20px; }
+            th { text-align: left; color: #888; font-size: 11px; text-transform: uppercase; padding: 10px; border-bottom: 2px solid #f5f5f7; }
+            .filters { display: flex; gap: 8px; flex-wrap: wrap; align-items: center; font-size: 13px; }
+            .filters select, .filters input { padding: 6px; border: 1px solid #ddd; border-radius: 6px; }
+        </style>
+        <script>
+        function copyToClipboard(encodedText) {
+            const text = decodeURIComponent(encodedText);
+            navigator.clipboard.writeText(text).then(() => {
+                alert("Metadaten (Titel & Beschreibung) kopiert!");
+            }).catch(err => {
+                alert("Fehler beim Kopieren: " + err);
+            });
+        }
+        </script>
+    </head>
+    <body>
+        <div class="container">
+            <h1 style="color: #667eea;">📦 Video Archiv</h1>
+            <p style="color: #888; font-size: 14px; margin-bottom: 20px;">Alle generierten Videos der letzten 30 Tage mit Metadaten.</p>
+            <form class="filters" method="GET" action="/archive">
+                {channel_field}
+                <select name="topic"><option value="">Alle Themen</option>{topic_options}</select>
+                <input type="date" name="from" value="{date_from}">
+                <input type="date" name="to" value="{date_to}">
+                <button type="submit">Filtern</button>
+            </form>
+            <table>
+                <thead>
+                    <tr><th></th><th>Datum</th><th>Thema</th><th>Video</th><th>Aktion</th></tr>
+                </thead>
+                <tbody>
+                    {rows}
+                </tbody>
+            </table>
+            <p style="margin-top: 20px; text-align: center;">{pager}</p>
+            <hr style="border: 0; border-top: 1px solid #eee; margin: 30px 0;">
+            <a href="/" style="color: #667eea; text-decoration: none; font-weight: bold; font-family: sans-serif;">&larr; Zurück zum Dashboard</a>
+        </div>
+    </body>
+</html>
+"""
+
+HTML_ARCHIVE_ROW = """
+            <tr style="border-bottom: 1px solid #eee;">
+                <td style="padding: 10px;">
+                    <a href="/preview/{video_url}{channel_qs}" target="_blank"><img src="/thumb/{video_url}{channel_qs}" loading="lazy" width="54" height="96" alt="" style="border-radius: 6px; background: #eee; object-fit: cover;"></a>
+                </td>
+                <td style="padding: 15px; font-size: 14px;">{date}</td>
+                <td style="padding: 15px; font-size: 14px;"><b>{topic}</b></td>
+                <td style="padding: 15px;">
+                    <a href="/download/{video_url}{channel_qs}" style="color: #43a047; text-decoration: none; font-weight: bold; font-size: 14px;">🎬 Video</a>
+                    {image_btn}
+                </td>
+                <td style="padding: 15px;">
+                    <button onclick="copyToClipboard('{encoded_meta}')" style="background: #667eea; color: white; border: none; padding: 8px 12px; border-radius: 6px; cursor: pointer; font-size: 12px; font-weight: bold;">
+                        📋 Copy Meta
+                    </button>
+                </td>
+            </tr>
+            """
+
+HTML_ARCHIVE_IMAGE_BUTTON = '<a href="/download/{image_url}{channel_qs}" style="color: #e91e63; text-decoration: none; font-weight: bold; font-size: 14px; margin-left: 15px;">🖼️ Bild</a>'
+
+ARCHIVE_EMPTY_ROW = "<tr><td colspan='5' style='padding:20px; text-align:center; color:#888;'>Noch keine Videos archiviert</td></tr>"
+
+# Templates einmal beim Import kompilieren - pro Request bleibt nur ein join()
+LOGIN_TEMPLATE = Template(HTML_LOGIN, fields=("error",))
+DASHBOARD_TEMPLATE = Template(HTML_DASHBOARD, fields=(
+    "next_post", "quota", "total_videos", "logs", "log_offset", "duration_value",
+    "mode_classic_selected", "mode_3parts_selected", "mode_word_selected",
+    "anim_zoom_selected", "anim_static_selected", "anim_pan_selected",
+    "topic_random_selected", "topic_image_selected", "topic_chat_selected",
+    "topic_auto_selected", "topic_bias_selected", "topic_service_selected",
+    "topic_home_selected", "topic_trans_selected",
+    "drive_enabled_selected", "drive_disabled_selected",
+    "profiling_enabled_selected", "profiling_disabled_selected", "profile_links", "failed_runs",
+    "channel_select", "log_tail_lines",
+))
+ARCHIVE_TEMPLATE = Template(HTML_ARCHIVE, fields=("channel_field", "topic_options", "date_from", "date_to", "rows", "pager"))
+ARCHIVE_ROW_TEMPLATE = Template(HTML_ARCHIVE_ROW, fields=("date", "topic", "video_url", "channel_qs", "image_btn", "encoded_meta"))
+ARCHIVE_IMAGE_BUTTON_TEMPLATE = Template(HTML_ARCHIVE_IMAGE_BUTTON, fields=("image_url", "channel_qs"))
+
+# Dashboard-Dropdowns: Platzhalter -> Wert, bei dem 'selected' gesetzt wird
+MODE_OPTIONS = {
+    "mode_classic_selected": "classic",
+    "mode_3parts_selected": "three_parts",
+    "mode_word_selected": "word_by_word",
+}
+ANIM_OPTIONS = {
+    "anim_zoom_selected": "zoom",
+    "anim_static_selected": "static",
+    "anim_pan_selected": "pan",
+}
+TOPIC_OPTIONS = {
+    "topic_random_selected": "random",
+    "topic_image_selected": "AI image generation fails (too many fingers)",
+    "topic_chat_selected": "funny ChatGPT hallucinations",
+    "topic_auto_selected": "self-driving car glitches",
+    "topic_bias_selected": "algorithm bias and weird predictions",
+    "topic_service_selected": "chatbot customer service disasters",
+    "topic_home_selected": "funny smart home assistant fails",
+    "topic_trans_selected": "AI translation errors",
+}
+
+
+def _negotiate_encoding(accept_encoding):
+    """Wählt 'br', 'gzip' oder None anhand des Accept-Encoding Headers (inkl. q=0)."""
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
             try:
-                with open(DB_FILE, "r") as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.lower()] = q
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0 or (accepted.get("*", 0) > 0 and "gzip" not in accepted):
+        return "gzip"
+    return None
+
 
+def _compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _parse_range_header(value, size):
+    """
+    Parst einen 'Range: bytes=...' Header.
+    Gibt None zurück (Header ignorieren), [] (nicht erfüllbar -> 416)
+    oder eine Liste von (start, end) Paaren (inklusive end).
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start_s, sep, end_s = part.partition("-")
+        if not sep:
+            return None
+        try:
+            if not start_s:
+                # Suffix-Range: die letzten N Bytes
+                length = int(end_s)
+                if length <= 0:
+                    continue
+                start, end = max(0, size - length), size - 1
+            else:
+                start = int(start_s)
+                end = int(end_s) if end_s else None
+                if end is not None and start > end:
+                    return None
+                if start >= size:
+                    continue
+                end = size - 1 if end is None else min(end, size - 1)
+        except ValueError:
+            return None
+        ranges.append((start, end))
+
+    # Überlappende Bereiche zusammenfassen, damit Clients keine Datei mehrfach ziehen
+    ranges.sort()
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class DashboardHandler(BaseHTTPRequestHandler):
+    
     def do_GET(self):
         session_id = self._get_session()
         
@@ -587,7 +942,7 @@ class DashboardHandler(BaseHTTPRequestHandler):
             """
             self.wfile.write(impressum_html.encode('utf-8'))
 
-        elif self.path == "/archive":
+        elif self.path == "/archive" or self.path.startswith("/archive?"):
             if session_id and session_id in sessions:
                 self._serve_archive_list()
             else:
@@ -595,6 +950,39 @@ class DashboardHandler(BaseHTTPRequestHandler):
                 self.send_header("Location", "/")
                 self.end_headers()
 
+        elif self.path.startswith("/events"):
+            if session_id and session_id in sessions:
+                self._serve_events()
+            else:
+                self.send_response(401)
+                self.end_headers()
+
+        elif self.path.startswith("/logs"):
+            if session_id and session_id in sessions:
+                self._serve_log_delta()
+            else:
+                self._send_json({"success": False, "message": "Not authenticated"}, 401)
+
+        elif self.path.startswith("/api/archive"):
+            if session_id and session_id in sessions:
+                self._serve_archive_api()
+            else:
+                self._send_json({"success": False, "message": "Not authenticated"}, 401)
+
+        elif self.path.startswith("/thumb/") or self.path.startswith("/preview/"):
+            if session_id and session_id in sessions:
+                self._serve_archive_thumb()
+            else:
+                self.send_response(401)
+                self.end_headers()
+
+        elif self.path.startswith("/profiles/"):
+            if session_id and session_id in sessions:
+                self._serve_profile_file()
+            else:
+                self.send_response(401)
+                self.end_headers()
+
         elif self.path.startswith("/download/"):
             if session_id and session_id in sessions:
                 self._serve_archive_file()
@@ -620,7 +1008,6 @@ class DashboardHandler(BaseHTTPRequestHandler):
             password_hash = hashlib.sha256(password.encode()).hexdigest()
             
             if username == "admin" and password_hash == PASSWORD_HASH:
-                import secrets
                 session_id = secrets.token_hex(16)
                 sessions[session_id] = {"username": username, "created": datetime.now()}
                 
@@ -642,22 +1029,9 @@ class DashboardHandler(BaseHTTPRequestHandler):
                 params = urllib.parse.parse_qs(body)
                 new_count = int(params.get('count', [0])[0])
 
-                state_path = "/app/logs/state.json"
-                real_dir = os.path.realpath(os.path.dirname(state_path))
-                os.makedirs(real_dir, exist_ok=True)
+                # Nur die beiden Felder - ein gleichzeitig laufender Bot verliert nichts
+                state_store.update(last_palette=(new_count - 1) % 5, total_videos=new_count)
 
-                # Existierenden State laden, um nichts zu löschen
-                state = {"last_palette": 0, "total_videos": 0}
-                if os.path.exists(state_path):
-                    with open(state_path, "r") as f:
-                        state = json.load(f)
-
-                state["last_palette"] = (new_count - 1) % 5
-                state["total_videos"] = new_count
-                
-                with open(state_path, "w") as f:
-                    json.dump(state, f, indent=2)
-                
                 self._send_json({"success": True, "message": f"Zähler auf {new_count} gesetzt!"})
             except Exception as e:
                 self._send_json({"success": False, "message": str(e)})
@@ -676,24 +1050,19 @@ class DashboardHandler(BaseHTTPRequestHandler):
                 new_mode = params.get('mode', ['classic'])[0]
                 new_anim = params.get('anim', ['zoom'])[0]
                 new_topic = params.get('topic', ['random'])[0]
-                new_duration = float(params.get('duration', [10.0])[0])
+                new_duration = float(params.get('duration', [state_store.DEFAULTS["duration"]])[0])
                 new_drive = params.get('drive', ['true'])[0].lower() == 'true'
+                new_profiling = params.get('profiling', ['false'])[0].lower() == 'true'
+
+                state_store.update(
+                    video_mode=new_mode,
+                    anim_type=new_anim,
+                    video_topic=new_topic,
+                    duration=new_duration,
+                    drive_enabled=new_drive,
+                    profiling=new_profiling,
+                )
 
-                state_path = "/app/logs/state.json"
-                state = {"last_palette": 0, "total_videos": 0}
-                if os.path.exists(state_path):
-                    with open(state_path, "r") as f:
-                        state = json.load(f)
-                
-                state["video_mode"] = new_mode
-                state["anim_type"] = new_anim
-                state["video_topic"] = new_topic
-                state["duration"] = new_duration
-                state["drive_enabled"] = new_drive
-                
-                with open(state_path, "w") as f:
-                    json.dump(state, f, indent=2)
-                
                 self._send_json({"success": True, "message": "Einstellungen gespeichert!"})
             except Exception as e:
                 self._send_json({"success": False, "message": str(e)})
@@ -708,19 +1077,16 @@ class DashboardHandler(BaseHTTPRequestHandler):
                 body = self.rfile.read(content_length).decode()
                 params = urllib.parse.parse_qs(body)
                 topic = params.get('topic', ['random'])[0]
+                channel = params.get('channel', [None])[0]
 
-                cmd = [sys.executable, "/app/src/bot.py"]
-                if topic != "random":
-                    cmd.append(f"--topic={topic}")
-
-                result = subprocess.run(
-                    cmd,
-                    capture_output=False,
-                    text=True,
-                    timeout=300
+                result = worker.run_pipeline(
+                    timeout=300,
+                    skip_youtube=False,
+                    topic=None if topic == "random" else topic,
+                    channel=channel
                 )
                 
-                if result.returncode == 0:
+                if result["success"]:
                     self._send_json({
                         "success": True,
                         "message": "Video posted successfully! Check Logs."
@@ -728,9 +1094,9 @@ class DashboardHandler(BaseHTTPRequestHandler):
                 else:
                     self._send_json({
                         "success": False,
-                        "message": "Bot finished with error code."
+                        "message": f"Bot finished with error: {result['error']}"
                     })
-            except subprocess.TimeoutExpired:
+            except TimeoutError:
                 self._send_json({
                     "success": False,
                     "message": "Timeout - bot took too long"
@@ -741,6 +1107,31 @@ class DashboardHandler(BaseHTTPRequestHandler):
                     "message": str(e)
                 })
                 
+        elif self.path == "/resume":
+            if not (session_id and session_id in sessions):
+                self._send_json({"success": False, "message": "Not authenticated"}, 401)
+                return
+
+            try:
+                content_length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(content_length).decode()
+                params = urllib.parse.parse_qs(body)
+                run_id = params.get('run_id', [''])[0]
+                if not run_id:
+                    self._send_json({"success": False, "message": "run_id fehlt"}, 400)
+                    return
+
+                result = worker.run_pipeline(timeout=300, resume=run_id)
+
+                if result["success"]:
+                    self._send_json({"success": True, "message": f"Lauf {run_id} fortgesetzt und abgeschlossen!"})
+                else:
+                    self._send_json({"success": False, "message": f"Bot finished with error: {result['error']}"})
+            except TimeoutError:
+                self._send_json({"success": False, "message": "Timeout - bot took too long"})
+            except Exception as e:
+                self._send_json({"success": False, "message": str(e)})
+
         elif self.path == "/trigger_test":
             if not (session_id and session_id in sessions):
                 self._send_json({"success": False, "message": "Not authenticated"}, 401)
@@ -751,19 +1142,16 @@ class DashboardHandler(BaseHTTPRequestHandler):
                 body = self.rfile.read(content_length).decode()
                 params = urllib.parse.parse_qs(body)
                 topic = params.get('topic', ['random'])[0]
+                channel = params.get('channel', [None])[0]
 
-                cmd = [sys.executable, "/app/src/bot.py", "--skip-youtube"]
-                if topic != "random":
-                    cmd.append(f"--topic={topic}")
-
-                result = subprocess.run(
-                    cmd,
-                    capture_output=False,
-                    text=True,
-                    timeout=300
+                result = worker.run_pipeline(
+                    timeout=300,
+                    skip_youtube=True,
+                    topic=None if topic == "random" else topic,
+                    channel=channel
                 )
                 
-                if result.returncode == 0:
+                if result["success"]:
                     self._send_json({
                         "success": True,
                         "message": "Test-Video generiert (ohne YouTube Upload)!"
@@ -771,9 +1159,9 @@ class DashboardHandler(BaseHTTPRequestHandler):
                 else:
                     self._send_json({
                         "success": False,
-                        "message": "Bot finished with error code."
+                        "message": f"Bot finished with error: {result['error']}"
                     })
-            except subprocess.TimeoutExpired:
+            except TimeoutError:
                 self._send_json({
                     "success": False,
                     "message": "Timeout - bot took too long"
@@ -796,194 +1184,517 @@ class DashboardHandler(BaseHTTPRequestHandler):
     
     def _serve_login(self, error=""):
         error_html = f'<div class="error">{error}</div>' if error else ''
-        html = HTML_LOGIN.replace('{error}', error_html)
-        
-        self.send_response(200)
-        self.send_header("Content-type", "text/html; charset=utf-8")
-        self.end_headers()
-        self.wfile.write(html.encode())
+        html = LOGIN_TEMPLATE.render(error=error_html)
+        self._send_body(html.encode(), "text/html; charset=utf-8")
     
     def _serve_dashboard(self):
+        # Gleicher Plan wie im Scheduler (inkl. Slot-Overrides)
+        slots = post_schedule.schedule_from_env()
         now_utc = datetime.utcnow()
-        current_time_str = now_utc.strftime("%H:%M")
-        
-        post_times_raw = os.environ.get("POST_TIMES", "11:00,19:00")
-        post_times = [t.strip() for t in post_times_raw.split(",")]
-        
-        future_times = [t for t in post_times if t > current_time_str]
-        if future_times:
-            next_post_utc = min(future_times)
-            day_prefix = "Heute"
-        else:
-            next_post_utc = min(post_times)
-            day_prefix = "Morgen"
+        next_slot, next_fire_at = post_schedule.next_post(slots, now_utc)
 
         def to_de(utc_str):
             h, m = map(int, utc_str.split(':'))
             return f"{(h + 1) % 24:02d}:{m:02d}"
 
-        next_post_de = to_de(next_post_utc)
-        all_times_de = ", ".join([f"<b>{to_de(t)} MEZ</b>" for t in post_times])
+        if next_slot:
+            next_post_utc = next_slot["time"]
+            day_prefix = "Heute" if next_fire_at.date() == now_utc.date() else "Morgen"
+            next_post_de = to_de(next_post_utc)
+        else:
+            next_post_utc, day_prefix, next_post_de = "--:--", "Kein Termin", "--:--"
+        all_times_de = ", ".join([f"<b>{to_de(s['time'])} MEZ</b>" for s in slots])
         
         # State laden für Counter UND Einstellungen
-        try:
-            with open("/app/logs/state.json") as f:
-                state = json.load(f)
-            total_videos = state.get("total_videos", 0)
-            video_mode = state.get("video_mode", "classic")
-            anim_type = state.get("anim_type", "zoom")
-            video_topic = state.get("video_topic", "random")
-            duration = state.get("duration", 10.0)
-            drive_enabled = state.get("drive_enabled", True)
-        except:
-            total_videos = 0
-            video_mode = "classic"
-            anim_type = "zoom"
-            video_topic = "random"
-            duration = 10.0
-            drive_enabled = True
+        state = state_store.load()
+        total_videos = state["total_videos"]
+        video_mode = state["video_mode"]
+        anim_type = state["anim_type"]
+        video_topic = state["video_topic"]
+        duration = state["duration"]
+        drive_enabled = state["drive_enabled"]
+        profiling_enabled = state["profiling"]
 
         try:
-            with open("/app/logs/bot.log", "r") as f:
-                logs = "".join(f.readlines()[-50:])
-        except:
-            logs = "Noch keine Logs vorhanden."
-        
-        html = HTML_DASHBOARD.replace('<head>', '<head><meta http-equiv="refresh" content="30">')
+            logs, log_offset = tail_log(LOG_FILE)
+            logs = html_lib.escape(logs)
+        except OSError:
+            logs, log_offset = "Noch keine Logs vorhanden.", 0
         
         status_html = f"<b>{day_prefix} {next_post_de} Uhr</b> ({next_post_utc} UTC)<br><small style='font-size:10px; color:#888;'>Intervalle: {all_times_de}</small>"
-        html = html.replace('{next_post}', status_html)
-        html = html.replace('{total_videos}', str(total_videos))
-        html = html.replace('{logs}', logs)
-        
-        # Einstellungen in HTML injizieren
-        html = html.replace('{duration_value}', str(duration))
-        html = html.replace('{mode_classic_selected}', 'selected' if video_mode == 'classic' else '')
-        html = html.replace('{mode_3parts_selected}', 'selected' if video_mode == 'three_parts' else '')
-        html = html.replace('{mode_word_selected}', 'selected' if video_mode == 'word_by_word' else '')
-        
-        # Animationstypen injizieren
-        html = html.replace('{anim_zoom_selected}', 'selected' if anim_type == 'zoom' else '')
-        html = html.replace('{anim_static_selected}', 'selected' if anim_type == 'static' else '')
-        html = html.replace('{anim_pan_selected}', 'selected' if anim_type == 'pan' else '')
-        
-        # Themen injizieren
-        html = html.replace('{topic_random_selected}', 'selected' if video_topic == 'random' else '')
-        html = html.replace('{topic_image_selected}', 'selected' if video_topic == 'AI image generation fails (too many fingers)' else '')
-        html = html.replace('{topic_chat_selected}', 'selected' if video_topic == 'funny ChatGPT hallucinations' else '')
-        html = html.replace('{topic_auto_selected}', 'selected' if video_topic == 'self-driving car glitches' else '')
-        html = html.replace('{topic_bias_selected}', 'selected' if video_topic == 'algorithm bias and weird predictions' else '')
-        html = html.replace('{topic_service_selected}', 'selected' if video_topic == 'chatbot customer service disasters' else '')
-        html = html.replace('{topic_home_selected}', 'selected' if video_topic == 'funny smart home assistant fails' else '')
-        html = html.replace('{topic_trans_selected}', 'selected' if video_topic == 'AI translation errors' else '')
-
-        # Drive Status injizieren
-        html = html.replace('{drive_enabled_selected}', 'selected' if drive_enabled else '')
-        html = html.replace('{drive_disabled_selected}', 'selected' if not drive_enabled else '')
-        
-        self.send_response(200)
-        self.send_header("Content-type", "text/html; charset=utf-8")
-        self.end_headers()
-        self.wfile.write(html.encode())
+
+        try:
+            quota_html = "<br>".join(
+                f"{row['label']}{'' if row['account'] == quota.DEFAULT_ACCOUNT else ' · ' + html_lib.escape(row['account'])}: "
+                f"<b>{row['remaining']:,}</b> / {row['daily']:,} {row['unit']}"
+                f" <small style='font-size:10px; color:#888;'>(Reset {row['reset_at'][11:]} UTC)</small>"
+                for row in quota.summary()
+            ).replace(",", ".")
+        except OSError:
+            quota_html = "–"
+
+        values = {
+            "next_post": status_html,
+            "quota": quota_html,
+            "total_videos": total_videos,
+            "logs": logs,
+            "log_offset": log_offset,
+            "duration_value": duration,
+            # Drive Status
+            "drive_enabled_selected": 'selected' if drive_enabled else '',
+            "drive_disabled_selected": 'selected' if not drive_enabled else '',
+            "profiling_enabled_selected": 'selected' if profiling_enabled else '',
+            "profiling_disabled_selected": 'selected' if not profiling_enabled else '',
+            "profile_links": self._profile_links_html(),
+            "failed_runs": self._failed_runs_html(),
+            "channel_select": self._channel_select_html(),
+            "log_tail_lines": LOG_TAIL_LINES,
+        }
+        # Einstellungen (Modus, Animation, Thema) als 'selected' markieren
+        for options, current in ((MODE_OPTIONS, video_mode), (ANIM_OPTIONS, anim_type), (TOPIC_OPTIONS, video_topic)):
+            for field, value in options.items():
+                values[field] = 'selected' if current == value else ''
+
+        html = DASHBOARD_TEMPLATE.render(**values)
+        self._send_body(html.encode(), "text/html; charset=utf-8")
+
+    def _channel_select_html(self):
+        """Kanal-Auswahl für den Live-Status (nur bei mehreren Kanälen)."""
+        try:
+            names = list(channels.load_channels())
+        except ValueError:
+            return ""
+        if len(names) < 2:
+            return ""
+        options = "".join(f'<option value="{html_lib.escape(name)}">{html_lib.escape(name)}</option>' for name in names)
+        return f'<select id="channelSelect" onchange="switchChannel()" style="margin-top: 10px;">{options}</select>'
+
+    def _serve_log_delta(self):
+        """JSON-API: /logs?after=<offset> liefert nur neue Log-Bytes."""
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        try:
+            offset = int(query.get("after", ["-1"])[0])
+        except ValueError:
+            offset = -1
+        try:
+            if offset < 0:
+                text, end = tail_log(LOG_FILE)
+                data = {"text": text, "start": 0, "next": end, "reset": True}
+            else:
+                data = read_log_after(LOG_FILE, offset)
+        except OSError:
+            data = {"text": "", "next": 0, "reset": offset > 0}
+        self._send_json(data)
+
+    def _serve_events(self):
+        """
+        Server-Sent Events: neue Log-Zeilen, Pipeline-Stufen und Render-Fortschritt.
+        Eine offene Verbindung pro Zuschauer ersetzt den Seiten-Refresh.
+        ?channel=<name>: Status und Zähler dieses Kanals (Standard: default). Das Log ist für alle Kanäle gemeinsam.
+        """
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        try:
+            log_offset = int(query.get("after", ["-1"])[0])
+        except ValueError:
+            log_offset = -1
+        channel = query.get("channel", [channels.DEFAULT_CHANNEL])[0]
+        try:
+            channels.get_channel(channel)
+        except (KeyError, ValueError):
+            self.send_error(404, "Unbekannter Kanal")
+            return
+
+        ensure_watcher()
+        q = bus.subscribe()
+        try:
+            self.send_response(200)
+            self.send_header("Content-type", "text/event-stream; charset=utf-8")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("X-Accel-Buffering", "no")
+            self.end_headers()
+            self.wfile.write(b"retry: 3000\n\n")
+            self._send_event("status", read_status(channel))
+            self._send_event("state", read_state_summary(channel))
+            log_offset = self._send_log_delta(log_offset)
+
+            while True:
+                try:
+                    event, data = q.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+                    continue
+                if event == "log":
+                    # Jede Verbindung liest ab ihrem eigenen Offset - keine Lücken, keine Doppler
+                    log_offset = self._send_log_delta(log_offset)
+                elif data.get("channel", channels.DEFAULT_CHANNEL) == channel:
+                    self._send_event(event, data)
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            bus.unsubscribe(q)
+
+    def _send_log_delta(self, offset):
+        try:
+            if offset < 0:
+                text, end = tail_log(LOG_FILE)
+                self._send_event("log", {"text": text, "start": 0, "next": end, "reset": True})
+                return end
+            delta = read_log_after(LOG_FILE, offset)
+            while delta["text"] or delta["reset"]:
+                self._send_event("log", delta)
+                offset = delta["next"]
+                if delta["reset"]:
+                    break
+                delta = read_log_after(LOG_FILE, offset)
+        except OSError:
+            pass
+        return offset
+
+    def _send_event(self, event, data):
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def _archive_channel(self):
+        """?channel=<name> -> (Kanal, Archiv-Verzeichnis) wie bei /events; None und 404 bei unbekanntem Kanal."""
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        channel = query.get("channel", [channels.DEFAULT_CHANNEL])[0]
+        try:
+            profile = channels.get_channel(channel)
+        except (KeyError, ValueError):
+            self.send_error(404, "Unbekannter Kanal")
+            return None
+        return profile["name"], profile["archive_dir"]
+
+    def _archive_query_params(self):
+        """Liest cursor/topic/from/to/limit aus dem Query-String."""
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        get = lambda key: (query.get(key, [""])[0].strip() or None)
+        try:
+            limit = int(get("limit") or ARCHIVE_PAGE_SIZE)
+        except ValueError:
+            limit = ARCHIVE_PAGE_SIZE
+        return {
+            "cursor": get("cursor"),
+            "topic": get("topic"),
+            "date_from": get("from"),
+            "date_to": get("to"),
+            "limit": max(1, min(limit, ARCHIVE_API_MAX_LIMIT)),
+        }
+
+    def _serve_archive_api(self):
+        """JSON-API: /api/archive?channel=&cursor=&limit=&topic=&from=YYYY-MM-DD&to=YYYY-MM-DD"""
+        resolved = self._archive_channel()
+        if resolved is None:
+            return
+        page = archive_manager.query_archive(archive_dir=resolved[1], **self._archive_query_params())
+        self._send_json(page)
 
     def _serve_archive_list(self):
-        """Erweiterte Archiv-Liste mit Metadaten und Copy-Button."""
-        items = self._get_archive_db()
-        items = sorted(items, key=lambda x: x.get('timestamp', ''), reverse=True)
-        
-        rows = ""
-        for item in items:
+        """Erweiterte Archiv-Liste mit Metadaten und Copy-Button (seitenweise, gecacht, ?channel= wie /events)."""
+        resolved = self._archive_channel()
+        if resolved is None:
+            return
+        channel, archive_dir = resolved
+        params = self._archive_query_params()
+        params["limit"] = ARCHIVE_PAGE_SIZE
+        version = archive_manager.archive_version(archive_dir)
+        cache_key = tuple(sorted(params.items()))
+
+        with _archive_page_lock:
+            cache = _archive_page_cache.setdefault(channel, {"version": None, "pages": {}})
+            if cache["version"] != version:
+                cache["version"] = version
+                cache["pages"] = {}
+            body = cache["pages"].get(cache_key)
+
+        if body is None:
+            # Rendern außerhalb des Locks; rendern zwei Threads dieselbe Seite, gewinnt der erste
+            page = archive_manager.query_archive(archive_dir=archive_dir, **params)
+            rendered = {None: self._render_archive_page(page, params, channel, archive_dir).encode('utf-8')}
+            with _archive_page_lock:
+                pages = cache["pages"]
+                if cache["version"] != version:
+                    body = rendered  # Archiv inzwischen geändert: nur ausliefern, nicht cachen
+                else:
+                    body = pages.get(cache_key)
+                    if body is None:
+                        if len(pages) >= ARCHIVE_PAGE_CACHE_SIZE:
+                            pages.pop(next(iter(pages)))
+                        body = pages[cache_key] = rendered
+
+        # Komprimierte Variante mit cachen, damit nicht jeder Request neu komprimiert
+        encoding = _negotiate_encoding(self.headers.get("Accept-Encoding"))
+        if encoding and encoding not in body and len(body[None]) >= COMPRESS_MIN_BYTES:
+            compressed = _compress(body[None], encoding)
+            with _archive_page_lock:
+                body.setdefault(encoding, compressed)
+        if encoding in body:
+            self._send_body(body[encoding], "text/html; charset=utf-8", encoding=encoding)
+        else:
+            self._send_body(body[None], "text/html; charset=utf-8", encoding=False)
+
+    def _render_archive_page(self, page, params, channel, archive_dir):
+        esc = html_lib.escape
+        # Links auf Dateien/Seiten tragen den Kanal weiter (Standardkanal ohne Parameter)
+        is_default = channel == channels.DEFAULT_CHANNEL
+        channel_qs = "" if is_default else "?" + urllib.parse.urlencode({"channel": channel})
+        rows = []
+        for item in page["items"]:
             raw_text = f"{item.get('title', '')}\n\n{item.get('description', '')}"
-            encoded_meta = urllib.parse.quote(raw_text)
-            
             image_btn = ""
             if item.get("image_file"):
-                image_btn = f'<a href="/download/{item["image_file"]}" style="color: #e91e63; text-decoration: none; font-weight: bold; font-size: 14px; margin-left: 15px;">🖼️ Bild</a>'
-            
-            rows += f"""
-            <tr style="border-bottom: 1px solid #eee;">
-                <td style="padding: 15px; font-size: 14px;">{item.get('timestamp', '')[:10]}</td>
-                <td style="padding: 15px; font-size: 14px;"><b>{item.get('topic', 'General')}</b></td>
-                <td style="padding: 15px;">
-                    <a href="/download/{item.get('video_file', '')}" style="color: #43a047; text-decoration: none; font-weight: bold; font-size: 14px;">🎬 Video</a>
-                    {image_btn}
-                </td>
-                <td style="padding: 15px;">
-                    <button onclick="copyToClipboard('{encoded_meta}')" style="background: #667eea; color: white; border: none; padding: 8px 12px; border-radius: 6px; cursor: pointer; font-size: 12px; font-weight: bold;">
-                        📋 Copy Meta
-                    </button>
-                </td>
-            </tr>
-            """
-        
-        html = f"""
-        <html>
-            <head>
-                <meta name="viewport" content="width=device-width, initial-scale=1">
-                <title>Video Archiv</title>
-                <style>
-                    body {{ font-family: -apple-system, sans-serif; padding: 20px; background: #f5f5f7; color: #333; }}
-                    .container {{ max-width: 800px; margin: auto; background: white; padding: 30px; border-radius: 12px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }}
-                    table {{ width: 100%; border-collapse: collapse; margin-top: 20px; }}
-                    th {{ text-align: left; color: #888; font-size: 11px; text-transform: uppercase; padding: 10px; border-bottom: 2px solid #f5f5f7; }}
-                </style>
-                <script>
-                function copyToClipboard(encodedText) {{
-                    const text = decodeURIComponent(encodedText);
-                    navigator.clipboard.writeText(text).then(() => {{
-                        alert("Metadaten (Titel & Beschreibung) kopiert!");
-                    }}).catch(err => {{
-                        alert("Fehler beim Kopieren: " + err);
-                    }});
-                }}
-                </script>
-            </head>
-            <body>
-                <div class="container">
-                    <h1 style="color: #667eea;">📦 Video Archiv</h1>
-                    <p style="color: #888; font-size: 14px; margin-bottom: 20px;">Alle generierten Videos der letzten 30 Tage mit Metadaten.</p>
-                    <table>
-                        <thead>
-                            <tr><th>Datum</th><th>Thema</th><th>Video</th><th>Aktion</th></tr>
-                        </thead>
-                        <tbody>
-                            {rows if rows else "<tr><td colspan='4' style='padding:20px; text-align:center; color:#888;'>Noch keine Videos archiviert</td></tr>"}
-                        </tbody>
-                    </table>
-                    <hr style="border: 0; border-top: 1px solid #eee; margin: 30px 0;">
-                    <a href="/" style="color: #667eea; text-decoration: none; font-weight: bold; font-family: sans-serif;">&larr; Zurück zum Dashboard</a>
-                </div>
-            </body>
-        </html>
-        """
-        self.send_response(200)
-        self.send_header("Content-type", "text/html; charset=utf-8")
-        self.end_headers()
-        self.wfile.write(html.encode('utf-8'))
+                image_btn = ARCHIVE_IMAGE_BUTTON_TEMPLATE.render(image_url=urllib.parse.quote(item["image_file"]),
+                                                                 channel_qs=channel_qs)
+            rows.append(ARCHIVE_ROW_TEMPLATE.render(
+                date=esc(item.get('timestamp', '')[:10]),
+                topic=esc(item.get('topic', 'General')),
+                video_url=urllib.parse.quote(item.get('video_file', '')),
+                channel_qs=channel_qs,
+                image_btn=image_btn,
+                encoded_meta=urllib.parse.quote(raw_text),
+            ))
+
+        filter_qs = {k: v for k, v in (("channel", None if is_default else channel), ("topic", params["topic"]),
+                                       ("from", params["date_from"]), ("to", params["date_to"])) if v}
+        pager = []
+        if params["cursor"]:
+            pager.append(f'<a href="/archive?{urllib.parse.urlencode(filter_qs)}" style="color: #667eea; text-decoration: none; font-weight: bold;">&laquo; Neueste</a>')
+        if page["next_cursor"]:
+            next_qs = urllib.parse.urlencode(dict(filter_qs, cursor=page["next_cursor"]))
+            pager.append(f'<a href="/archive?{next_qs}" style="color: #667eea; text-decoration: none; font-weight: bold;">Ältere &raquo;</a>')
+
+        topic_options = "".join(
+            f'<option value="{esc(t)}" {"selected" if t == params["topic"] else ""}>{esc(t)}</option>'
+            for t in archive_manager.archive_topics(archive_dir)
+        )
+
+        return ARCHIVE_TEMPLATE.render(
+            channel_field="" if is_default else f'<input type="hidden" name="channel" value="{esc(channel)}">',
+            rows="".join(rows) or ARCHIVE_EMPTY_ROW,
+            pager=" &nbsp;|&nbsp; ".join(pager),
+            topic_options=topic_options,
+            date_from=esc(params["date_from"] or ""),
+            date_to=esc(params["date_to"] or ""),
+        )
+
+    def _archive_path_from_url(self, prefix):
+        """Dateiname aus der URL -> Pfad im Archiv des Kanals (?channel=, ohne Verzeichnis-Tricks). None wenn ungültig."""
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        try:
+            archive_dir = channels.get_channel(query.get("channel", [channels.DEFAULT_CHANNEL])[0])["archive_dir"]
+        except (KeyError, ValueError):
+            return None
+        raw_name = urllib.parse.urlsplit(self.path).path[len(prefix):]
+        filename = os.path.basename(urllib.parse.unquote(raw_name))
+        file_path = os.path.join(archive_dir, filename)
+        if not archive_manager.is_media_file(filename) or not os.path.isfile(file_path):
+            return None
+        return file_path
 
     def _serve_archive_file(self):
-        filename = self.path.replace("/download/", "")
-        file_path = os.path.join(ARCHIVE_DIR, filename)
-        if os.path.exists(file_path):
-            with open(file_path, 'rb') as f:
-                self.send_response(200)
-                self.send_header("Content-type", "video/mp4")
-                self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
-                self.end_headers()
-                self.wfile.write(f.read())
-        else:
+        file_path = self._archive_path_from_url("/download/")
+        if file_path is None:
+            self.send_error(404, "Datei nicht gefunden")
+            return
+        self._stream_file(file_path)
+
+    def _profile_links_html(self):
+        import profiling
+        runs = profiling.list_runs(limit=PROFILE_LINKS)
+        if not runs:
+            return ("<div class='info'>Noch keine Profile. Profiling in den Einstellungen aktivieren "
+                    "oder <code>PROFILE_RUNS=1</code> setzen.</div>")
+        rows = []
+        for run in runs:
+            quoted = urllib.parse.quote(run)
+            links = " · ".join(f"<a href='/profiles/{quoted}/{name}'>{label}</a>" for name, label in PROFILE_REPORTS)
+            rows.append(f"<div style='margin: 6px 0;'><b>{html_lib.escape(run)}</b><br><small>{links}</small></div>")
+        return "".join(rows)
+
+    def _failed_runs_html(self):
+        import runs
+        failed = [m for m in runs.list_runs() if runs.is_resumable(m, automatic=False)][:FAILED_RUN_LINKS]
+        if not failed:
+            return "<div class='info'>Keine abgebrochenen Läufe.</div>"
+        rows = []
+        for manifest in failed:
+            run_id = html_lib.escape(manifest["run_id"])
+            stage = html_lib.escape(manifest.get("failed_stage") or runs.next_stage(manifest) or "-")
+            error = html_lib.escape((manifest.get("error") or "Prozess abgebrochen")[:160])
+            rows.append(
+                f"<div style='margin: 8px 0;'><b>{run_id}</b> <small>({html_lib.escape(manifest['channel'])}, "
+                f"Versuch {manifest.get('attempts', 1)}, offen ab: {stage})</small><br>"
+                f"<small style='color:#c0392b;'>{error}</small><br>"
+                f"<button class='btn' style='padding: 6px 14px; font-size: 13px;' "
+                f"onclick=\"resumeRun('{run_id}')\">Fortsetzen</button></div>"
+            )
+        return "".join(rows)
+
+    def _serve_profile_file(self):
+        """/profiles/<run>/<report> - nur die bekannten Report-Dateien, keine Pfade."""
+        import profiling
+        parts = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path).split("/")
+        if len(parts) != 4 or not parts[2] or parts[2] in (".", ".."):
+            self.send_error(404, "Datei nicht gefunden")
+            return
+        run, report = os.path.basename(parts[2]), os.path.basename(parts[3])
+        if not (report in dict(PROFILE_REPORTS) or report.endswith(".pstats")):
+            self.send_error(404, "Datei nicht gefunden")
+            return
+        file_path = os.path.join(os.path.realpath(profiling.PROFILE_DIR), run, report)
+        if not os.path.isfile(file_path):
             self.send_error(404, "Datei nicht gefunden")
+            return
+        self._stream_file(file_path, disposition="inline" if not report.endswith(".pstats") else "attachment")
+
+    def _serve_archive_thumb(self):
+        """Poster (/thumb/<video>) bzw. Preview-Clip (/preview/<video>) - bei Bedarf erzeugt."""
+        is_poster = self.path.startswith("/thumb/")
+        video_path = self._archive_path_from_url("/thumb/" if is_poster else "/preview/")
+        if video_path is None or not video_path.endswith(".mp4"):
+            self.send_error(404, "Datei nicht gefunden")
+            return
+        try:
+            target = thumbnails.ensure_poster(video_path) if is_poster else thumbnails.ensure_preview(video_path)
+        except Exception as e:
+            self.send_error(500, f"Vorschau fehlgeschlagen: {e}")
+            return
+        self._stream_file(target, cache_control=THUMB_CACHE_CONTROL, disposition="inline")
+
+    def _stream_file(self, file_path, cache_control="private, max-age=0, must-revalidate", disposition="attachment"):
+        """Streamt eine Datei mit Range-, ETag- und Last-Modified-Support."""
+        filename = os.path.basename(file_path)
+        with open(file_path, "rb") as f:
+            st = os.fstat(f.fileno())
+            size = st.st_size
+            etag = f'"{st.st_mtime_ns:x}-{size:x}"'
+            last_modified = formatdate(st.st_mtime, usegmt=True)
+            content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+            if self._not_modified(etag, st.st_mtime):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", last_modified)
+                self.send_header("Cache-Control", cache_control)
+                self.end_headers()
+                return
+
+            ranges = None
+            range_header = self.headers.get("Range")
+            if_range = self.headers.get("If-Range")
+            if range_header and (not if_range or if_range.strip() == etag):
+                ranges = _parse_range_header(range_header, size)
+                if ranges == []:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+            if not ranges:
+                self.send_response(200)
+                self.send_header("Content-Length", str(size))
+            elif len(ranges) == 1:
+                start, end = ranges[0]
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+                self.send_header("Content-Length", str(end - start + 1))
+            else:
+                boundary = secrets.token_hex(12)
+                parts = []
+                for start, end in ranges:
+                    head = (f"\r\n--{boundary}\r\n"
+                            f"Content-Type: {content_type}\r\n"
+                            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n").encode()
+                    parts.append((head, start, end))
+                tail = f"\r\n--{boundary}--\r\n".encode()
+                total = sum(len(h) + e - s + 1 for h, s, e in parts) + len(tail)
+                self.send_response(206)
+                self.send_header("Content-Length", str(total))
+
+            self.send_header("Content-type", content_type if not ranges or len(ranges) == 1
+                             else f"multipart/byteranges; boundary={boundary}")
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.send_header("Cache-Control", cache_control)
+            self.send_header("Content-Disposition", f'{disposition}; filename="{filename}"')
+            self.end_headers()
+
+            try:
+                if not ranges:
+                    self._send_file_range(f, 0, size)
+                elif len(ranges) == 1:
+                    start, end = ranges[0]
+                    self._send_file_range(f, start, end - start + 1)
+                else:
+                    for head, start, end in parts:
+                        self.wfile.write(head)
+                        self._send_file_range(f, start, end - start + 1)
+                    self.wfile.write(tail)
+            except (BrokenPipeError, ConnectionResetError):
+                # Browser bricht beim Spulen laufende Requests ab - kein Fehler
+                pass
+
+    def _not_modified(self, etag, mtime):
+        """Prüft If-None-Match / If-Modified-Since für eine 304-Antwort."""
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match:
+            tags = [t.strip() for t in if_none_match.split(",")]
+            return "*" in tags or etag in tags or f"W/{etag}" in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _send_file_range(self, f, offset, count):
+        """Schickt count Bytes ab offset - per sendfile, sonst blockweise."""
+        self.wfile.flush()
+        if hasattr(self.connection, "sendfile"):
+            # socket.sendfile nutzt os.sendfile und fällt selbst auf send() zurück
+            self.connection.sendfile(f, offset=offset, count=count)
+            return
+        f.seek(offset)
+        remaining = count
+        while remaining > 0:
+            chunk = f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            self.wfile.write(chunk)
+            remaining -= len(chunk)
     
     def _send_json(self, data, status=200):
+        self._send_body(json.dumps(data).encode(), "application/json", status)
+
+    def _send_body(self, body, content_type, status=200, encoding=None):
+        """
+        Schickt eine Antwort mit Content-Length und - falls der Client es kann -
+        gzip/brotli. encoding=None: selbst aushandeln, False: nie komprimieren,
+        'gzip'/'br': body ist bereits entsprechend komprimiert.
+        """
+        if encoding is None:
+            encoding = _negotiate_encoding(self.headers.get("Accept-Encoding"))
+            if encoding and len(body) >= COMPRESS_MIN_BYTES:
+                body = _compress(body, encoding)
+            else:
+                encoding = False
         self.send_response(status)
-        self.send_header("Content-type", "application/json")
+        self.send_header("Content-type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
+        self.wfile.write(body)
     
     def log_message(self, format, *args):
         pass
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", "8080"))
-    server = HTTPServer(("0.0.0.0", port), DashboardHandler)
+    server = ThreadingHTTPServer(("0.0.0.0", port), DashboardHandler)
     server.serve_forever()
@@ -0,0 +1,217 @@
+"""
+worker.py
+Langlebiger Pipeline-Worker: ein eigener Prozess, der bot.py einmal importiert
+(Pillow, requests, alle Pipeline-Module, Font-Cache) und danach Lauf-Aufträge
+über eine lokale Queue abarbeitet. Spart pro Video den kompletten Python-Start.
+
+Nutzung (Scheduler + Dashboard):
+    import worker
+    result = worker.run_pipeline(skip_youtube=True, topic="...", channel="default")
+
+Alle Kanäle teilen sich einen Pool aus RENDER_WORKERS warmen Prozessen
+(Standard 1). Mehr Aufträge als Worker warten, bis einer frei wird.
+
+Der Worker läuft in einem eigenen Prozess (nicht als Thread), damit ein
+abstürzender Render den Web-Server nicht mitreißt. Ist er weg, wird er neu gestartet.
+"""
+
+import os
+import sys
+import signal
+import time
+import itertools
+import threading
+import multiprocessing as mp
+import queue
+
+# spawn statt fork: der Elternprozess hat bereits Threads (Web-Server)
+_ctx = mp.get_context("spawn")
+
+# Zeit, die der Worker für Imports + Font-Preload bekommt
+WORKER_BOOT_TIMEOUT = 120
+
+# Wartezeit zwischen SIGTERM und SIGKILL an die Prozessgruppe des Workers
+WORKER_KILL_GRACE = 5
+
+# Anzahl paralleler Render-Prozesse (geteilt über alle Kanäle)
+RENDER_WORKERS = max(1, int(os.environ.get("RENDER_WORKERS", "1")))
+
+
+def _worker_main(requests_q, results_q):
+    """Läuft im Worker-Prozess."""
+    # Eigene Prozessgruppe: beim Abbruch gehen ffmpeg-Kinder mit (_kill_group)
+    os.setsid()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import bot
+    import structured_log
+
+    def _on_sigterm(signum, frame):
+        # terminate() beim Timeout: atexit läuft bei SIGTERM nicht, gepufferte
+        # bot.log-Zeilen des abgebrochenen Laufs sonst verloren. os._exit statt
+        # sys.exit, weil SystemExit unten um bot.run() abgefangen wird.
+        structured_log.flush()
+        os._exit(128 + signum)
+
+    signal.signal(signal.SIGTERM, _on_sigterm)
+
+    bot.warm_up()
+    results_q.put(("ready", None))
+
+    while True:
+        item = requests_q.get()
+        if item is None:
+            break
+        request_id, kwargs = item
+        try:
+            result = bot.run(**kwargs)
+        except BaseException as e:  # auch SystemExit aus Untermodulen abfangen
+            result = {"success": False, "video": None, "video_id": None, "error": str(e)}
+        structured_log.flush()  # Log des Laufs steht in bot.log, bevor der Aufrufer das Ergebnis sieht
+        results_q.put((request_id, result))
+
+
+def _kill_group(process):
+    """Beendet den Worker samt Kindern (ffmpeg): SIGTERM an die Gruppe, nach Frist SIGKILL."""
+    try:
+        own_group = os.getpgid(process.pid) == process.pid
+    except ProcessLookupError:
+        return
+    if not own_group:
+        # setsid() im Worker noch nicht gelaufen - nur den Prozess selbst beenden
+        process.terminate()
+        process.join(timeout=WORKER_KILL_GRACE)
+        if process.is_alive():
+            process.kill()
+        return
+    os.killpg(process.pid, signal.SIGTERM)
+    process.join(timeout=WORKER_KILL_GRACE)
+    try:
+        os.killpg(process.pid, signal.SIGKILL)  # übrig gebliebene Kinder
+    except ProcessLookupError:
+        pass
+    process.join(timeout=1)
+
+
+class PipelineWorker:
+    """Ein warmer Worker-Prozess. Aufträge werden nacheinander ausgeführt."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._process = None
+        self._requests = None
+        self._results = None
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self):
+        """Startet den Worker-Prozess (falls er nicht schon läuft) und wartet, bis er warm ist."""
+        if self.is_alive():
+            return
+        self._requests = _ctx.Queue()
+        self._results = _ctx.Queue()
+        self._process = _ctx.Process(target=_worker_main, args=(self._requests, self._results),
+                                     name="pipeline-worker", daemon=True)
+        self._process.start()
+        # In kurzen Schritten warten: stirbt der Worker beim Import, nicht die vollen 120s hängen
+        deadline = time.monotonic() + WORKER_BOOT_TIMEOUT
+        while True:
+            try:
+                tag, _ = self._results.get(timeout=1.0)
+                break
+            except queue.Empty:
+                if not self._process.is_alive():
+                    code = self._process.exitcode
+                    self._process = None
+                    raise RuntimeError(f"Pipeline worker died during start (exit code {code})")
+                if time.monotonic() >= deadline:
+                    _kill_group(self._process)
+                    self._process = None
+                    raise RuntimeError("Pipeline worker did not start in time")
+        if tag != "ready":
+            raise RuntimeError("Pipeline worker failed to start")
+        print(f"  🔥 Pipeline worker warm (pid {self._process.pid})", flush=True)
+
+    def stop(self):
+        if self.is_alive():
+            self._requests.put(None)
+            self._process.join(timeout=10)
+            if self._process.is_alive():
+                _kill_group(self._process)
+        self._process = None
+
+    def run(self, timeout=None, **kwargs) -> dict:
+        """Schickt einen Auftrag an den Worker und wartet auf das Ergebnis von bot.run()."""
+        with self._lock:
+            self.start()
+            request_id = next(self._ids)
+            self._requests.put((request_id, kwargs))
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                wait = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+                if wait <= 0:
+                    # Wie subprocess.run(timeout=...): hängenden Lauf abbrechen, Worker neu aufsetzen
+                    _kill_group(self._process)
+                    self._process = None
+                    raise TimeoutError("Pipeline run timed out")
+                try:
+                    result_id, result = self._results.get(timeout=wait)
+                except queue.Empty:
+                    if not self._process.is_alive():
+                        code = self._process.exitcode
+                        self._process = None
+                        return {"success": False, "video": None, "video_id": None,
+                                "error": f"Pipeline worker crashed (exit code {code})"}
+                    continue
+                if result_id == request_id:
+                    return result
+
+
+class WorkerPool:
+    """Begrenzter Pool warmer Worker - jeder Auftrag bekommt den nächsten freien."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.workers = [PipelineWorker() for _ in range(size)]
+        self._idle = queue.Queue()
+        for w in self.workers:
+            self._idle.put(w)
+
+    def start(self):
+        for w in self.workers:
+            w.start()
+
+    def stop(self):
+        for w in self.workers:
+            w.stop()
+
+    def run(self, timeout=None, **kwargs) -> dict:
+        """timeout gilt für Warten auf einen freien Worker + Lauf zusammen."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            w = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("All pipeline workers busy")
+        try:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.001)
+            return w.run(timeout=remaining, **kwargs)
+        finally:
+            self._idle.put(w)
+
+
+_pool = None
+_pool_guard = threading.Lock()
+
+
+def get_pool() -> WorkerPool:
+    global _pool
+    with _pool_guard:
+        if _pool is None:
+            _pool = WorkerPool(RENDER_WORKERS)
+        return _pool
+
+
+def run_pipeline(timeout=None, **kwargs) -> dict:
+    """Führt bot.run(**kwargs) im nächsten freien warmen Worker aus (startet ihn bei Bedarf)."""
+    return get_pool().run(timeout=timeout, **kwargs)
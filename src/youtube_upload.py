@@ -11,6 +11,8 @@ import urllib.parse
 import urllib.error
 import mimetypes
 
+import quota
+
 
 YOUTUBE_UPLOAD_URL = "https://www.googleapis.com/upload/youtube/v3/videos"
 YOUTUBE_TOKEN_URL  = "https://oauth2.googleapis.com/token"
@@ -44,7 +46,11 @@ def refresh_access_token(client_id: str, client_secret: str,
 
 
 def upload_short(video_path: str, title: str, description: str,
-                 tags: list, access_token: str) -> str:
+                 tags: list, access_token: str, account: str = quota.DEFAULT_ACCOUNT) -> str:
+    """
+    account: Quota-Konto (Kanal) im Ledger. Die Upload-Kosten werden vor dem
+    ersten Request gebucht; meldet YouTube 'quotaExceeded', ist der Tag erledigt.
+    """
     # Metadata
     # Wir fügen themenspezifische Tags hinzu und stellen sicher, dass #Shorts enthalten ist
     snippet = {
@@ -86,9 +92,22 @@ def upload_short(video_path: str, title: str, description: str,
         method="POST"
     )
 
+    quota.charge("youtube", quota.YOUTUBE_UPLOAD_COST, account)
+
     print(f"  📤 Initiating upload for: {os.path.basename(video_path)}")
-    with urllib.request.urlopen(init_req, timeout=30) as resp:
-        upload_url = resp.headers.get("Location")
+    try:
+        with urllib.request.urlopen(init_req, timeout=30) as resp:
+            upload_url = resp.headers.get("Location")
+    except urllib.error.HTTPError as e:
+        error_body = e.read().decode(errors="replace")
+        if e.code == 403 and "quotaExceeded" in error_body:
+            quota.exhaust("youtube", account)
+            raise quota.QuotaExceeded("youtube", quota.YOUTUBE_UPLOAD_COST, 0, quota.next_reset("youtube"))
+        raise RuntimeError(f"YouTube upload init failed {e.code}: {error_body[:300]}")
+    except urllib.error.URLError:
+        # Request kam nie bei YouTube an - keine Units verbraucht
+        quota.refund("youtube", quota.YOUTUBE_UPLOAD_COST, account)
+        raise
 
     if not upload_url:
         raise RuntimeError("No upload URL received from YouTube")